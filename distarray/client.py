@@ -13,14 +13,16 @@ __docformat__ = "restructuredtext en"
 # Imports
 #----------------------------------------------------------------------------
 
-from itertools import product
+import operator
+from functools import reduce
 
 import numpy as np
-from IPython.parallel import Client
+from IPython.parallel import Client, Reference
 
 import distarray
 from distarray.externals.six import next
-from distarray.utils import has_exactly_one, _raise_nie
+from distarray.utils import (has_exactly_one, place_local_block,
+                             sanitize_indices)
 
 __all__ = ['DistArray']
 
@@ -29,45 +31,55 @@ __all__ = ['DistArray']
 # Code
 #----------------------------------------------------------------------------
 
-def process_return_value(subcontext, result_key):
+def process_return_value(context, result_key, descriptors):
     """Figure out what to return on the Client.
 
     Parameters
     ----------
-    key : string
+    context : Context
+    result_key : string
         Key corresponding to wrapped function's return value.
+    descriptors : list
+        One description of the return value per engine, as returned by
+        `Context._execute_with_result`.
 
     Returns
     -------
     A DistArray (if locally all values are DistArray), a None (if
-    locally all values are None), or else, pull the result back to the
-    client and return it.  If all but one of the pulled values is None,
-    return that non-None value only.
+    locally all values are None), or else, the list of values, one per
+    engine.  If all but one of the values is None, return that non-None
+    value only.
     """
-    type_key = subcontext._generate_key()
-    type_statement = "{} = str(type({}))".format(type_key, result_key)
-    subcontext._execute(type_statement)
-    result_type_str = subcontext._pull(type_key)
-
-    def is_NoneType(typestring):
-        return (typestring == "<type 'NoneType'>" or
-                typestring == "<class 'NoneType'>")
-
-    def is_LocalArray(typestring):
-        return typestring == "<class 'distarray.local.denselocalarray.DenseLocalArray'>"
-
-    if all(is_LocalArray(r) for r in result_type_str):
-        result = DistArray(result_key, subcontext)
-    elif all(is_NoneType(r) for r in result_type_str):
+    kinds = [kind for (kind, _) in descriptors]
+
+    if all(kind == 'array' for kind in kinds):
+        result = DistArray(result_key, context)
+        dtype = descriptors[0][1][0]
+        dim_data_per_rank = tuple(dim_data for (_, (_, dim_data)) in
+                                  descriptors)
+        result._metadata = (dtype, dim_data_per_rank)
+    elif all(kind == 'none' for kind in kinds):
         result = None
     else:
-        result = subcontext._pull(result_key)
+        result = []
+        for target, (kind, value) in zip(context.targets, descriptors):
+            if kind == 'array':
+                value = context.view.pull(result_key, targets=target,
+                                          block=True)
+            result.append(value)
+        if 'array' in kinds:
+            context._delete_keys(result_key)
         if has_exactly_one(result):
             result = next(x for x in result if x is not None)
 
     return result
 
 
+def _local_metadata(local_array):
+    """Return the metadata that a DistArray caches (runs on the engines)."""
+    return (local_array.dtype, local_array.dim_data)
+
+
 class DistArray(object):
 
     __array_priority__ = 20.0
@@ -75,15 +87,29 @@ class DistArray(object):
     def __init__(self, key, context):
         self.key = key
         self.context = context
+        self._metadata = None
 
     def __del__(self):
-        self.context._execute('del %s' % self.key)
+        self.context._delete_keys(self.key)
 
-    def _get_attribute(self, name):
-        key = self.context._generate_key()
-        self.context._execute0('%s = %s.%s' % (key, self.key, name))
-        result = self.context._pull0(key)
-        return result
+    def _get_metadata(self):
+        """Return the dtype and the dim_data of each process.
+
+        These do not change over the life of the array, so they are
+        fetched from the engines once, in a single round trip, and cached.
+        """
+        if self._metadata is None:
+            results = self.context._apply(_local_metadata,
+                                          Reference(self.key))
+            dtype = results[0][0]
+            dim_data_per_rank = tuple(dim_data for _, dim_data in results)
+            self._metadata = (dtype, dim_data_per_rank)
+        return self._metadata
+
+    @property
+    def dim_data_per_rank(self):
+        """The `dim_data` of each process, in rank order."""
+        return self._get_metadata()[1]
 
     def __repr__(self):
         s = '<DistArray(shape=%r, targets=%r)>' % \
@@ -91,94 +117,157 @@ class DistArray(object):
         return s
 
     def __getitem__(self, index):
-        #TODO: FIXME: major performance improvements possible here,
-        # especially for special casese like `index == slice(None)`.
-        # This would dramatically improve tondarray's performance.
+        """Index a DistArray.
+
+        Integer indices return the element, pulled back to the client.
+        Slices (with positive steps) return a new DistArray that views the
+        same data on the engines; no data is copied.  A boolean DistArray
+        distributed like `self` selects its true elements into a new 1-d
+        DistArray, which stays on the engines.
+        """
+        if isinstance(index, DistArray):
+            result_key = self.context._generate_key()
+            statement = '%s = %s[%s]' % (result_key, self.key, index.key)
+            descriptors = self.context._execute_with_result(statement,
+                                                            result_key)
+            return process_return_value(self.context, result_key,
+                                        descriptors)
 
-        if isinstance(index, int) or isinstance(index, slice):
-            tuple_index = (index,)
-            return self.__getitem__(tuple_index)
+        index_type, index = sanitize_indices(index)
 
-        elif isinstance(index, tuple):
+        if index_type == 'view':
             result_key = self.context._generate_key()
-            fmt = '%s = %s.checked_getitem(%s)'
+            fmt = '%s = %s[%s]'
             statement = fmt % (result_key, self.key, index)
             self.context._execute(statement)
-            result = process_return_value(self.context, result_key)
+            return DistArray(result_key, self.context)
+
+        else:
+            result_key = self.context._generate_key()
+            fmt = '%s = %s.checked_getitem(%s)'
+            statement = fmt % (result_key, self.key, index)
+            descriptors = self.context._execute_with_result(statement,
+                                                            result_key)
+            result = process_return_value(self.context, result_key,
+                                          descriptors)
             if result is None:
                 raise IndexError
             else:
                 return result
 
-        else:
-            raise TypeError("Invalid index type.")
-
     def __setitem__(self, index, value):
-        #TODO: FIXME: major performance improvements possible here.
-        # Especially when `index == slice(None)` and value is an
-        # ndarray, since for block and cyclic, we can generate slices of
-        # `value` and assign to local arrays. This would dramatically
-        # improve the fromndarray method's performance.
+        """Assign to elements of a DistArray.
 
-        if isinstance(index, int) or isinstance(index, slice):
-            tuple_index = (index,)
-            return self.__setitem__(tuple_index, value)
+        When `index` contains slices, `value` may be a scalar, a DistArray
+        distributed like the slice, or an array_like with the slice's
+        shape, which is scattered to the engines a block at a time.  When
+        `index` is a boolean DistArray, `value` must be a scalar.
+        """
+        self.context._evaluate_lazy()
+        if isinstance(index, DistArray):
+            with self.context.batch():
+                value_key = self.context._key_and_push(value)[0]
+                self.context._execute('%s[%s] = %s' % (self.key, index.key,
+                                                       value_key))
+            self.context._delete_keys(value_key)
+            return
+
+        index_type, index = sanitize_indices(index)
+
+        if index_type == 'view':
+            view_key = self.context._generate_key()
+            self.context._execute('%s = %s[%s]' % (view_key, self.key, index))
+            view = DistArray(view_key, self.context)
+            if isinstance(value, DistArray):
+                self.context._execute('%s[:] = %s' % (view_key, value.key))
+            elif np.isscalar(value):
+                value_key = self.context._key_and_push(value)[0]
+                self.context._execute('%s.fill(%s); del %s' %
+                                      (view_key, value_key, value_key))
+            else:
+                self.context._scatter(np.asarray(value), view)
 
-        elif isinstance(index, tuple):
+        else:
             result_key = self.context._generate_key()
             fmt = '%s = %s.checked_setitem(%s, %s)'
             statement = fmt % (result_key, self.key, index, value)
-            self.context._execute(statement)
-            result = process_return_value(self.context, result_key)
+            descriptors = self.context._execute_with_result(statement,
+                                                            result_key)
+            result = process_return_value(self.context, result_key,
+                                          descriptors)
             if result is None:
                 raise IndexError()
 
-        else:
-            raise TypeError("Invalid index type.")
-
     @property
     def shape(self):
-        return self._get_attribute('global_shape')
+        return tuple(dd['size'] for dd in self.dim_data_per_rank[0])
 
     @property
     def size(self):
-        return self._get_attribute('size')
+        return reduce(operator.mul, self.shape, 1)
 
     @property
     def dist(self):
-        return self._get_attribute('dist')
+        return tuple(dd['dist_type'] for dd in self.dim_data_per_rank[0])
 
     @property
     def dtype(self):
-        return self._get_attribute('dtype')
+        return self._get_metadata()[0]
 
     @property
     def grid_shape(self):
-        return self._get_attribute('grid_shape')
+        return tuple(dd.get('proc_grid_size')
+                     for dd in self.dim_data_per_rank[0]
+                     if dd.get('proc_grid_size'))
 
     @property
     def ndim(self):
-        return self._get_attribute('ndim')
+        return len(self.dim_data_per_rank[0])
 
     @property
     def nbytes(self):
-        return self._get_attribute('nbytes')
+        return self.size * self.item_size
 
     @property
     def item_size(self):
-        return self._get_attribute('item_size')
-
-    def tondarray(self):
-        """Returns the distributed array as an ndarray."""
-        arr = np.empty(self.shape, dtype=self.dtype)
-        local_name = self.context._generate_key()
-        self.context._execute('%s = %s.copy()' % (local_name, self.key))
-        local_arrays = self.context._pull(local_name)
-        for local_array in local_arrays:
-            maps = (ax_map.global_index for ax_map in local_array.maps)
-            for index in product(*maps):
-                arr[index] = local_array[index]
-        return arr
+        return self.dtype.itemsize
+
+    def tondarray(self, out=None):
+        """Returns the distributed array as an ndarray.
+
+        Each engine's local buffer is pulled in turn and written straight
+        into its place in the result, so no more than one local array at a
+        time is held on the client in addition to the result.
+
+        Parameters
+        ----------
+        out : ndarray, optional
+            Array to write the result into, e.g. a `numpy.memmap`.  It must
+            have the same shape as this DistArray.
+
+        Returns
+        -------
+        out : ndarray
+        """
+        shape = self.shape
+        if out is not None and tuple(out.shape) != shape:
+            raise ValueError("`out` has shape %r, expected %r" %
+                             (tuple(out.shape), shape))
+
+        if out is None:
+            out = np.empty(shape, dtype=self.dtype)
+
+        local_key = self.context._generate_key()
+        self.context._execute('%s = %s.local_array' % (local_key, self.key))
+        self.context.flush()
+        for target, dim_data in zip(self.context.targets,
+                                    self.dim_data_per_rank):
+            block = self.context.view.pull(local_key, targets=target,
+                                           block=True)
+            place_local_block(out, block, dim_data)
+
+        self.context._delete_keys(local_key)
+        return out
 
     toarray = tondarray
 
@@ -187,53 +276,193 @@ class DistArray(object):
         self.context._execute0(
             '%s = %s.get_dist_matrix()' % (key, self.key))
         result = self.context._pull0(key)
+        self.context._delete_keys(key)
         return result
 
     def fill(self, value):
+        self.context._evaluate_lazy()
         value_key = self.context._generate_key()
         self.context._push({value_key:value})
         self.context._execute('%s.fill(%s)' % (self.key, value_key))
+        self.context._delete_keys(value_key)
 
-    #TODO FIXME: implement axis and out kwargs.
-    def sum(self, axis=None, dtype=None, out=None):
-        if axis or out is not None:
-            _raise_nie()
-        keys = self.context._key_and_push(axis, dtype)
-        result_key = self.context._generate_key()
-        subs = (result_key, self.key) + keys
-        self.context._execute('%s = %s.sum(%s,%s)' % subs)
-        result = self.context._pull0(result_key)
-        return result
+    def redist(self, dist=None, grid_shape=None):
+        """Return a copy of this array with a new distribution.
 
-    def mean(self, axis=None, dtype=float, out=None):
-        if axis or out is not None:
-            _raise_nie()
-        keys = self.context._key_and_push(axis, dtype)
-        result_key = self.context._generate_key()
-        subs = (result_key, self.key) + keys
-        self.context._execute('%s = %s.mean(axis=%s, dtype=%s)' % subs)
-        result = self.context._pull0(result_key)
-        return result
+        The data moves directly between the engines.
 
-    def var(self, axis=None, dtype=None, out=None):
-        if axis or out is not None:
-            _raise_nie()
-        keys = self.context._key_and_push(axis, dtype)
+        Parameters
+        ----------
+        dist : str, list, tuple, or dict, optional
+            The new dist_type of each dimension, as in
+            `Context.empty`.  The default is {0: 'b'}.
+        grid_shape : tuple of int, optional
+            The new process grid.
+        """
         result_key = self.context._generate_key()
-        subs = (result_key, self.key) + keys
-        self.context._execute('%s = %s.var(%s,%s)' % subs)
-        result = self.context._pull0(result_key)
-        return result
-
-    def std(self, axis=None, dtype=None, out=None):
-        if axis or out is not None:
-            _raise_nie()
-        keys = self.context._key_and_push(axis, dtype)
+        with self.context.batch():
+            keys = self.context._key_and_push(dist, grid_shape)
+            statement = '%s = %s.redist(dist=%s, grid_shape=%s)'
+            statement %= (result_key, self.key) + keys
+            descriptors = self.context._execute_with_result(statement,
+                                                            result_key)
+        self.context._delete_keys(*keys)
+        return process_return_value(self.context, result_key, descriptors)
+
+    def _reduce(self, name, out=None, **kwargs):
+        """Run the reduction `name` on the engines.
+
+        Returns a scalar for a reduction over all axes, else a DistArray
+        distributed like the remaining axes of `self` (or `out`, if given).
+        """
+        if out is not None:
+            self.context._evaluate_lazy()
         result_key = self.context._generate_key()
-        subs = (result_key, self.key) + keys
-        self.context._execute('%s = %s.std(%s,%s)' % subs)
-        result = self.context._pull0(result_key)
-        return result
+        out_key = None if out is None else out.key
+        with self.context.batch():
+            kwargs_key = self.context._key_and_push(kwargs)[0]
+            statement = '%s = %s.%s(out=%s, **%s)' % (result_key, self.key,
+                                                      name, out_key,
+                                                      kwargs_key)
+            descriptors = self.context._execute_with_result(statement,
+                                                            result_key)
+        self.context._delete_keys(kwargs_key)
+        if descriptors[0][0] == 'value':
+            return descriptors[0][1]
+        result = process_return_value(self.context, result_key, descriptors)
+        return result if out is None else out
+
+    def sum(self, axis=None, dtype=None, out=None, keepdims=False):
+        return self._reduce('sum', axis=axis, dtype=dtype, out=out,
+                            keepdims=keepdims)
+
+    def prod(self, axis=None, dtype=None, out=None, keepdims=False):
+        return self._reduce('prod', axis=axis, dtype=dtype, out=out,
+                            keepdims=keepdims)
+
+    def min(self, axis=None, out=None, keepdims=False):
+        return self._reduce('min', axis=axis, out=out, keepdims=keepdims)
+
+    def max(self, axis=None, out=None, keepdims=False):
+        return self._reduce('max', axis=axis, out=out, keepdims=keepdims)
+
+    def argmin(self, axis=None, out=None, keepdims=False):
+        return self._reduce('argmin', axis=axis, out=out, keepdims=keepdims)
+
+    def argmax(self, axis=None, out=None, keepdims=False):
+        return self._reduce('argmax', axis=axis, out=out, keepdims=keepdims)
+
+    def ptp(self, axis=None, out=None, keepdims=False):
+        return self._reduce('ptp', axis=axis, out=out, keepdims=keepdims)
+
+    def mean(self, axis=None, dtype=None, out=None, keepdims=False):
+        return self._reduce('mean', axis=axis, dtype=dtype, out=out,
+                            keepdims=keepdims)
+
+    def var(self, axis=None, dtype=None, out=None, ddof=0, keepdims=False):
+        return self._reduce('var', axis=axis, dtype=dtype, out=out,
+                            ddof=ddof, keepdims=keepdims)
+
+    def std(self, axis=None, dtype=None, out=None, ddof=0, keepdims=False):
+        return self._reduce('std', axis=axis, dtype=dtype, out=out,
+                            ddof=ddof, keepdims=keepdims)
+
+    def all(self, axis=None, out=None, keepdims=False):
+        return self._reduce('all', axis=axis, out=out, keepdims=keepdims)
+
+    def any(self, axis=None, out=None, keepdims=False):
+        return self._reduce('any', axis=axis, out=out, keepdims=keepdims)
+
+    def cumsum(self, axis=None, dtype=None, out=None):
+        return self._reduce('cumsum', axis=axis, dtype=dtype, out=out)
+
+    def cumprod(self, axis=None, dtype=None, out=None):
+        return self._reduce('cumprod', axis=axis, dtype=dtype, out=out)
+
+    def quantile(self, q, axis=None, out=None, keepdims=False,
+                 approximate=False):
+        """Compute the `q`-th quantiles; see `distarray.local.quantile`."""
+        return self._reduce('quantile', q=q, axis=axis, out=out,
+                            keepdims=keepdims, approximate=approximate)
+
+    def percentile(self, q, axis=None, out=None, keepdims=False,
+                   approximate=False):
+        return self._reduce('percentile', q=q, axis=axis, out=out,
+                            keepdims=keepdims, approximate=approximate)
+
+    def median(self, axis=None, out=None, keepdims=False, approximate=False):
+        return self._reduce('median', axis=axis, out=out, keepdims=keepdims,
+                            approximate=approximate)
+
+    def dot(self, other):
+        """Dot product with the DistArray `other`.
+
+        Returns a scalar for two vectors, else a DistArray; see
+        `distarray.local.dot`.
+        """
+        result_key = self.context._generate_key()
+        statement = '%s = distarray.local.dot(%s, %s)' % (result_key,
+                                                          self.key, other.key)
+        descriptors = self.context._execute_with_result(statement, result_key)
+        if descriptors[0][0] == 'value':
+            return descriptors[0][1]
+        return process_return_value(self.context, result_key, descriptors)
+
+    def __matmul__(self, other):
+        return self.dot(other)
+
+    def sort(self, axis=-1, kind='quick'):
+        """Sort in place; see `distarray.local.sort`."""
+        self.context._evaluate_lazy()
+        self.context._execute('%s.sort(axis=%r, kind=%r)' % (self.key, axis,
+                                                              kind))
+
+    def argsort(self, axis=-1, kind='quick'):
+        """Return the global indices that would sort `self`.
+
+        See `distarray.local.argsort`.
+        """
+        result_key = self.context._generate_key()
+        statement = '%s = %s.argsort(axis=%r, kind=%r)' % (result_key,
+                                                            self.key, axis,
+                                                            kind)
+        descriptors = self.context._execute_with_result(statement, result_key)
+        return process_return_value(self.context, result_key, descriptors)
+
+    def searchsorted(self, values, side='left'):
+        """Find the indices where `values` would be inserted into the
+        sorted `self`."""
+        result_key = self.context._generate_key()
+        with self.context.batch():
+            values_key = self.context._key_and_push(values)[0]
+            statement = '%s = %s.searchsorted(%s, side=%r)' % (
+                result_key, self.key, values_key, side)
+            descriptors = self.context._execute_with_result(statement,
+                                                            result_key)
+        self.context._delete_keys(values_key)
+        return descriptors[0][1]
+
+    def nonzero(self):
+        """Return the global indices of the nonzero elements, as a tuple
+        of 1-d DistArrays; see `distarray.local.nonzero`."""
+        keys = [self.context._generate_key() for _ in range(self.ndim)]
+        self.context._execute('%s, = %s.nonzero()' % (', '.join(keys),
+                                                      self.key))
+        return tuple(DistArray(key, self.context) for key in keys)
+
+    def compress(self, condition, axis=None):
+        """Return the slices along `axis` where `condition` is true; see
+        `distarray.local.compress`."""
+        result_key = self.context._generate_key()
+        with self.context.batch():
+            condition_key = self.context._key_and_push(
+                np.asarray(condition, dtype=bool))[0]
+            statement = '%s = %s.compress(%s, axis=%r)' % (
+                result_key, self.key, condition_key, axis)
+            descriptors = self.context._execute_with_result(statement,
+                                                            result_key)
+        self.context._delete_keys(condition_key)
+        return process_return_value(self.context, result_key, descriptors)
 
     def get_ndarrays(self):
         """Pull the local ndarrays from the engines.
@@ -247,6 +476,7 @@ class DistArray(object):
         key = self.context._generate_key()
         self.context._execute('%s = %s.get_localarray()' % (key, self.key))
         result = self.context._pull(key)
+        self.context._delete_keys(key)
         return result
 
     def get_localarrays(self):
@@ -265,6 +495,7 @@ class DistArray(object):
         key = self.context._generate_key()
         self.context._execute('%s = %s.local_shape' % (key, self.key))
         result = self.context._pull(key)
+        self.context._delete_keys(key)
         return result
 
     # Binary operators
@@ -363,6 +594,54 @@ class DistArray(object):
     def __rxor__(self, other, *args, **kwargs):
         return self._rbinary_op_from_ufunc(other, distarray.bitwise_xor, '__xor__', *args, **kwargs)
 
+    # Inplace
+
+    def _inplace_op_from_ufunc(self, other, name):
+        """Apply the ufunc `name` to `self` and `other`, writing the result
+        into `self` on the engines."""
+        if not (isinstance(other, DistArray) or np.isscalar(other)):
+            return NotImplemented
+        return getattr(distarray, name)(self, other, out=self)
+
+    def __iadd__(self, other):
+        return self._inplace_op_from_ufunc(other, 'add')
+
+    def __isub__(self, other):
+        return self._inplace_op_from_ufunc(other, 'subtract')
+
+    def __imul__(self, other):
+        return self._inplace_op_from_ufunc(other, 'multiply')
+
+    def __idiv__(self, other):
+        return self._inplace_op_from_ufunc(other, 'divide')
+
+    def __itruediv__(self, other):
+        return self._inplace_op_from_ufunc(other, 'true_divide')
+
+    def __ifloordiv__(self, other):
+        return self._inplace_op_from_ufunc(other, 'floor_divide')
+
+    def __imod__(self, other):
+        return self._inplace_op_from_ufunc(other, 'mod')
+
+    def __ipow__(self, other, modulo=None):
+        return self._inplace_op_from_ufunc(other, 'power')
+
+    def __ilshift__(self, other):
+        return self._inplace_op_from_ufunc(other, 'left_shift')
+
+    def __irshift__(self, other):
+        return self._inplace_op_from_ufunc(other, 'right_shift')
+
+    def __iand__(self, other):
+        return self._inplace_op_from_ufunc(other, 'bitwise_and')
+
+    def __ior__(self, other):
+        return self._inplace_op_from_ufunc(other, 'bitwise_or')
+
+    def __ixor__(self, other):
+        return self._inplace_op_from_ufunc(other, 'bitwise_xor')
+
     def __neg__(self, *args, **kwargs):
         return distarray.negative(self, *args, **kwargs)
 
@@ -3,14 +3,17 @@
 
 __docformat__ = "restructuredtext en"
 
+import time
 import uuid
+import weakref
 from distarray.externals import six
 import collections
+from contextlib import contextmanager
 
-from IPython.parallel import Client
-import numpy
+from IPython.parallel import Client, interactive
 
 from distarray.client import DistArray
+from distarray.utils import local_block
 
 
 class Context(object):
@@ -26,10 +29,31 @@ class Context(object):
 
     '''
 
+    # Keys of dead objects on the engines are deleted in batches: along
+    # with the next `_execute`, or by themselves at the next call into the
+    # Context once this many are waiting, or the oldest has waited this
+    # many seconds.
+    garbage_size_threshold = 100
+    garbage_time_threshold = 5.0
+
     def __init__(self, client=None, targets=None):
         self.client = client if client is not None else Client()
         self.view = self.client[:]
 
+        # Nesting depth of `lazy` blocks.
+        self._lazy_depth = 0
+        # Unevaluated LazyDistArrays, by id; see `_evaluate_lazy`.
+        self._lazy_arrays = weakref.WeakValueDictionary()
+
+        # Commands queued while batching; see `batch`.
+        self._batch_depth = 0
+        self._batch_pushes = {}
+        self._batch_lines = []
+
+        # Engine-side keys waiting to be deleted; see `_delete_keys`.
+        self._garbage = []
+        self._garbage_since = None
+
         all_targets = self.view.targets
         if targets is None:
             self.targets = all_targets
@@ -63,6 +87,7 @@ class Context(object):
 
         # mapping target -> rank, rank -> target.
         target_to_rank = self.view.pull(rank, targets=self.targets).get_dict()
+        self._delete_keys(rank)
         rank_to_target = {v: k for (k, v) in target_to_rank.items()}
 
         # ensure consistency
@@ -110,24 +135,182 @@ class Context(object):
         self._push(dict(zip(keys, values)))
         return tuple(keys)
 
+    @contextmanager
+    def batch(self):
+        """Queue commands for the engines and send them together.
+
+        Inside a ``with context.batch():`` block, `_execute` and `_push`
+        are queued rather than sent one at a time.  The queue is sent to
+        the engines as a single message when a value has to come back to
+        the client (any pull, e.g. `DistArray.shape` or `tondarray`), on
+        an explicit `flush`, and when the outermost block exits.
+
+        An error raised on the engines by a queued command surfaces at the
+        flush that sends it.
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self.flush()
+
+    @contextmanager
+    def lazy(self):
+        """Build elementwise expressions without evaluating them.
+
+        Inside a ``with context.lazy():`` block, ufuncs and arithmetic on
+        DistArrays return `LazyDistArray` objects.  Each is evaluated on
+        first use, as a single fused kernel per engine, or before any
+        command that writes to an existing DistArray; see
+        `distarray.lazy`.
+        """
+        self._lazy_depth += 1
+        try:
+            yield self
+        finally:
+            self._lazy_depth -= 1
+
+    def _evaluate_lazy(self):
+        """Evaluate every pending LazyDistArray.
+
+        Called before a command writes to an existing DistArray, so that
+        the expressions read their operands as they were when built.  All
+        of them are evaluated, since a view of an operand shares its data
+        under a different key.
+        """
+        for lazy_array in list(self._lazy_arrays.values()):
+            lazy_array.key
+
+    def _delete_keys(self, *keys):
+        """Queue engine-side `keys` for deletion.
+
+        This never talks to the engines, so it is safe to call from
+        `__del__`.  The keys are deleted with the next `_execute`, or by
+        `_collect_garbage` once the size or time threshold is reached.
+        """
+        if not self._garbage:
+            self._garbage_since = time.time()
+        self._garbage.extend(keys)
+
+    def _take_garbage(self):
+        """Return a statement deleting the queued keys, and clear the queue."""
+        keys, self._garbage = self._garbage, []
+        return 'distarray.utils.remove_keys(globals(), %r)' % (tuple(keys),)
+
+    def _collect_garbage(self, force=False):
+        """Delete the queued keys if a threshold is reached, or if `force`."""
+        if not self._garbage:
+            return
+        if (force or
+                len(self._garbage) >= self.garbage_size_threshold or
+                time.time() - self._garbage_since >=
+                self.garbage_time_threshold):
+            self._execute(self._take_garbage())
+
+    def flush(self):
+        """Send any commands queued by `batch` to the engines."""
+        self._collect_garbage()
+        if not (self._batch_pushes or self._batch_lines):
+            return
+        pushes, self._batch_pushes = self._batch_pushes, {}
+        lines, self._batch_lines = self._batch_lines, []
+        view = self.client[self.targets]
+        view.apply_sync(_run_batch, pushes, '\n'.join(lines))
+
+    def _apply(self, func, *args):
+        """Call `func` on every engine and return the results in rank order.
+
+        Use `IPython.parallel.Reference` to pass engine-side objects.
+        """
+        self.flush()
+        return self.client[self.targets].apply_sync(func, *args)
+
+    def _execute_with_result(self, lines, result_key):
+        """Run `lines` on the engines and describe the object at `result_key`.
+
+        Anything queued by `batch`, and queued garbage, is sent in the same
+        message, so this takes a single round trip.
+
+        Returns
+        -------
+        list
+            One descriptor per engine, in rank order:
+            ``('array', (dtype, dim_data))`` for a LocalArray, which is
+            left on the engine, and ``('none', None)`` or
+            ``('value', value)`` otherwise, in which case `result_key` is
+            deleted from the engine.
+        """
+        if self._garbage:
+            lines = '%s\n%s' % (self._take_garbage(), lines)
+        pushes, self._batch_pushes = self._batch_pushes, {}
+        queued, self._batch_lines = self._batch_lines, []
+        source = '\n'.join(queued + [lines])
+        view = self.client[self.targets]
+        return view.apply_sync(_execute_and_describe, pushes, source,
+                               result_key)
+
     def _execute(self, lines):
+        if self._garbage:
+            lines = '%s\n%s' % (self._take_garbage(), lines)
+        if self._batch_depth:
+            self._batch_lines.append(lines)
+            return
         return self.view.execute(lines,targets=self.targets,block=True)
 
     def _push(self, d):
+        self._collect_garbage()
+        if self._batch_depth:
+            # Queued pushes are sent ahead of the queued statements, so a
+            # key may not be pushed twice in one message.
+            if any(k in self._batch_pushes for k in d):
+                self.flush()
+            self._batch_pushes.update(d)
+            return
         return self.view.push(d,targets=self.targets,block=True)
 
     def _pull(self, k):
+        self.flush()
         return self.view.pull(k,targets=self.targets,block=True)
 
     def _execute0(self, lines):
+        self.flush()
         return self.view.execute(lines,targets=self.targets[0],block=True)
 
     def _push0(self, d):
+        self.flush()
         return self.view.push(d,targets=self.targets[0],block=True)
 
     def _pull0(self, k):
+        self.flush()
         return self.view.pull(k,targets=self.targets[0],block=True)
 
+    def _scatter(self, arr, da):
+        """Copy the contents of `arr` into the DistArray `da`.
+
+        Each engine is sent only its own block of `arr`, in a single
+        message.  `arr` must have the global shape of the LocalArrays.
+        """
+        shape = da.shape
+        if tuple(arr.shape) != shape:
+            raise ValueError("Cannot copy an array of shape %r into a "
+                             "DistArray of shape %r" % (tuple(arr.shape),
+                                                        shape))
+
+        self.flush()
+        local_key = self._generate_key()
+        pending = []
+        for target, dim_data in zip(self.targets, da.dim_data_per_rank):
+            block = local_block(arr, dim_data)
+            pending.append(self.view.push({local_key: block}, targets=target,
+                                          block=False))
+        for result in pending:
+            result.wait()
+
+        self._execute('%s.local_array[...] = %s; del %s' %
+                      (da.key, local_key, local_key))
+
     def zeros(self, shape, dtype=float, dist={0:'b'}, grid_shape=None):
         keys = self._key_and_push(shape, dtype, dist, grid_shape)
         da_key = self._generate_key()
@@ -135,6 +318,7 @@ class Context(object):
         self._execute(
             '%s = distarray.local.zeros(%s, %s, %s, %s, %s)' % subs
         )
+        self._delete_keys(*keys)
         return DistArray(da_key, self)
 
     def ones(self, shape, dtype=float, dist={0:'b'}, grid_shape=None):
@@ -144,6 +328,7 @@ class Context(object):
         self._execute(
             '%s = distarray.local.ones(%s, %s, %s, %s, %s)' % subs
         )
+        self._delete_keys(*keys)
         return DistArray(da_key, self)
 
     def empty(self, shape, dtype=float, dist={0:'b'}, grid_shape=None):
@@ -153,6 +338,7 @@ class Context(object):
         self._execute(
             '%s = distarray.local.empty(%s, %s, %s, %s, %s)' % subs
         )
+        self._delete_keys(*keys)
         return DistArray(da_key, self)
 
     def save(self, name, da):
@@ -177,6 +363,7 @@ class Context(object):
             self._execute(
                 'distarray.local.save(%s + "_" + str(%s.comm_rank) + ".dnpy", %s)' % subs
             )
+            self._delete_keys(subs[0])
         elif isinstance(name, collections.Iterable):
             if len(name) != len(self.targets):
                 errmsg = "`name` must be the same length as `self.targets`."
@@ -185,6 +372,7 @@ class Context(object):
             self._execute(
                 'distarray.local.save(%s[%s.comm_rank], %s)' % subs
             )
+            self._delete_keys(subs[0])
         else:
             errmsg = "`name` must be a string or a list."
             raise TypeError(errmsg)
@@ -219,6 +407,7 @@ class Context(object):
             self._execute(
                 '%s = distarray.local.load(%s + "_" + str(%s.Get_rank()) + ".dnpy", %s)' % subs
             )
+            self._delete_keys(subs[1])
         elif isinstance(name, collections.Iterable):
             if len(name) != len(self.targets):
                 errmsg = "`name` must be the same length as `self.targets`."
@@ -228,6 +417,7 @@ class Context(object):
             self._execute(
                 '%s = distarray.local.load(%s[%s.Get_rank()], %s)' % subs
             )
+            self._delete_keys(subs[1])
         else:
             errmsg = "`name` must be a string or a list."
             raise TypeError(errmsg)
@@ -269,6 +459,7 @@ class Context(object):
         self._execute(
             'distarray.local.save_hdf5(%s, %s, %s, %s)' % subs
         )
+        self._delete_keys(subs[0], subs[2], subs[3])
 
     def load_hdf5(self, filename, key='buffer', dist={0: 'b'},
                   grid_shape=None):
@@ -305,11 +496,31 @@ class Context(object):
         return da
 
     def fromndarray(self, arr, dist={0: 'b'}, grid_shape=None):
-        """Convert an ndarray to a distarray."""
+        """Convert an ndarray to a distarray.
+
+        Each engine is sent only the block of `arr` that it owns, in a
+        single message.
+
+        Parameters
+        ----------
+        arr : array_like
+            An ndarray, or anything with `shape` and `dtype` attributes
+            that supports slicing with positive steps (e.g. a
+            `numpy.memmap` or an h5py dataset).
+        dist : dict of int->str, optional
+            Distribution of the new DistArray.
+        grid_shape : tuple of int, optional
+            Shape of process grid.
+
+        Returns
+        -------
+        result : DistArray
+            A DistArray with the contents of `arr`.
+
+        """
         out = self.empty(arr.shape, dtype=arr.dtype, dist=dist,
                          grid_shape=grid_shape)
-        for index, value in numpy.ndenumerate(arr):
-            out[index] = value
+        self._scatter(arr, out)
         return out
 
     fromarray = fromndarray
@@ -321,4 +532,28 @@ class Context(object):
         new_key = self._generate_key()
         subs = (new_key,func_key) + keys
         self._execute('%s = distarray.local.fromfunction(%s,%s,**%s)' % subs)
+        self._delete_keys(func_key, *keys)
         return DistArray(new_key, self)
+
+
+@interactive
+def _run_batch(namespace, source):
+    """Run a batch of queued commands in an engine's namespace."""
+    globals().update(namespace)
+    exec(source, globals())
+
+
+@interactive
+def _execute_and_describe(namespace, source, result_key):
+    """Run `source` and describe the object it binds to `result_key`."""
+    from distarray.local import LocalArray
+    globals().update(namespace)
+    exec(source, globals())
+    result = globals()[result_key]
+    if isinstance(result, LocalArray):
+        return ('array', (result.dtype, result.dim_data))
+    del globals()[result_key]
+    if result is None:
+        return ('none', None)
+    else:
+        return ('value', result)
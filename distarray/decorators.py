@@ -3,10 +3,9 @@ Decorators
 """
 import functools
 
-from distarray.client import DistArray
+from distarray.client import DistArray, process_return_value
 from distarray.context import Context
 from distarray.error import ContextError
-from distarray.utils import has_exactly_one
 
 
 class DecoratorBase(object):
@@ -65,7 +64,12 @@ class DecoratorBase(object):
             exec_str %= (args, kwargs)
             context.execute(exec_str)
         """
+        arg_str, kwarg_str, _ = self._push_args(args, kwargs, context,
+                                                da_handler)
+        return arg_str, kwarg_str
 
+    def _push_args(self, args, kwargs, context=None, da_handler=None):
+        """Like `key_and_push_args`, but also return the pushed keys."""
         if context is None:
             context = self.determine_context(args, kwargs)
 
@@ -103,46 +107,14 @@ class DecoratorBase(object):
         kwarg_iter = ["'%s': %s" % (k, v) for (k, v) in kwargs.items()]
         kwarg_str = '{' + ', '.join(kwarg_iter) + '}'
 
-        return arg_str, kwarg_str
+        return arg_str, kwarg_str, tuple(push_keys)
 
-    def process_return_value(self, context, result_key):
+    def process_return_value(self, context, result_key, descriptors):
         """Figure out what to return on the Client.
 
-        Parameters
-        ----------
-        key : string
-            Key corresponding to wrapped function's return value.
-
-        Returns
-        -------
-        A DistArray (if locally all values are DistArray), a None (if
-        locally all values are None), or else, pull the result back to the
-        client and return it.  If all but one of the pulled values is None,
-        return that non-None value only.
+        See `distarray.client.process_return_value`.
         """
-        type_key = context._generate_key()
-        type_statement = "{} = str(type({}))".format(type_key, result_key)
-        context._execute(type_statement)
-        result_type_str = context._pull(type_key)
-
-        def is_NoneType(typestring):
-            return (typestring == "<type 'NoneType'>" or
-                    typestring == "<class 'NoneType'>")
-
-        def is_LocalArray(typestring):
-            return (typestring == "<class 'distarray.local.denselocalarray"
-                                  ".DenseLocalArray'>")
-
-        if all(is_LocalArray(r) for r in result_type_str):
-            result = DistArray(result_key, context)
-        elif all(is_NoneType(r) for r in result_type_str):
-            result = None
-        else:
-            result = context._pull(result_key)
-            if has_exactly_one(result):
-                result = next(x for x in result if x is not None)
-
-        return result
+        return process_return_value(context, result_key, descriptors)
 
 
 class local(DecoratorBase):
@@ -156,15 +128,20 @@ class local(DecoratorBase):
             # push function
             self.push_fn(self.context, self.fn_key, self.fn)
 
-        args, kwargs = self.key_and_push_args(args, kwargs,
-                                              context=self.context)
-        result_key = self.context._generate_key()
+        # Send the arguments along with the call, in one message.
+        with self.context.batch():
+            args, kwargs, pushed_keys = self._push_args(args, kwargs,
+                                                        context=self.context)
+            result_key = self.context._generate_key()
 
-        exec_str = "%s = %s(*%s, **%s)"
-        exec_str %= (result_key, self.fn_key, args, kwargs)
-        self.context._execute(exec_str)
+            exec_str = "%s = %s(*%s, **%s)"
+            exec_str %= (result_key, self.fn_key, args, kwargs)
+            descriptors = self.context._execute_with_result(exec_str,
+                                                            result_key)
+        self.context._delete_keys(*pushed_keys)
 
-        return self.process_return_value(self.context, result_key)
+        return self.process_return_value(self.context, result_key,
+                                         descriptors)
 
 
 class vectorize(DecoratorBase):
@@ -194,7 +171,7 @@ class vectorize(DecoratorBase):
                                          dist=arg.dist,
                                          grid_shape=arg.grid_shape)
                 # parse args
-                args_str, kwargs_str = self.key_and_push_args(
+                args_str, kwargs_str, pushed_keys = self._push_args(
                     args, kwargs, context=self.context,
                     da_handler=self.get_local_array)
 
@@ -204,4 +181,5 @@ class vectorize(DecoratorBase):
                 exec_str %= (out.key, out.key, self.fn_key, args_str,
                              kwargs_str)
                 self.context._execute(exec_str)
+                self.context._delete_keys(*pushed_keys)
                 return out
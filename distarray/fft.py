@@ -0,0 +1,78 @@
+# encoding: utf-8
+
+__docformat__ = "restructuredtext en"
+
+#----------------------------------------------------------------------------
+#  Copyright (C) 2008-2014, IPython Development Team and Enthought, Inc.
+#
+#  Distributed under the terms of the BSD License.  The full license is in
+#  the file COPYING, distributed as part of this software.
+#----------------------------------------------------------------------------
+
+"""
+Emulate numpy.fft for DistArrays.
+
+The transforms run on the engines; see `distarray.local.fft`.  The
+engines cache their plans, so repeated transforms of arrays with the same
+layout reuse the exchange schedules.
+"""
+
+#----------------------------------------------------------------------------
+# Imports
+#----------------------------------------------------------------------------
+
+from distarray.client import DistArray, process_return_value
+
+__all__ = ['fftn', 'ifftn', 'rfftn']
+
+
+#----------------------------------------------------------------------------
+# Code
+#----------------------------------------------------------------------------
+
+def _transform(name, a, axes):
+    if not isinstance(a, DistArray):
+        raise TypeError('only DistArray is accepted')
+    if axes is not None:
+        axes = tuple(int(ax) for ax in axes)
+    context = a.context
+    result_key = context._generate_key()
+    statement = '%s = distarray.local.fft.%s(%s, axes=%r)'
+    statement %= (result_key, name, a.key, axes)
+    descriptors = context._execute_with_result(statement, result_key)
+    return process_return_value(context, result_key, descriptors)
+
+
+def fftn(a, axes=None):
+    """N-dimensional discrete Fourier transform of a DistArray.
+
+    Parameters
+    ----------
+    a : DistArray
+        Block distributed or undistributed along each axis.
+    axes : sequence of int, optional
+        The axes to transform; default all.
+
+    Returns
+    -------
+    DistArray
+        Distributed like `a`.
+    """
+    return _transform('fftn', a, axes)
+
+
+def ifftn(a, axes=None):
+    """N-dimensional inverse discrete Fourier transform of a DistArray.
+
+    See `fftn` for the parameters.
+    """
+    return _transform('ifftn', a, axes)
+
+
+def rfftn(a, axes=None):
+    """N-dimensional discrete Fourier transform of a real DistArray.
+
+    See `fftn` for the parameters.  The last of `axes` is shortened to
+    ``n // 2 + 1``, as in `numpy.fft.rfftn`.
+    """
+    return _transform('rfftn', a, axes)
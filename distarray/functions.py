@@ -1,17 +1,20 @@
 # encoding: utf-8
 # Copyright (c) 2008-2014, IPython Development Team and Enthought, Inc.
 """
-Our adaptation of NumPy's ufuncs.
+Our adaptation of NumPy's ufuncs, and of a few other NumPy functions.
 """
 
 import numpy
 
 from distarray.error import ContextError
-from distarray.client import DistArray
+from distarray.client import DistArray, process_return_value
+from distarray.lazy import LazyDistArray
 
 
 __docformat__ = "restructuredtext en"
-__all__ = []  # unary_names and binary_names added to __all__ below.
+__all__ = ['bincount', 'digitize', 'histogram', 'histogram2d', 'putmask',
+           'where']
+# unary_names and binary_names are added to __all__ below.
 
 # numpy unary operations to wrap
 unary_names = ('absolute', 'arccos', 'arccosh', 'arcsin', 'arcsinh', 'arctan',
@@ -31,49 +34,170 @@ for func_name in unary_names + binary_names:
 
 
 def unary_proxy(name):
-    def proxy_func(a, *args, **kwargs):
-        context = determine_context(a)
-        new_key = context._generate_key()
-        if 'casting' in kwargs:
-            exec_str = "%s = distarray.local.%s(%s, casting='%s')"
-            exec_str %= (new_key, name, a.key, kwargs['casting'])
-        else:
-            exec_str = '%s = distarray.local.%s(%s)'
-            exec_str %= (new_key, name, a.key)
-
-        context._execute(exec_str)
-        return DistArray(new_key, context)
+    def proxy_func(a, out=None, *args, **kwargs):
+        context = determine_context(a, out, kwargs.get('where'))
+        if context._lazy_depth and out is None and 'where' not in kwargs:
+            return LazyDistArray.from_ufunc(context, name, (a,),
+                                            _ufunc_kwargs(kwargs))
+        if not isinstance(a, DistArray):
+            raise TypeError('only DistArray is accepted')
+        return _apply_ufunc(context, name, (a,), out, kwargs)
     return proxy_func
 
 
 def binary_proxy(name):
-    def proxy_func(a, b, *args, **kwargs):
-        context = determine_context(a, b)
-        is_a_dap = isinstance(a, DistArray)
-        is_b_dap = isinstance(b, DistArray)
-        if is_a_dap and is_b_dap:
-            a_key = a.key
-            b_key = b.key
-        elif is_a_dap and numpy.isscalar(b):
-            a_key = a.key
-            b_key = context._key_and_push(b)[0]
-        elif is_b_dap and numpy.isscalar(a):
-            a_key = context._key_and_push(a)[0]
-            b_key = b.key
-        else:
-            raise TypeError('only DistArray or scalars are accepted')
-        new_key = context._generate_key()
+    def proxy_func(a, b, out=None, *args, **kwargs):
+        context = determine_context(a, b, out, kwargs.get('where'))
+        for arg in (a, b):
+            if not (isinstance(arg, DistArray) or numpy.isscalar(arg)):
+                raise TypeError('only DistArray or scalars are accepted')
+        if context._lazy_depth and out is None and 'where' not in kwargs:
+            return LazyDistArray.from_ufunc(context, name, (a, b),
+                                            _ufunc_kwargs(kwargs))
+        return _apply_ufunc(context, name, (a, b), out, kwargs)
+    return proxy_func
 
-        if 'casting' in kwargs:
-            exec_str = "%s = distarray.local.%s(%s,%s, casting='%s')"
-            exec_str %= (new_key, name, a_key, b_key, kwargs['casting'])
-        else:
-            exec_str = '%s = distarray.local.%s(%s,%s)'
-            exec_str %= (new_key, name, a_key, b_key)
 
-        context._execute(exec_str)
+def _apply_ufunc(context, name, args, out, kwargs):
+    """Apply the ufunc `name` to `args` on the engines.
+
+    Scalar arguments are pushed.  If `out` is given, the result is written
+    into its buffers, and `out` is returned; else a new DistArray is.
+    `casting` and `where` are passed on to the ufunc.
+    """
+    if out is not None:
+        context._evaluate_lazy()
+    arg_keys = []
+    pushed_keys = []
+    for arg in args:
+        if isinstance(arg, DistArray):
+            arg_keys.append(arg.key)
+        else:
+            key = context._key_and_push(arg)[0]
+            arg_keys.append(key)
+            pushed_keys.append(key)
+
+    if 'casting' in kwargs:
+        arg_keys.append("casting='%s'" % kwargs['casting'])
+    where = kwargs.get('where')
+    if isinstance(where, DistArray):
+        arg_keys.append('where=%s' % where.key)
+    elif where is not None:
+        arg_keys.append('where=%r' % bool(where))
+
+    if out is None:
+        new_key = context._generate_key()
+        exec_str = '%s = distarray.local.%s(%s)'
+        exec_str %= (new_key, name, ','.join(arg_keys))
+    elif isinstance(out, DistArray):
+        exec_str = 'distarray.local.%s(%s, out=%s)'
+        exec_str %= (name, ','.join(arg_keys), out.key)
+    else:
+        raise TypeError('out must be a DistArray')
+
+    context._execute(exec_str)
+    context._delete_keys(*pushed_keys)
+    if out is None:
         return DistArray(new_key, context)
-    return proxy_func
+    return out
+
+
+def _ufunc_kwargs(kwargs):
+    """Select the keyword arguments that the proxies pass to the ufunc."""
+    return dict((k, kwargs[k]) for k in ('casting',) if k in kwargs)
+
+
+def where(condition, x=None, y=None):
+    """Return elements from `x` where `condition` is true, else from `y`.
+
+    `x` and `y` may be DistArrays or scalars.  The result is computed in
+    one pass on the engines, and is fused into the expression inside a
+    ``with context.lazy():`` block.  With `condition` alone, return
+    ``condition.nonzero()``.
+    """
+    if x is None and y is None:
+        return condition.nonzero()
+    elif x is None or y is None:
+        raise ValueError("Either both or neither of x and y must be given.")
+    context = determine_context(condition, x, y)
+    if not isinstance(condition, DistArray):
+        raise TypeError('condition must be a DistArray')
+    for arg in (x, y):
+        if not (isinstance(arg, DistArray) or numpy.isscalar(arg)):
+            raise TypeError('only DistArray or scalars are accepted')
+    if context._lazy_depth:
+        return LazyDistArray.from_ufunc(context, 'where', (condition, x, y),
+                                        {})
+    return _apply_ufunc(context, 'where', (condition, x, y), None, {})
+
+
+def putmask(a, mask, values):
+    """Set the elements of `a` where `mask` is true to `values`.
+
+    See `distarray.local.putmask`.
+    """
+    a.context._evaluate_lazy()
+    _call_local('putmask', (a, mask), values=values)
+
+
+def histogram(a, bins=10, range=None, normed=False, weights=None,
+              density=None):
+    """Compute the histogram of a DistArray.
+
+    Returns ``(hist, bin_edges)`` as ndarrays; see
+    `distarray.local.histogram`.
+    """
+    return _call_local('histogram', (a,), bins=bins, range=range,
+                       normed=normed, weights=weights, density=density)
+
+
+def histogram2d(x, y, bins=10, range=None, normed=False, weights=None,
+                density=None):
+    """Compute the bi-dimensional histogram of two DistArrays.
+
+    Returns ``(H, xedges, yedges)`` as ndarrays; see
+    `distarray.local.histogram2d`.
+    """
+    return _call_local('histogram2d', (x, y), bins=bins, range=range,
+                       normed=normed, weights=weights, density=density)
+
+
+def digitize(x, bins, right=False):
+    """Return a DistArray of the indices of the bins to which each element
+    of `x` belongs."""
+    return _call_local('digitize', (x,), bins=bins, right=right)
+
+
+def bincount(x, weights=None, minlength=0):
+    """Count the occurrences of each value in a DistArray of nonnegative
+    ints, as an ndarray."""
+    return _call_local('bincount', (x,), weights=weights,
+                       minlength=minlength)
+
+
+def _call_local(name, args, **kwargs):
+    """Call the function `name` of `distarray.local` on the engines.
+
+    `args` are DistArrays; DistArray keyword arguments are passed by key,
+    the others are pushed.  Returns a DistArray, or the value the function
+    returns on each engine, which must be the same on all of them.
+    """
+    arrays = dict((k, v) for (k, v) in kwargs.items()
+                  if isinstance(v, DistArray))
+    values = dict((k, v) for (k, v) in kwargs.items() if k not in arrays)
+    context = determine_context(*(args + tuple(arrays.values())))
+    result_key = context._generate_key()
+    with context.batch():
+        values_key = context._key_and_push(values)[0]
+        arg_keys = [arg.key for arg in args]
+        arg_keys.extend('%s=%s' % (k, v.key) for (k, v) in arrays.items())
+        statement = '%s = distarray.local.%s(%s, **%s)' % (
+            result_key, name, ', '.join(arg_keys), values_key)
+        descriptors = context._execute_with_result(statement, result_key)
+    context._delete_keys(values_key)
+    if descriptors[0][0] == 'value':
+        return descriptors[0][1]
+    return process_return_value(context, result_key, descriptors)
 
 
 def determine_context(*args):
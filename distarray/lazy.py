@@ -0,0 +1,134 @@
+# encoding: utf-8
+
+__docformat__ = "restructuredtext en"
+
+#----------------------------------------------------------------------------
+#  Copyright (C) 2008-2014, IPython Development Team and Enthought, Inc.
+#
+#  Distributed under the terms of the BSD License.  The full license is in
+#  the file COPYING, distributed as part of this software.
+#----------------------------------------------------------------------------
+
+"""
+Lazily evaluated elementwise expressions.
+
+Inside a ``with context.lazy():`` block, the ufuncs in
+`distarray.functions` (and so DistArray arithmetic) return `LazyDistArray`
+objects that record the operation instead of running it.  A LazyDistArray
+is evaluated the first time its `key` is needed, i.e. on first real use,
+or before any command that writes to an existing DistArray, which might
+be one of its operands.  The whole expression is then sent to the engines as one program and
+evaluated by `distarray.local.lazy.evaluate`, without creating a
+distributed temporary per operation.
+"""
+
+#----------------------------------------------------------------------------
+# Imports
+#----------------------------------------------------------------------------
+
+from distarray.client import DistArray
+
+__all__ = ['LazyDistArray']
+
+
+#----------------------------------------------------------------------------
+# Code
+#----------------------------------------------------------------------------
+
+class Operation(object):
+
+    """A node of an expression graph: a ufunc applied to `args`.
+
+    Each of `args` is a DistArray, a scalar, or another Operation.
+    """
+
+    def __init__(self, name, args, kwargs):
+        self.name = name
+        self.args = args
+        self.kwargs = kwargs
+
+
+class LazyDistArray(DistArray):
+
+    """A DistArray holding an unevaluated elementwise expression."""
+
+    def __init__(self, context, operation):
+        self.context = context
+        self._operation = operation
+        self._key = None
+        self._metadata = None
+        context._lazy_arrays[id(self)] = self
+
+    @classmethod
+    def from_ufunc(cls, context, name, args, kwargs):
+        """Record the ufunc `name` applied to `args`.
+
+        Unevaluated LazyDistArrays among `args` are merged into the new
+        expression rather than evaluated.
+        """
+        args = tuple(arg._operation if _is_pending(arg) else arg
+                     for arg in args)
+        return cls(context, Operation(name, args, kwargs))
+
+    @property
+    def key(self):
+        if self._key is None:
+            self._key = self._evaluate()
+        return self._key
+
+    def _evaluate(self):
+        """Evaluate the expression on the engines and return its key."""
+        program, arrays = linearize(self._operation)
+        program_key = self.context._key_and_push(program)[0]
+        new_key = self.context._generate_key()
+        array_keys = ''.join('%s, ' % a.key for a in arrays)
+        self.context._execute(
+            '%s = distarray.local.lazy.evaluate(%s, (%s)); del %s' %
+            (new_key, program_key, array_keys, program_key))
+        # Release the operands.
+        self._operation = None
+        self.context._lazy_arrays.pop(id(self), None)
+        return new_key
+
+    def __del__(self):
+        if self._key is not None:
+            super(LazyDistArray, self).__del__()
+
+
+def _is_pending(arg):
+    return isinstance(arg, LazyDistArray) and arg._key is None
+
+
+def linearize(operation):
+    """Flatten the expression graph rooted at `operation`.
+
+    Returns
+    -------
+    program : list of tuples
+        Instructions in topological order, in the format described in
+        `distarray.local.lazy`.  Subexpressions shared within the graph
+        appear only once.
+    arrays : list of DistArrays
+        The DistArrays referred to by the program's 'array' instructions.
+    """
+    program = []
+    arrays = []
+    slots = {}
+
+    def visit(obj):
+        if id(obj) in slots:
+            return slots[id(obj)]
+        if isinstance(obj, Operation):
+            operands = tuple(visit(arg) for arg in obj.args)
+            instruction = ('ufunc', obj.name, operands, obj.kwargs)
+        elif isinstance(obj, DistArray):
+            instruction = ('array', len(arrays))
+            arrays.append(obj)
+        else:
+            instruction = ('scalar', obj)
+        slots[id(obj)] = len(program)
+        program.append(instruction)
+        return slots[id(obj)]
+
+    visit(operation)
+    return program, arrays
@@ -15,3 +15,5 @@ __docformat__ = "restructuredtext en"
 
 from distarray.local import denselocalarray
 from distarray.local.denselocalarray import *
+from distarray.local import lazy
+from distarray.local import fft
@@ -59,7 +59,7 @@ def distribute_indices(dim_data):
         'c': distribute_cyclic_indices,
     }
     for dim in dim_data:
-        if dim['dist_type'] != 'n':
+        if dim['dist_type'] in distribute_fn:
             distribute_fn[dim['dist_type']](dim)
 
 
@@ -217,12 +217,27 @@ class BaseLocalArray(object):
         if hasattr(self, 'comm'):
             if self.comm is not None:
                 try:
-                    self.comm.Free()
+                    construct.release_comm(self.base_comm, self.comm)
                 except:
                     pass
 
     def compatibility_hash(self):
-        return hash((self.global_shape, self.dist, self.grid_shape, True))
+        layout = tuple(_layout_key(dd) for dd in self.dim_data)
+        return hash((self.global_shape, self.dist, self.grid_shape, layout,
+                     True))
+
+
+def _layout_key(dimdict):
+    """Summarize which global indices a process owns in one dimension."""
+    dist_type = dimdict['dist_type']
+    if dist_type == 'b':
+        return (dimdict['start'], dimdict['stop'])
+    elif dist_type == 'c':
+        return (dimdict['start'], dimdict.get('block_size', 1))
+    elif dist_type == 'u':
+        return tuple(dimdict['indices'])
+    else:
+        return ()
 
 
 def arecompatible(a, b):
@@ -52,9 +52,97 @@ def init_base_comm(comm):
 
 
 def init_comm(base_comm, grid_shape, ndistdim):
-    """Create an MPI communicator with a cartesian topology."""
-    return base_comm.Create_cart(grid_shape, ndistdim * (False,),
-                                 reorder=False)
+    """Return an MPI communicator with a cartesian topology.
+
+    Communicators are cached on `base_comm`, keyed on `grid_shape` and
+    `ndistdim`, so that compatible LocalArrays share one.  Each call
+    increments the communicator's reference count; release it with
+    `release_comm`.
+    """
+    cache = _cart_comm_cache(base_comm)
+    key = (tuple(grid_shape), ndistdim)
+    entry = cache.get(key)
+    if entry is None:
+        comm = base_comm.Create_cart(grid_shape, ndistdim * (False,),
+                                     reorder=False)
+        entry = cache[key] = [comm, 0]
+    entry[1] += 1
+    return entry[0]
+
+
+def release_comm(base_comm, comm):
+    """Decrement the reference count of a communicator from `init_comm`.
+
+    The communicator itself stays cached.  Freeing it as soon as the count
+    drops to zero would make later cache hits depend on garbage collection
+    timing, which can differ between processes, and a process that missed
+    the cache would then block in `Create_cart` alone.  Use
+    `free_unused_comms` to free unreferenced communicators collectively.
+    """
+    for entry in _cart_comm_cache(base_comm).values():
+        if entry[0] is comm:
+            entry[1] -= 1
+            return
+
+
+def free_unused_comms(base_comm):
+    """Free the cached communicators of `base_comm` that are not in use.
+
+    This is collective over `base_comm`: every process must call it at the
+    same point of the program, with the same LocalArrays alive.
+    """
+    cache = _cart_comm_cache(base_comm)
+    for key, (comm, refcount) in list(cache.items()):
+        if refcount <= 0:
+            del cache[key]
+            comm.Free()
+
+
+def _free_cart_comm_cache(base_comm, keyval, cache):
+    """Free the cached communicators when `base_comm` is freed."""
+    for comm, _ in cache.values():
+        comm.Free()
+    cache.clear()
+
+
+_CART_COMM_KEYVAL = MPI.Comm.Create_keyval(delete_fn=_free_cart_comm_cache)
+
+
+def _cart_comm_cache(base_comm):
+    """Return the dict of cartesian communicators cached on `base_comm`."""
+    cache = base_comm.Get_attr(_CART_COMM_KEYVAL)
+    if cache is None:
+        cache = {}
+        base_comm.Set_attr(_CART_COMM_KEYVAL, cache)
+    return cache
+
+
+def init_sub_comm(comm, remain_dims):
+    """Return a sub-communicator of the cartesian communicator `comm`.
+
+    `remain_dims` says, for each dimension of the process grid, whether it
+    is kept in the sub-grid (see ``MPI.Cartcomm.Sub``).  Sub-communicators
+    are cached on `comm` and freed along with it.  This is collective over
+    `comm` the first time it is called with a given `remain_dims`.
+    """
+    cache = comm.Get_attr(_SUB_COMM_KEYVAL)
+    if cache is None:
+        cache = {}
+        comm.Set_attr(_SUB_COMM_KEYVAL, cache)
+    key = tuple(bool(d) for d in remain_dims)
+    if key not in cache:
+        cache[key] = comm.Sub(key)
+    return cache[key]
+
+
+def _free_sub_comm_cache(comm, keyval, cache):
+    """Free the cached sub-communicators when `comm` is freed."""
+    for sub_comm in cache.values():
+        sub_comm.Free()
+    cache.clear()
+
+
+_SUB_COMM_KEYVAL = MPI.Comm.Create_keyval(delete_fn=_free_sub_comm_cache)
 
 
 def init_dist(dist, ndim):
@@ -15,17 +15,19 @@ __docformat__ = "restructuredtext en"
 #----------------------------------------------------------------------------
 
 from distarray.externals import six
-import math
+import copy
 
 import numpy as np
 from distarray.externals.six.moves import zip
 from collections import Mapping
 
-from distarray.mpiutils import MPI
-from distarray.utils import _raise_nie
-from distarray.local import construct, format
-from distarray.local.base import BaseLocalArray, arecompatible
-from distarray.local.error import InvalidDimensionError, IncompatibleArrayError
+from distarray.mpiutils import MPI, mpi_dtypes
+from distarray.utils import _raise_nie, sanitize_indices
+from distarray.local import construct, format, maps, sketch
+from distarray.local.base import (BaseLocalArray, arecompatible,
+                                  _layout_key)
+from distarray.local.error import (InvalidDimensionError,
+                                   IncompatibleArrayError, GridShapeError)
 
 
 #----------------------------------------------------------------------------
@@ -152,6 +154,8 @@ class DenseLocalArray(BaseLocalArray):
                                               buf=buf, comm=comm)
 
     def __del__(self):
+        if self._halo_types and not MPI.Is_finalized():
+            self._free_halo_types()
         super(DenseLocalArray, self).__del__()
 
     #-------------------------------------------------------------------------
@@ -213,7 +217,10 @@ class DenseLocalArray(BaseLocalArray):
     def set_localarray(self, a):
         arr = np.asarray(a, dtype=self.dtype, order='C')
         if arr.shape == self.local_shape:
-            self.local_array = arr
+            if self._padded_array is None:
+                self.local_array = arr
+            else:
+                self.local_array[...] = arr
         else:
             raise ValueError("Incompatible local array shape")
 
@@ -226,13 +233,13 @@ class DenseLocalArray(BaseLocalArray):
     def global_to_local(self, *global_ind):
         local_ind = list(global_ind)
         for dd in self.distdims:
-            local_ind[dd] = self.maps[dd].local_index[global_ind[dd]]
+            local_ind[dd] = self.maps[dd].global_to_local(global_ind[dd])
         return tuple(local_ind)
 
     def local_to_global(self, *local_ind):
         global_ind = list(local_ind)
         for dd in self.distdims:
-            global_ind[dd] = self.maps[dd].global_index[local_ind[dd]]
+            global_ind[dd] = self.maps[dd].local_to_global(local_ind[dd])
         return tuple(global_ind)
 
     def global_limits(self, dim):
@@ -250,21 +257,26 @@ class DenseLocalArray(BaseLocalArray):
     # 3.2.1 Array conversion
     #-------------------------------------------------------------------------
 
+    def _new_like(self, dtype=None, buf=None):
+        """Make a LocalArray distributed exactly like `self`.
+
+        Unlike the simple constructor, this preserves explicit `start` and
+        `stop` values and unstructured dimensions in `dim_data`.
+        """
+        return self.__class__.from_dim_data(copy.deepcopy(self.dim_data),
+                                            dtype=dtype, buf=buf,
+                                            comm=self.base_comm)
+
     def astype(self, newdtype):
         if newdtype is None:
             return self.copy()
         else:
             local_copy = self.local_array.astype(newdtype)
-            new_da = LocalArray(self.global_shape, dtype=newdtype, dist=self.dist,
-                                grid_shape=self.grid_shape,
-                                comm=self.base_comm, buf=local_copy)
-            return new_da
+            return self._new_like(dtype=newdtype, buf=local_copy)
 
     def copy(self):
         local_copy = self.local_array.copy()
-        return LocalArray(self.global_shape, dtype=self.dtype, dist=self.dist,
-                          grid_shape=self.grid_shape, comm=self.base_comm,
-                          buf=local_copy)
+        return self._new_like(dtype=self.dtype, buf=local_copy)
 
     def local_view(self, dtype=None):
         if dtype is None:
@@ -274,12 +286,9 @@ class DenseLocalArray(BaseLocalArray):
 
     def view(self, dtype=None):
         if dtype is None:
-            new_da = LocalArray(self.global_shape, self.dtype, self.dist,
-                                self.grid_shape, self.base_comm, buf=self.data)
+            return self._new_like(dtype=self.dtype, buf=self.data)
         else:
-            new_da = LocalArray(self.global_shape, dtype, self.dist,
-                                self.grid_shape, self.base_comm, buf=self.data)
-        return new_da
+            return self._new_like(dtype=dtype, buf=self.data)
 
     def __array__(self, dtype=None):
         if dtype is None:
@@ -293,13 +302,13 @@ class DenseLocalArray(BaseLocalArray):
         """
         Return a LocalArray based on obj.
 
-        This method constructs a new LocalArray object using (shape, dist,
-        grid_shape and base_comm) from self and dtype, buffer from obj.
+        This method constructs a new LocalArray object using the
+        distribution (dim_data and base_comm) from self and dtype, buffer
+        from obj.
 
         This is used to construct return arrays for ufuncs.
         """
-        return self.__class__(self.global_shape, obj.dtype, self.dist,
-                              self.grid_shape, self.base_comm, buf=obj)
+        return self._new_like(dtype=obj.dtype, buf=obj)
 
     def fill(self, scalar):
         self.local_array.fill(scalar)
@@ -311,8 +320,25 @@ class DenseLocalArray(BaseLocalArray):
     def reshape(self, newshape):
         _raise_nie()
 
-    def redist(self, newshape, newdist={0: 'b'}, newgrid_shape=None):
-        _raise_nie()
+    def redist(self, dist=None, grid_shape=None):
+        """Return a copy of self with a new distribution.
+
+        Parameters
+        ----------
+        dist : dict mapping int -> str, default is {0: 'b'}, optional
+            The new dist_type of each dimension, e.g. 'b', 'c', or 'n'.
+        grid_shape : tuple of int, optional
+            The new process grid.
+
+        Returns
+        -------
+        LocalArray
+            The data is moved between processes with a single
+            ``Alltoallv``; see `redistribute`.
+        """
+        new = self.__class__(self.global_shape, dtype=self.dtype, dist=dist,
+                             grid_shape=grid_shape, comm=self.base_comm)
+        return redistribute(self, new)
 
     def resize(self, newshape, refcheck=1, order='C'):
         _raise_nie()
@@ -333,51 +359,9 @@ class DenseLocalArray(BaseLocalArray):
         _raise_nie()
 
     def asdist(self, shape, dist={0: 'b'}, grid_shape=None):
-        pass
-        # new_da = LocalArray(shape, self.dtype, dist, grid_shape,
-        #                     self.base_comm)
-        # base_comm = self.base_comm
-        # local_array = self.local_array
-        # new_local_array = da.local_array
-        # recv_counts = np.zeros(self.comm_size, dtype=int)
-        #
-        # status = MPI.Status()
-        # MPI.Attach_buffer(np.empty(128+MPI.BSEND_OVERHEAD,dtype=float))
-        # done_count = 0
-        #
-        # for old_local_inds, item in np.ndenumerate(local_array):
-        #
-        #     # Compute the new owner
-        #     global_inds = self.local_to_global(new_da.comm_rank,
-        #                                        old_local_inds)
-        #     new_owner = new_da.owner_rank(global_inds)
-        #     if new_owner==self.owner_rank:
-        #         pass
-        #         # Just move the data to the right place in new_local_array
-        #     else:
-        #         # Send to the new owner with default tag
-        #         # Bsend is probably best, but Isend is also a possibility.
-        #         request = comm.Isend(item, dest=new_owner)
-        #
-        #     # Recv
-        #     incoming = comm.Iprobe(MPI.ANY_SOURCE, MPI.ANY_TAG, status)
-        #     if incoming:
-        #         old_owner = status.Get_source()
-        #         tag = status.Get_tag()
-        #         data = comm.Recv(old_owner, tag)
-        #         if tag==2:
-        #             done_count += 1
-        #         # Figure out where new location of old_owner, tag
-        #         new_local_ind = local_ind_by_owner_and_location(old_owner,
-        #                                                         location)
-        #         new_local_array[new_local_ind] = y
-        #         recv_counts[old_owner] = recv_counts[old_owner]+1
-        #
-        # while done_count < self.comm_size:
-        #     pass
-        #
-        #
-        # MPI.Detach_buffer()
+        if tuple(shape) != self.global_shape:
+            _raise_nie()
+        return self.redist(dist=dist, grid_shape=grid_shape)
 
     def asdist_like(self, other):
         """
@@ -401,7 +385,7 @@ class DenseLocalArray(BaseLocalArray):
         _raise_nie()
 
     def putmask(self, values, mask):
-        _raise_nie()
+        putmask(self, mask, values)
 
     def repeat(self, repeats, axis=None):
         _raise_nie()
@@ -410,19 +394,20 @@ class DenseLocalArray(BaseLocalArray):
         _raise_nie()
 
     def sort(self, axis=-1, kind='quick'):
-        _raise_nie()
+        """Sort in place; see the `sort` function."""
+        redistribute(sort(self, axis=axis, kind=kind), self)
 
     def argsort(self, axis=-1, kind='quick'):
-        _raise_nie()
+        return argsort(self, axis=axis, kind=kind)
 
-    def searchsorted(self, values):
-        _raise_nie()
+    def searchsorted(self, values, side='left'):
+        return searchsorted(self, values, side=side)
 
     def nonzero(self):
-        _raise_nie()
+        return nonzero(self)
 
     def compress(self, condition, axis=None, out=None):
-        _raise_nie()
+        return compress(condition, self, axis=axis, out=out)
 
     def diagonal(self, offset=0, axis1=0, axis2=1):
         _raise_nie()
@@ -431,20 +416,22 @@ class DenseLocalArray(BaseLocalArray):
     # 3.2.4 Array item selection and manipulation
     #-------------------------------------------------------------------------
 
-    def max(self, axis=None, out=None):
-        _raise_nie()
+    def max(self, axis=None, out=None, keepdims=False):
+        return _reduce(self, 'max', axis=axis, out=out, keepdims=keepdims)
 
-    def argmax(self, axis=None, out=None):
-        _raise_nie()
+    def argmax(self, axis=None, out=None, keepdims=False):
+        return _arg_reduce(self, 'argmax', axis=axis, out=out,
+                           keepdims=keepdims)
 
-    def min(axis=None, out=None):
-        _raise_nie()
+    def min(self, axis=None, out=None, keepdims=False):
+        return _reduce(self, 'min', axis=axis, out=out, keepdims=keepdims)
 
-    def argmin(self, axis=None, out=None):
-        _raise_nie()
+    def argmin(self, axis=None, out=None, keepdims=False):
+        return _arg_reduce(self, 'argmin', axis=axis, out=out,
+                           keepdims=keepdims)
 
-    def ptp(self, axis=None, out=None):
-        _raise_nie()
+    def ptp(self, axis=None, out=None, keepdims=False):
+        return _ptp(self, axis=axis, out=out, keepdims=keepdims)
 
     def clip(self, min, max, out=None):
         _raise_nie()
@@ -460,51 +447,51 @@ class DenseLocalArray(BaseLocalArray):
     def trace(self, offset=0, axis1=0, axis2=1, dtype=None, out=None):
         _raise_nie()
 
-    #TODO FIXME: implement axis and out kwargs.
-    def sum(self, axis=None, dtype=None, out=None):
-        if axis or out is not None:
-            _raise_nie()
-        return sum(self, dtype=dtype)
+    def sum(self, axis=None, dtype=None, out=None, keepdims=False):
+        return sum(self, axis=axis, dtype=dtype, out=out, keepdims=keepdims)
 
-    def mean(self, axis=None, dtype=float, out=None):
-        if axis or out is not None:
-            _raise_nie()
-        elif dtype is not None:
-            dtype = np.dtype(dtype)
-            return dtype.type((np.divide(self.sum(dtype=dtype), self.size)))
-        else:
-            return np.divide(self.sum(dtype=dtype), self.size)
+    def mean(self, axis=None, dtype=None, out=None, keepdims=False):
+        return mean(self, axis=axis, dtype=dtype, out=out, keepdims=keepdims)
 
-    def var(self, axis=None, dtype=None, out=None):
-        if axis or out is not None:
-            _raise_nie()
-        mu = self.mean()
-        temp = (self - mu)**2
-        return temp.mean(dtype=dtype)
+    def var(self, axis=None, dtype=None, out=None, ddof=0, keepdims=False):
+        return var(self, axis=axis, dtype=dtype, out=out, ddof=ddof,
+                   keepdims=keepdims)
 
-    def std(self, axis=None, dtype=None, out=None):
-        if axis or out is not None:
-            _raise_nie()
-        elif dtype is not None:
-            dtype = np.dtype(dtype)
-            return dtype.type((math.sqrt(self.var())))
-        else:
-            return math.sqrt(self.var())
+    def std(self, axis=None, dtype=None, out=None, ddof=0, keepdims=False):
+        return std(self, axis=axis, dtype=dtype, out=out, ddof=ddof,
+                   keepdims=keepdims)
+
+    def quantile(self, q, axis=None, out=None, keepdims=False,
+                 approximate=False):
+        return quantile(self, q, axis=axis, out=out, keepdims=keepdims,
+                        approximate=approximate)
+
+    def percentile(self, q, axis=None, out=None, keepdims=False,
+                   approximate=False):
+        return percentile(self, q, axis=axis, out=out, keepdims=keepdims,
+                          approximate=approximate)
+
+    def median(self, axis=None, out=None, keepdims=False, approximate=False):
+        return median(self, axis=axis, out=out, keepdims=keepdims,
+                      approximate=approximate)
 
     def cumsum(self, axis=None, dtype=None, out=None):
-        _raise_nie()
+        return cumsum(self, axis=axis, dtype=dtype, out=out)
 
-    def prod(self, axis=None, dtype=None, out=None):
-        _raise_nie()
+    def prod(self, axis=None, dtype=None, out=None, keepdims=False):
+        return prod(self, axis=axis, dtype=dtype, out=out, keepdims=keepdims)
 
     def cumprod(self, axis=None, dtype=None, out=None):
-        _raise_nie()
+        return cumprod(self, axis=axis, dtype=dtype, out=out)
 
-    def all(self, axis=None, out=None):
-        _raise_nie()
+    def all(self, axis=None, out=None, keepdims=False):
+        return _reduce(self, 'all', axis=axis, out=out, keepdims=keepdims)
 
-    def any(self, axis=None, out=None):
-        _raise_nie()
+    def any(self, axis=None, out=None, keepdims=False):
+        return _reduce(self, 'any', axis=axis, out=out, keepdims=keepdims)
+
+    def dot(self, b):
+        return dot(self, b)
 
     #-------------------------------------------------------------------------
     # 3.3 Array special methods
@@ -571,32 +558,221 @@ class DenseLocalArray(BaseLocalArray):
         except IndexError:
             return None
 
-    def _sanitize_indices(self, indices):
-        if isinstance(indices, int) or isinstance(indices, slice):
-            return (indices,)
-        elif all(isinstance(i, int) or isinstance(i, slice) for i in indices):
-            return indices
-        else:
-            raise TypeError("Index must be a sequence of ints and slices")
-
     def __getitem__(self, global_inds):
-        global_inds = self._sanitize_indices(global_inds)
-        try:
-            local_inds = self.global_to_local(*global_inds)
-            return self.local_array[local_inds]
-        except KeyError as err:
-            raise IndexError(err)
+        if isinstance(global_inds, DenseLocalArray):
+            return _masked_values(self, global_inds)
+        index_type, global_inds = sanitize_indices(global_inds)
+        if index_type == 'point' and len(global_inds) == self.ndim:
+            try:
+                local_inds = self.global_to_local(*global_inds)
+                return self.local_array[local_inds]
+            except KeyError as err:
+                raise IndexError(err)
+        else:
+            return self._global_view(global_inds)
 
     def __setitem__(self, global_inds, value):
-        global_inds = self._sanitize_indices(global_inds)
-        try:
-            local_inds = self.global_to_local(*global_inds)
-            self.local_array[local_inds] = value
-        except KeyError as err:
-            raise IndexError(err)
+        if isinstance(global_inds, DenseLocalArray):
+            if not np.isscalar(value):
+                _raise_nie()
+            putmask(self, global_inds, value)
+            return
+        index_type, global_inds = sanitize_indices(global_inds)
+        if index_type == 'point' and len(global_inds) == self.ndim:
+            try:
+                local_inds = self.global_to_local(*global_inds)
+                self.local_array[local_inds] = value
+            except KeyError as err:
+                raise IndexError(err)
+        else:
+            view = self._global_view(global_inds)
+            if isinstance(value, DenseLocalArray):
+                if not arecompatible(view, value):
+                    raise IncompatibleArrayError("Incompatible LocalArrays")
+                value = value.local_array
+            view.local_array[...] = value
+
+    def _global_view(self, global_inds):
+        """Make a LocalArray viewing a global slice of `self`.
+
+        No data is copied: the new LocalArray's `local_array` is a view of
+        this one's, and its `dim_data` describes the slice's elements in
+        the slice's own global index space.
+
+        Parameters
+        ----------
+        global_inds : tuple of int and slice
+            Integers may only index undistributed dimensions, and slices
+            must have a positive step.
+
+        Returns
+        -------
+        LocalArray
+        """
+        if len(global_inds) > self.ndim:
+            raise IndexError("Too many indices for LocalArray")
+        global_inds = (tuple(global_inds) +
+                       (slice(None),) * (self.ndim - len(global_inds)))
+
+        local_inds = []
+        dim_data = []
+        for index, dd, index_map in zip(global_inds, self.dim_data,
+                                        self.maps):
+            if isinstance(index, slice):
+                local_ind, new_dd = _slice_dimdict(index, dd, index_map)
+                local_inds.append(local_ind)
+                dim_data.append(new_dd)
+            elif dd['dist_type'] == 'n':
+                if not -dd['size'] <= index < dd['size']:
+                    raise IndexError("Index %r out of bounds" % index)
+                local_inds.append(index)
+            else:
+                msg = "Integer indexing of a distributed dimension in a view."
+                raise NotImplementedError(msg)
+
+        buf = self.local_array[tuple(local_inds)]
+        return self.__class__.from_dim_data(tuple(dim_data), dtype=self.dtype,
+                                            buf=buf, comm=self.base_comm)
+
+    #-------------------------------------------------------------------------
+    # Ghost cells
+    #-------------------------------------------------------------------------
+
+    # Set by `set_ghost_width`.
+    _ghost_width = None
+    _padded_array = None
+    _halo_types = None
+
+    @property
+    def ghost_width(self):
+        """Number of ghost cells on each side of each dimension."""
+        if self._ghost_width is None:
+            return (0,) * self.ndim
+        return self._ghost_width
+
+    @property
+    def padded_array(self):
+        """The local array surrounded by its ghost cells.
+
+        `local_array` is a view of the interior of this array.
+        """
+        if self._padded_array is None:
+            return self.local_array
+        return self._padded_array
+
+    def set_ghost_width(self, width):
+        """Surround the local array with ghost cells.
+
+        The owned data is kept, and the ghost cells are zero until the next
+        `exchange_halos`.  This is collective, and every process must pass
+        the same `width`.
+
+        Ghost cells of undistributed dimensions are never exchanged; like
+        those beyond the edge of the global array, they can hold boundary
+        values.
+
+        Parameters
+        ----------
+        width : int or sequence of int
+            Number of ghost cells on each side of each dimension.  Only
+            block distributed and undistributed dimensions can have ghost
+            cells, so an int applies to those dimensions only.
+        """
+        if isinstance(width, six.integer_types):
+            width = [width if dist in ('b', 'n') else 0 for dist in self.dist]
+        width = tuple(int(w) for w in width)
+        if len(width) != self.ndim:
+            msg = "Ghost width given for %d dimensions, array has %d."
+            raise InvalidDimensionError(msg % (len(width), self.ndim))
+        for w, dist in zip(width, self.dist):
+            if w < 0:
+                raise ValueError("Negative ghost width: %r" % (width,))
+            if w and dist not in ('b', 'n'):
+                msg = ("Only block distributed and undistributed dimensions "
+                       "can have ghost cells.")
+                raise ValueError(msg)
+
+        # Ghost cells come from the nearest neighbour only, so they can be
+        # no wider than any process's block.
+        too_wide = any(w > n for w, n in zip(width, self.local_shape) if w)
+        widths, too_wide = zip(*self.comm.allgather((width, too_wide)))
+        if any(w != width for w in widths):
+            raise ValueError("Processes were given different ghost widths.")
+        if any(too_wide):
+            raise ValueError("Ghost width %r is larger than a local block." %
+                             (width,))
+
+        interior = tuple(slice(w, w + n)
+                         for w, n in zip(width, self.local_shape))
+        padded_shape = tuple(n + 2 * w
+                             for w, n in zip(width, self.local_shape))
+        padded = np.zeros(padded_shape, dtype=self.dtype)
+        padded[interior] = self.local_array
+
+        self._free_halo_types()
+        self._ghost_width = width
+        self._padded_array = padded
+        self._halo_types = {}
+        self.local_array = padded[interior]
+
+    def exchange_halos(self):
+        """Fill the ghost cells with the neighbouring processes' data.
+
+        The exchange runs in one phase per distributed dimension, each
+        phase sending the full padded extent of the other dimensions, so
+        the corner ghost cells are filled as well.  Ghost cells beyond the
+        edge of the global array are left untouched.
+        """
+        for dim in range(self.ndim):
+            MPI.Request.Waitall(self._start_halo_exchange(dim))
 
     def sync(self):
-        raise NotImplementedError("`sync` not yet implemented.")
+        """Fill the ghost cells; see `exchange_halos`."""
+        self.exchange_halos()
+
+    def _start_halo_exchange(self, dim):
+        """Start the halo exchange along `dim`; return its MPI requests."""
+        width = self.ghost_width[dim]
+        if not width or self.dist[dim] == 'n' or self._padded_array.size == 0:
+            return []
+        lower, upper = self.comm.Shift(self.distdims.index(dim), 1)
+        send_lower, recv_lower, send_upper, recv_upper = \
+            self._halo_datatypes(dim)
+        buf = self._padded_array
+        up, down = 2 * dim, 2 * dim + 1
+        return [self.comm.Irecv([buf, 1, recv_lower], source=lower, tag=up),
+                self.comm.Irecv([buf, 1, recv_upper], source=upper, tag=down),
+                self.comm.Isend([buf, 1, send_upper], dest=upper, tag=up),
+                self.comm.Isend([buf, 1, send_lower], dest=lower, tag=down)]
+
+    def _halo_datatypes(self, dim):
+        """The subarray datatypes for the halo exchange along `dim`.
+
+        Returns the datatypes of the lowest and highest owned slabs, which
+        are sent, and of the ghost slabs below and above them, which are
+        received, as (send_lower, recv_lower, send_upper, recv_upper).
+        """
+        if dim not in self._halo_types:
+            shape = self._padded_array.shape
+            width = self.ghost_width[dim]
+            subsizes = list(shape)
+            subsizes[dim] = width
+            n = self.local_shape[dim]
+            types = []
+            for start in (width, 0, n, n + width):
+                starts = [0] * self.ndim
+                starts[dim] = start
+                types.append(_subarray_type(shape, subsizes, starts,
+                                            self.dtype))
+            self._halo_types[dim] = tuple(types)
+        return self._halo_types[dim]
+
+    def _free_halo_types(self):
+        if self._halo_types:
+            for types in self._halo_types.values():
+                for datatype in types:
+                    datatype.Free()
+            self._halo_types = {}
 
     def __contains__(self, item):
         return item in self.local_array
@@ -675,6 +851,9 @@ class DenseLocalArray(BaseLocalArray):
     def __xor__(self, other):
         return self._binary_op_from_ufunc(other, bitwise_xor, '__rxor__')
 
+    def __matmul__(self, other):
+        return dot(self, other)
+
     # Binary - right versions
 
     def __radd__(self, other):
@@ -722,43 +901,43 @@ class DenseLocalArray(BaseLocalArray):
     # Inplace
 
     def __iadd__(self, other):
-        _raise_nie()
+        return add(self, other, self)
 
     def __isub__(self, other):
-        _raise_nie()
+        return subtract(self, other, self)
 
     def __imul__(self, other):
-        _raise_nie()
+        return multiply(self, other, self)
 
     def __idiv__(self, other):
-        _raise_nie()
+        return divide(self, other, self)
 
     def __itruediv__(self, other):
-        _raise_nie()
+        return true_divide(self, other, self)
 
     def __ifloordiv__(self, other):
-        _raise_nie()
+        return floor_divide(self, other, self)
 
     def __imod__(self, other):
-        _raise_nie()
+        return mod(self, other, self)
 
     def __ipow__(self, other, modulo=None):
-        _raise_nie()
+        return power(self, other, self)
 
     def __ilshift__(self, other):
-        _raise_nie()
+        return left_shift(self, other, self)
 
     def __irshift__(self, other):
-        _raise_nie()
+        return right_shift(self, other, self)
 
     def __iand__(self, other):
-        _raise_nie()
+        return bitwise_and(self, other, self)
 
     def __ior__(self, other):
-        _raise_nie()
+        return bitwise_or(self, other, self)
 
     def __ixor__(self, other):
-        _raise_nie()
+        return bitwise_xor(self, other, self)
 
     # Unary
 
@@ -778,6 +957,75 @@ class DenseLocalArray(BaseLocalArray):
 LocalArray = DenseLocalArray
 
 
+def _slice_dimdict(index, dimdict, index_map):
+    """Slice one dimension of a LocalArray.
+
+    Parameters
+    ----------
+    index : slice
+        A global slice with a positive step.
+    dimdict : dict
+        The completed `dimdict` of the dimension.
+    index_map : IndexMap
+        The dimension's IndexMap.
+
+    Returns
+    -------
+    local_index : slice
+        Selects the locally owned elements of the slice.
+    new_dimdict : dict
+        Describes the slice, in its own global index space.
+    """
+    size = dimdict['size']
+    start, stop, step = index.indices(size)
+    if step < 0:
+        raise NotImplementedError("Slices with negative steps.")
+    new_size = len(range(start, stop, step))
+    dist_type = dimdict['dist_type']
+
+    if (start, stop, step) == (0, size, 1):
+        new_dimdict = copy.deepcopy(dimdict)
+        return slice(None), new_dimdict
+    elif dist_type == 'n':
+        return slice(start, stop, step), dict(dist_type='n', size=new_size)
+    elif dist_type == 'b':
+        # count the slice's elements that come before our start and stop
+        def count_below(bound):
+            return max(0, -(-(min(bound, stop) - start) // step))
+        new_start = count_below(dimdict['start'])
+        new_stop = max(new_start, count_below(dimdict['stop']))
+        first_local = start + new_start * step - dimdict['start']
+        count = new_stop - new_start
+        if count == 0:
+            local_index = slice(0, 0)
+        else:
+            local_index = slice(first_local,
+                                first_local + (count - 1) * step + 1, step)
+        new_dimdict = dict(dist_type='b', size=new_size, start=new_start,
+                           stop=new_stop,
+                           proc_grid_size=dimdict['proc_grid_size'])
+        return local_index, new_dimdict
+    else:
+        global_index = np.asarray(index_map.global_index)
+        mask = ((global_index >= start) & (global_index < stop) &
+                ((global_index - start) % step == 0))
+        positions = np.flatnonzero(mask)
+        if len(positions) == 0:
+            local_index = slice(0, 0)
+        elif len(positions) == 1:
+            local_index = slice(positions[0], positions[0] + 1)
+        else:
+            strides = np.diff(positions)
+            if not np.all(strides == strides[0]):
+                msg = "This slice cannot be viewed without copying."
+                raise NotImplementedError(msg)
+            local_index = slice(positions[0], positions[-1] + 1, strides[0])
+        indices = ((global_index[mask] - start) // step).tolist()
+        new_dimdict = dict(dist_type='u', size=new_size, indices=indices,
+                           proc_grid_size=dimdict['proc_grid_size'])
+        return local_index, new_dimdict
+
+
 #----------------------------------------------------------------------------
 #----------------------------------------------------------------------------
 # Functions that are friends of LocalArray
@@ -798,6 +1046,127 @@ LocalArray = DenseLocalArray
 # Utilities needed to implement things below
 #----------------------------------------------------------------------------
 
+
+def redistribute(source, target):
+    """Copy the data of `source` into `target`, which may be distributed
+    differently.
+
+    Each process intersects, dimension by dimension, the global indices
+    it owns in `source` with those every process owns in `target` (and
+    vice versa), packs the elements to send into one buffer per
+    destination, and all the data moves in a single ``Alltoallv``.
+
+    Parameters
+    ----------
+    source, target : LocalArray
+        Arrays with the same global shape and base communicator.
+
+    Returns
+    -------
+    LocalArray
+        `target`.
+    """
+    if source.global_shape != target.global_shape:
+        raise ValueError("Arrays must have the same global shape.")
+    if arecompatible(source, target):
+        target.local_array[...] = source.local_array
+        return target
+    schedule = _redistribution_schedule(source, target)
+    _apply_redistribution(schedule, source.local_array, target.local_array)
+    return target
+
+
+def _redistribution_schedule(source, target):
+    """Work out which elements `redistribute` sends to, and receives from,
+    each process.
+
+    Only the layouts of `source` and `target` matter, so the schedule can be
+    reused for any arrays laid out like them.  This is collective.
+
+    Returns
+    -------
+    dict
+        With the communicator, the counts and displacements for the
+        ``Alltoallv``, and the local indices to pack and unpack.
+    """
+    comm = source.base_comm
+    layouts = comm.allgather((source.dim_data, target.dim_data))
+    send_indices = [_owned_in_common(source.maps, target_dim_data)
+                    for _, target_dim_data in layouts]
+    recv_indices = [_owned_in_common(target.maps, source_dim_data)
+                    for source_dim_data, _ in layouts]
+
+    send_counts = np.array([_nelements(ix) for ix in send_indices])
+    recv_counts = np.array([_nelements(ix) for ix in recv_indices])
+    send_displs = np.concatenate(([0], np.cumsum(send_counts)[:-1]))
+    recv_displs = np.concatenate(([0], np.cumsum(recv_counts)[:-1]))
+
+    def pieces(indices, displs, counts):
+        return [(np.ix_(*ix), tuple(len(i) for i in ix), displ, count)
+                for ix, displ, count in zip(indices, displs, counts)
+                if count]
+
+    return dict(comm=comm,
+                send=(send_counts, send_displs),
+                recv=(recv_counts, recv_displs),
+                pack=pieces(send_indices, send_displs, send_counts),
+                unpack=pieces(recv_indices, recv_displs, recv_counts))
+
+
+def _apply_redistribution(schedule, source, target):
+    """Move the data of the local array `source` into the local array
+    `target`, following `schedule`."""
+    send_buf = np.empty(schedule['send'][0].sum(), dtype=source.dtype)
+    for index, _, displ, count in schedule['pack']:
+        send_buf[displ:displ + count] = source[index].ravel()
+    recv_buf = np.empty(schedule['recv'][0].sum(), dtype=target.dtype)
+    schedule['comm'].Alltoallv([send_buf, schedule['send']],
+                               [recv_buf, schedule['recv']])
+    for index, shape, displ, count in schedule['unpack']:
+        target[index] = recv_buf[displ:displ + count].reshape(shape)
+
+
+def _owned_in_common(own_maps, other_dim_data):
+    """Find the elements owned both under `own_maps` and by the process
+    with `other_dim_data`.
+
+    Returns
+    -------
+    list of ndarray
+        For each dimension, the local indices, under `own_maps`, of the
+        global indices owned in both layouts, in increasing global order.
+    """
+    positions = []
+    for own_map, dimdict in zip(own_maps, other_dim_data):
+        other_map = maps.IndexMap.from_dimdict(dimdict)
+        own_global = np.asarray(own_map.global_index)
+        common = np.intersect1d(own_global,
+                                np.asarray(other_map.global_index),
+                                assume_unique=True)
+        sorter = np.argsort(own_global, kind='mergesort')
+        own = np.searchsorted(own_global, common, sorter=sorter)
+        positions.append(sorter[own])
+    return positions
+
+
+def _nelements(indices):
+    """Number of elements selected by ``np.ix_(*indices)``."""
+    return int(np.prod([len(i) for i in indices]))
+
+
+def _subarray_type(sizes, subsizes, starts, dtype):
+    """A committed MPI datatype for a subarray of a C ordered ndarray."""
+    basetype = mpi_dtypes.get(np.dtype(dtype))
+    if basetype is None:
+        # Send each element as its bytes.
+        itemsize = np.dtype(dtype).itemsize
+        sizes = list(sizes) + [itemsize]
+        subsizes = list(subsizes) + [itemsize]
+        starts = list(starts) + [0]
+        basetype = MPI.BYTE
+    return basetype.Create_subarray(sizes, subsizes, starts).Commit()
+
+
 #----------------------------------------------------------------------------
 # 4 Basic routines
 #----------------------------------------------------------------------------
@@ -829,11 +1198,9 @@ def empty(shape, dtype=float, dist=None, grid_shape=None, comm=None):
 def empty_like(arr, dtype=None):
     if isinstance(arr, DenseLocalArray):
         if dtype is None:
-            return empty(arr.global_shape, arr.dtype, arr.dist, arr.grid_shape,
-                         arr.base_comm)
+            return arr._new_like(dtype=arr.dtype)
         else:
-            return empty(arr.global_shape, dtype, arr.dist, arr.grid_shape,
-                         arr.base_comm)
+            return arr._new_like(dtype=dtype)
     else:
         raise TypeError("A DenseLocalArray or subclass is expected")
 
@@ -846,8 +1213,9 @@ def zeros(shape, dtype=float, dist=None, grid_shape=None, comm=None):
 
 def zeros_like(arr):
     if isinstance(arr, DenseLocalArray):
-        return zeros(arr.global_shape, arr.dtype, arr.dist, arr.grid_shape,
-                     arr.base_comm)
+        la = arr._new_like(dtype=arr.dtype)
+        la.fill(0)
+        return la
     else:
         raise TypeError("A DenseLocalArray or subclass is expected")
 
@@ -983,9 +1351,7 @@ def fromlocalarray_like(local_arr, like_arr):
     """
     Create a new LocalArray using a given local array (+its dtype).
     """
-    res = LocalArray(like_arr.global_shape, local_arr.dtype, like_arr.dist,
-                     like_arr.grid_shape, like_arr.base_comm, buf=local_arr)
-    return res
+    return like_arr._new_like(dtype=local_arr.dtype, buf=local_arr)
 
 
 def identity(n, dtype=np.intp):
@@ -993,7 +1359,35 @@ def identity(n, dtype=np.intp):
 
 
 def where(condition, x=None, y=None):
-    _raise_nie()
+    """Return elements from `x` where `condition` is true, else from `y`.
+
+    The result is computed in a single pass over the local arrays, into
+    its own buffer.  With `condition` alone, this is `nonzero`.
+
+    Parameters
+    ----------
+    condition : LocalArray
+    x, y : LocalArray or scalar
+        LocalArrays must be distributed like `condition`.
+
+    Returns
+    -------
+    LocalArray
+        Distributed like `condition`.
+    """
+    if x is None and y is None:
+        return nonzero(condition)
+    elif x is None or y is None:
+        raise ValueError("Either both or neither of x and y must be given.")
+    operands = []
+    for arg in (condition, x, y):
+        if isinstance(arg, DenseLocalArray):
+            if not arecompatible(condition, arg):
+                raise IncompatibleArrayError("Incompatible LocalArrays")
+            arg = arg.local_array
+        operands.append(arg)
+    values = np.where(*operands)
+    return condition._new_like(dtype=values.dtype, buf=values)
 
 
 #----------------------------------------------------------------------------
@@ -1004,12 +1398,211 @@ def concatenate(seq, axis=0):
     _raise_nie()
 
 
+def stencil(a, func, radius, out=None, dtype=None):
+    """Apply a stencil to a LocalArray.
+
+    `func` is called with blocks of `a` that have `radius` extra cells on
+    each side of each dimension, and returns the result for the cells
+    inside that margin.  E.g. a 5-point Laplacian is::
+
+        def laplacian(u):
+            return (u[:-2, 1:-1] + u[2:, 1:-1] + u[1:-1, :-2] +
+                    u[1:-1, 2:] - 4 * u[1:-1, 1:-1])
+
+        stencil(a, laplacian, 1)
+
+    The halos are exchanged once, and the part of the result that needs no
+    data from other processes is computed while the halos of the first
+    distributed dimension are in flight.
+
+    Cells beyond the edge of the global array are read from the ghost
+    cells of `a` if it has at least `radius` of them, so they can hold
+    boundary values; else they are zero.
+
+    Parameters
+    ----------
+    a : LocalArray
+        Its dimensions with a nonzero radius must be block distributed or
+        undistributed.
+    func : callable
+    radius : int or sequence of int
+        How many neighbours on each side the stencil reads, per dimension.
+    out : LocalArray, optional
+        Distributed like `a`, and not sharing memory with it.
+    dtype : numpy dtype, optional
+        The dtype of the result if `out` isn't given; default `a.dtype`.
+
+    Returns
+    -------
+    LocalArray
+    """
+    if isinstance(radius, six.integer_types):
+        radius = (radius,) * a.ndim
+    radius = tuple(int(r) for r in radius)
+    if len(radius) != a.ndim:
+        msg = "Stencil radius given for %d dimensions, array has %d."
+        raise InvalidDimensionError(msg % (len(radius), a.ndim))
+    for r, dist in zip(radius, a.dist):
+        if r < 0:
+            raise ValueError("Negative stencil radius: %r" % (radius,))
+        if r and dist not in ('b', 'n'):
+            msg = ("Stencils need block distributed or undistributed "
+                   "dimensions.")
+            raise ValueError(msg)
+
+    if out is None:
+        out = a._new_like(dtype=a.dtype if dtype is None else dtype)
+    elif not arecompatible(a, out):
+        raise IncompatibleArrayError("out is not distributed like a.")
+    elif np.may_share_memory(a.padded_array, out.local_array):
+        raise ValueError("out may not share memory with a.")
+
+    if all(r <= w for r, w in zip(radius, a.ghost_width)):
+        src = a
+    else:
+        src = a._new_like(dtype=a.dtype)
+        src.set_ghost_width(radius)
+        src.local_array[...] = a.local_array
+
+    # The interior is the part of the result that needs no ghost cells
+    # filled by the exchange.
+    shape = a.local_shape
+    exchanged = [dim for dim in a.distdims if radius[dim]]
+    interior = [slice(0, n) for n in shape]
+    for dim in exchanged:
+        lower = min(radius[dim], shape[dim])
+        interior[dim] = slice(lower, max(lower, shape[dim] - radius[dim]))
+
+    requests = src._start_halo_exchange(exchanged[0]) if exchanged else []
+    _apply_stencil(func, src, out, radius, interior)
+    MPI.Request.Waitall(requests)
+    for dim in exchanged[1:]:
+        MPI.Request.Waitall(src._start_halo_exchange(dim))
+
+    # The rest of the result, in slabs along each dimension.
+    for dim in exchanged:
+        for part in (slice(0, interior[dim].start),
+                     slice(interior[dim].stop, shape[dim])):
+            region = (interior[:dim] + [part] +
+                      [slice(0, n) for n in shape[dim + 1:]])
+            _apply_stencil(func, src, out, radius, region)
+    return out
+
+
+def _apply_stencil(func, src, out, radius, region):
+    """Compute `region` (a list of local slices) of a stencil's result."""
+    if any(part.start == part.stop for part in region):
+        return
+    window = tuple(slice(part.start + w - r, part.stop + w + r)
+                   for part, w, r in zip(region, src.ghost_width, radius))
+    out.local_array[tuple(region)] = func(src.padded_array[window])
+
+
 def correlate(x, y, mode='valid'):
-    _raise_nie()
+    """Cross-correlate a LocalArray with a small kernel.
+
+    This is N-dimensional, and `mode` is as in `numpy.correlate`.  The
+    result is distributed like `x` (in 'same' mode), a slice of that (in
+    'valid' mode), or like `x` with the extra elements owned by the
+    processes at the edges (in 'full' mode).
+
+    Parameters
+    ----------
+    x : LocalArray
+        Its dimensions along which `y` is longer than 1 must be block
+        distributed or undistributed.
+    y : array_like
+        The kernel, with the same number of dimensions as `x`.
+    mode : {'valid', 'same', 'full'}, optional
+
+    Returns
+    -------
+    LocalArray
+    """
+    return _correlate(x, np.conj(y), mode)
 
 
 def convolve(x, y, mode='valid'):
-    _raise_nie()
+    """Convolve a LocalArray with a small kernel.
+
+    See `correlate` for the parameters.
+    """
+    y = np.asarray(y)
+    return _correlate(x, y[(slice(None, None, -1),) * y.ndim], mode)
+
+
+def _correlate(x, kernel, mode):
+    kernel = np.asarray(kernel)
+    if kernel.ndim != x.ndim or kernel.size == 0:
+        msg = "The kernel must be nonempty and have %d dimensions."
+        raise ValueError(msg % x.ndim)
+    if mode == 'full':
+        x = _zero_extend(x, [k - 1 - k // 2 for k in kernel.shape],
+                         [k // 2 for k in kernel.shape])
+    elif mode == 'valid':
+        if any(k > n for k, n in zip(kernel.shape, x.global_shape)):
+            raise ValueError("The kernel is larger than the array.")
+    elif mode != 'same':
+        raise ValueError("mode must be 'valid', 'same' or 'full'.")
+
+    # Kernel element p is applied to the neighbour at offset p - k // 2.
+    radius = tuple(k // 2 for k in kernel.shape)
+    dtype = np.result_type(x.dtype, kernel.dtype)
+
+    def correlation(block):
+        shape = tuple(n - 2 * r for n, r in zip(block.shape, radius))
+        result = np.zeros(shape, dtype=dtype)
+        for p in np.ndindex(*kernel.shape):
+            if kernel[p]:
+                neighbours = tuple(slice(i, i + n) for i, n in zip(p, shape))
+                result += kernel[p] * block[neighbours]
+        return result
+
+    result = stencil(x, correlation, radius, dtype=dtype)
+    if mode == 'valid':
+        result = result._global_view(tuple(
+            slice(k // 2, k // 2 + n - k + 1)
+            for k, n in zip(kernel.shape, x.global_shape)))
+    return result
+
+
+def _zero_extend(a, lower, upper):
+    """Copy `a`, adding `lower` and `upper` zeros at the start and end of
+    each dimension.  The processes at the edges own the new elements."""
+    dim_data = []
+    local_index = []
+    for dd, lo, hi in zip(a.dim_data, lower, upper):
+        size = dd['size'] + lo + hi
+        if dd['dist_type'] == 'n':
+            dim_data.append(dict(dist_type='n', size=size))
+            local_index.append(slice(lo, lo + dd['size']))
+        elif dd['dist_type'] == 'b':
+            def extend(bound):
+                if bound == 0:
+                    return 0
+                elif bound == dd['size']:
+                    return size
+                else:
+                    return bound + lo
+            start, stop = extend(dd['start']), extend(dd['stop'])
+            dim_data.append(dict(dist_type='b', size=size, start=start,
+                                 stop=stop,
+                                 proc_grid_size=dd['proc_grid_size']))
+            offset = dd['start'] + lo - start
+            local_index.append(slice(offset,
+                                     offset + dd['stop'] - dd['start']))
+        elif lo or hi:
+            msg = "Only block distributed dimensions can be extended."
+            raise ValueError(msg)
+        else:
+            dim_data.append(copy.deepcopy(dd))
+            local_index.append(slice(None))
+
+    result = a.__class__.from_dim_data(tuple(dim_data), dtype=a.dtype,
+                                       comm=a.base_comm)
+    result.fill(0)
+    result.local_array[tuple(local_index)] = a.local_array
+    return result
 
 
 def outer(a, b):
@@ -1020,12 +1613,187 @@ def inner(a, b):
     _raise_nie()
 
 
+# Maximum number of columns of `a` (rows of `b`) per panel in SUMMA.
+DOT_PANEL_WIDTH = 256
+
+
 def dot(a, b):
-    _raise_nie()
+    """Dot product of two LocalArrays.
+
+    Supports vectors, matrix-vector and matrix-matrix products.
+
+    Matrix products use SUMMA: panels of columns of `a` are broadcast along
+    the rows of the process grid, and the matching panels of rows of `b`
+    along its columns, while each process multiplies the previous pair
+    into its block of the result.  Both matrices are redistributed to
+    ('b', 'b') on the same grid first if need be.  The result is
+    distributed like the rows of `a` and the columns of `b`.
+
+    A matrix whose columns are undistributed times a vector is a fast
+    path: the vector is allgathered, and the result is distributed like
+    the rows of the matrix.
+
+    Returns
+    -------
+    LocalArray or scalar
+    """
+    if a.ndim == b.ndim == 1:
+        return _inner_product(a, b, np.dot)
+    elif a.ndim == 2 and b.global_shape[0] != a.global_shape[1]:
+        msg = "Shapes %r and %r are not aligned."
+        raise ValueError(msg % (a.global_shape, b.global_shape))
+    elif a.ndim == 2 and b.ndim == 1:
+        if a.dist[1] != 'n':
+            a = a.redist(('b', 'n'))
+        return _matvec(a, b)
+    elif a.ndim == b.ndim == 2:
+        if a.dist != ('b', 'b'):
+            a = a.redist(('b', 'b'), grid_shape=_matrix_grid_shape(a))
+        if b.dist != ('b', 'b') or b.grid_shape != a.grid_shape:
+            b = b.redist(('b', 'b'), grid_shape=a.grid_shape)
+        return _summa(a, b)
+    else:
+        _raise_nie()
+
+
+def matmul(a, b):
+    """Matrix product of two LocalArrays; see `dot`."""
+    return dot(a, b)
 
 
 def vdot(a, b):
-    _raise_nie()
+    """Dot product of two LocalArrays, flattened, conjugating `a`."""
+    if a.global_shape != b.global_shape:
+        raise ValueError("Arrays must have the same global shape.")
+    return _inner_product(a, b, np.vdot)
+
+
+def _inner_product(a, b, func):
+    """Sum `func` of the local arrays over the processes, redistributing
+    `b` like `a` if need be."""
+    if a.global_shape != b.global_shape:
+        msg = "Shapes %r and %r are not aligned."
+        raise ValueError(msg % (a.global_shape, b.global_shape))
+    if not arecompatible(a, b):
+        b = redistribute(b, a._new_like(dtype=b.dtype))
+    local = func(a.local_array, b.local_array)
+    return a.base_comm.allreduce(local, op=MPI.SUM)
+
+
+def _matrix_grid_shape(a):
+    """A 2-d process grid for the processes of the matrix `a`."""
+    try:
+        return construct.optimize_grid_shape(a.global_shape, (0, 1),
+                                             a.comm_size)
+    except GridShapeError:
+        # A prime number of processes.
+        return (a.comm_size, 1)
+
+
+def _matvec(a, v):
+    """Product of a matrix with undistributed columns and a vector."""
+    values = np.dot(a.local_array, _allgather_vector(v))
+    dim_data = (copy.deepcopy(a.dim_data[0]),)
+    return a.__class__.from_dim_data(dim_data, dtype=values.dtype,
+                                     buf=values, comm=a.base_comm)
+
+
+def _allgather_vector(v):
+    """Assemble the 1-d LocalArray `v` on every process."""
+    comm = v.base_comm
+    counts = np.array(comm.allgather(v.local_size))
+    displs = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    values = np.empty(counts.sum(), dtype=v.dtype)
+    comm.Allgatherv(np.ascontiguousarray(v.local_array),
+                    [values, (counts, displs)])
+    if v.dist == ('b',):
+        # The blocks are in rank order.
+        return values
+    indices = np.empty(counts.sum(), dtype=np.int64)
+    comm.Allgatherv(np.asarray(v.maps[0].global_index, dtype=np.int64),
+                    [indices, (counts, displs)])
+    result = np.empty_like(values)
+    result[indices] = values
+    return result
+
+
+def _summa(a, b):
+    """SUMMA product of ('b', 'b') matrices on the same process grid."""
+    row_comm = construct.init_sub_comm(a.comm, (False, True))
+    col_comm = construct.init_sub_comm(a.comm, (True, False))
+    a_start = a.dim_data[1]['start']
+    b_start = b.dim_data[0]['start']
+    a_blocks = row_comm.allgather((a_start, a.dim_data[1]['stop']))
+    b_blocks = col_comm.allgather((b_start, b.dim_data[0]['stop']))
+
+    dim_data = (copy.deepcopy(a.dim_data[0]), copy.deepcopy(b.dim_data[1]))
+    result = a.__class__.from_dim_data(dim_data,
+                                       dtype=np.result_type(a, b),
+                                       comm=a.base_comm)
+    result.fill(0)
+    m = a.local_shape[0]
+    n = b.local_shape[1]
+
+    def broadcast(panel):
+        """Start broadcasting a panel from the processes that own it."""
+        start, stop, a_root, b_root = panel
+        if row_comm.Get_rank() == a_root:
+            a_panel = np.ascontiguousarray(
+                a.local_array[:, start - a_start:stop - a_start])
+        else:
+            a_panel = np.empty((m, stop - start), dtype=a.dtype)
+        if col_comm.Get_rank() == b_root:
+            b_panel = np.ascontiguousarray(
+                b.local_array[start - b_start:stop - b_start])
+        else:
+            b_panel = np.empty((stop - start, n), dtype=b.dtype)
+        requests = [row_comm.Ibcast(a_panel, root=a_root),
+                    col_comm.Ibcast(b_panel, root=b_root)]
+        return a_panel, b_panel, requests
+
+    # Broadcast the next panels while multiplying the current ones.
+    panels = _summa_panels(a_blocks, b_blocks, DOT_PANEL_WIDTH)
+    pending = broadcast(panels[0]) if panels else None
+    for i in range(len(panels)):
+        a_panel, b_panel, requests = pending
+        if i + 1 < len(panels):
+            pending = broadcast(panels[i + 1])
+        MPI.Request.Waitall(requests)
+        result.local_array += np.dot(a_panel, b_panel)
+    return result
+
+
+def _summa_panels(a_blocks, b_blocks, width):
+    """Split the inner dimension of a matrix product into panels.
+
+    Parameters
+    ----------
+    a_blocks, b_blocks : list of (start, stop)
+        The blocks of the inner dimension owned by each column of the
+        process grid in `a`, and by each row in `b`.
+    width : int
+        Maximum width of a panel.
+
+    Returns
+    -------
+    list of tuple
+        (start, stop, a_root, b_root) for each panel, where the roots are
+        the grid column and row owning it.
+    """
+    bounds = sorted(set(bound for block in a_blocks + b_blocks
+                        for bound in block))
+    panels = []
+    for lower, upper in zip(bounds[:-1], bounds[1:]):
+        a_root = next((q for q, (start, stop) in enumerate(a_blocks)
+                       if start <= lower < stop), None)
+        b_root = next((p for p, (start, stop) in enumerate(b_blocks)
+                       if start <= lower < stop), None)
+        if a_root is None or b_root is None:
+            continue
+        for start in range(lower, upper, width):
+            panels.append((start, min(start + width, upper), a_root,
+                           b_root))
+    return panels
 
 
 def tensordot(a, b, axes=(-1, 0)):
@@ -1088,10 +1856,588 @@ can_cast = np.can_cast
 #----------------------------------------------------------------------------
 
 
-def sum(a, dtype=None):
-    local_sum = a.local_array.sum(dtype=dtype)
-    global_sum = a.comm.allreduce(local_sum, None, op=MPI.SUM)
-    return global_sum
+# The local NumPy reduction, and the MPI operation that combines the local
+# results, for each of the reductions.
+_reductions = {
+    'sum': (np.sum, MPI.SUM),
+    'prod': (np.prod, MPI.PROD),
+    'min': (np.min, MPI.MIN),
+    'max': (np.max, MPI.MAX),
+    'all': (np.all, MPI.LAND),
+    'any': (np.any, MPI.LOR),
+}
+
+
+def _normalize_axes(axis, ndim):
+    """Return the sorted tuple of nonnegative axes that `axis` refers to."""
+    if axis is None:
+        return tuple(range(ndim))
+    if not isinstance(axis, (tuple, list)):
+        axis = (axis,)
+    axes = []
+    for ax in axis:
+        if not -ndim <= ax < ndim:
+            raise InvalidDimensionError("Invalid axis: %r" % (ax,))
+        axes.append(ax % ndim)
+    if len(set(axes)) != len(axes):
+        raise ValueError("Duplicate value in axis: %r" % (axis,))
+    return tuple(sorted(axes))
+
+
+def _reduction_comm(a, axes):
+    """Return the communicator over which a reduction over `axes` combines.
+
+    This connects the processes that differ only in their coordinates
+    along the reduced distributed dimensions.  Returns None if no
+    distributed dimension is reduced.
+    """
+    remain_dims = [dim in axes for dim in a.distdims]
+    if not any(remain_dims):
+        return None
+    return construct.init_sub_comm(a.comm, remain_dims)
+
+
+def _fill_value(name, dtype):
+    """Return the identity of the reduction `name` for `dtype`."""
+    if dtype.kind == 'f':
+        return np.inf if name == 'min' else -np.inf
+    elif dtype.kind in 'iu':
+        return np.iinfo(dtype).max if name == 'min' else np.iinfo(dtype).min
+    elif dtype.kind == 'b':
+        return name == 'min'
+    else:
+        raise TypeError("Cannot compute the %s of dtype %s" % (name, dtype))
+
+
+def _local_reduce(a, name, axes, dtype=None):
+    """Reduce the local array of `a` over `axes`, keeping the dimensions."""
+    local = a.local_array
+    if name in ('min', 'max') and any(local.shape[ax] == 0 for ax in axes):
+        shape = tuple(1 if dim in axes else n
+                      for dim, n in enumerate(local.shape))
+        values = np.empty(shape, dtype=local.dtype)
+        values.fill(_fill_value(name, local.dtype))
+        return values
+    kwargs = {} if dtype is None else {'dtype': dtype}
+    values = _reductions[name][0](local, axis=axes, keepdims=True, **kwargs)
+    return np.ascontiguousarray(values)
+
+
+def _combine(a, name, axes, values, keepdims=False):
+    """Combine the local results `values` of a reduction over `axes`.
+
+    With `keepdims`, only the process that owns the result (the one at
+    coordinate 0 along every reduced dimension) needs it, and it is
+    reduced to that process alone.  Otherwise every process gets it.
+    """
+    comm = _reduction_comm(a, axes)
+    if comm is None:
+        return values
+    op = _reductions[name][1]
+    result = np.zeros_like(values)
+    if keepdims:
+        root = comm.Get_cart_rank((0,) * comm.Get_dim())
+        comm.Reduce(values, result, op=op, root=root)
+    else:
+        comm.Allreduce(values, result, op=op)
+    return result
+
+
+def _split_dim(a, axes):
+    """Choose the dimension of a reduction's result that takes up the
+    processes of the reduced distributed dimensions.
+
+    The processes of each sub-grid from `_reduction_comm` all hold the same
+    values; the result splits them between these processes along one of
+    the remaining dimensions.  Where the new process grid can be laid out
+    so that the pieces are in grid order, that dimension becomes a block
+    distributed one ('b'), else the first remaining dimension becomes an
+    unstructured one ('u').
+
+    Returns
+    -------
+    dim : int
+    dist_type : str
+    """
+    grid_shape = a.grid_shape
+    distdims = a.distdims
+    coords = np.unravel_index(np.arange(a.comm_size), grid_shape)
+    reduced = [i for i, dim in enumerate(distdims) if dim in axes]
+    nparts = int(np.prod([grid_shape[i] for i in reduced]))
+    part = np.ravel_multi_index([coords[i] for i in reduced],
+                                [grid_shape[i] for i in reduced])
+    kept = [dim for dim in range(a.ndim) if dim not in axes]
+    for split in kept:
+        if a.dist[split] not in ('b', 'n'):
+            continue
+        new_grid_shape = []
+        expected = []
+        for dim in kept:
+            if dim in distdims:
+                i = distdims.index(dim)
+                size, coord = grid_shape[i], coords[i]
+            elif dim == split:
+                size, coord = 1, 0
+            else:
+                continue
+            if dim == split:
+                size, coord = size * nparts, coord * nparts + part
+            new_grid_shape.append(size)
+            expected.append(coord)
+        new_coords = np.unravel_index(np.arange(a.comm_size), new_grid_shape)
+        if all(np.array_equal(c, e) for c, e in zip(new_coords, expected)):
+            return split, 'b'
+    return kept[0], 'u'
+
+
+def _reduction_result(a, axes, values, out=None, keepdims=False):
+    """Wrap the result of a reduction of `a` over `axes`.
+
+    Parameters
+    ----------
+    a : LocalArray
+        The reduced array.
+    axes : tuple of int
+        The reduced axes, from `_normalize_axes`.
+    values : ndarray
+        The combined result (see `_combine`), for the indices the process
+        owns in the remaining dimensions, with the reduced dimensions kept
+        with length 1.
+    out : LocalArray, optional
+        Where to put the result.  It must be distributed like the result.
+    keepdims : bool, optional
+
+    Returns
+    -------
+    A scalar, if all axes are reduced and `keepdims` is False, else a
+    LocalArray.  The remaining dimensions keep their distribution.  With
+    `keepdims`, a reduced distributed dimension has length 1 and is owned
+    by the processes at coordinate 0 along it.  Otherwise, the processes
+    that shared the reduced dimensions split one of the remaining ones
+    between them (see `_split_dim`).
+    """
+    if keepdims:
+        dim_data = []
+        for dim, dimdict in enumerate(a.dim_data):
+            if dim not in axes:
+                dim_data.append(copy.deepcopy(dimdict))
+            elif dimdict['dist_type'] == 'n':
+                dim_data.append(dict(dist_type='n', size=1))
+            else:
+                start = 0 if dimdict['proc_grid_rank'] == 0 else 1
+                dim_data.append(dict(dist_type='b', size=1, start=start,
+                                     stop=1,
+                                     proc_grid_size=dimdict['proc_grid_size']))
+        values = values[tuple(slice(0, dd.get('stop', 1) - dd.get('start', 0))
+                              if dim in axes else slice(None)
+                              for dim, dd in enumerate(dim_data))]
+    else:
+        kept = [dim for dim in range(a.ndim) if dim not in axes]
+        if not kept:
+            if out is not None:
+                msg = "A reduction over all axes returns a scalar."
+                raise ValueError(msg)
+            return values.reshape(())[()]
+        values = values.reshape([values.shape[dim] for dim in kept])
+        dim_data = [copy.deepcopy(a.dim_data[dim]) for dim in kept]
+        comm = _reduction_comm(a, axes)
+        if comm is not None:
+            split, dist_type = _split_dim(a, axes)
+            nparts = comm.Get_size()
+            coords = comm.Get_coords(comm.Get_rank())
+            part = np.ravel_multi_index(coords, comm.Get_topo()[0])
+            dimdict = a.dim_data[split]
+            proc_grid_size = dimdict.get('proc_grid_size', 1) * nparts
+            nlocal = a.local_shape[split]
+            lo = part * nlocal // nparts
+            hi = (part + 1) * nlocal // nparts
+            if dist_type == 'b':
+                start = dimdict.get('start', 0)
+                new_dimdict = dict(dist_type='b', size=dimdict['size'],
+                                   start=start + lo, stop=start + hi,
+                                   proc_grid_size=proc_grid_size)
+            else:
+                indices = np.asarray(a.maps[split].global_index)[lo:hi]
+                new_dimdict = dict(dist_type='u', size=dimdict['size'],
+                                   indices=indices.tolist(),
+                                   proc_grid_size=proc_grid_size)
+            i = kept.index(split)
+            dim_data[i] = new_dimdict
+            values = values[(slice(None),) * i + (slice(lo, hi),)]
+
+    if out is None:
+        out = LocalArray.from_dim_data(tuple(dim_data), dtype=values.dtype,
+                                       comm=a.base_comm)
+    elif ([_layout_key(dd) + (dd['size'],) for dd in out.dim_data] !=
+          [_layout_key(dd) + (dd['size'],) for dd in dim_data]):
+        msg = "out is not distributed like the result of the reduction."
+        raise IncompatibleArrayError(msg)
+    out.local_array[...] = values
+    return out
+
+
+def _reduce(a, name, axis=None, dtype=None, out=None, keepdims=False):
+    """Reduce `a` over `axis` with one of the reductions in `_reductions`.
+
+    Each process reduces its local array, then the local results are
+    combined over the processes that share the remaining indices only.
+    """
+    axes = _normalize_axes(axis, a.ndim)
+    values = _local_reduce(a, name, axes, dtype=dtype)
+    values = _combine(a, name, axes, values, keepdims=keepdims)
+    return _reduction_result(a, axes, values, out=out, keepdims=keepdims)
+
+
+def _arg_reduce(a, name, axis=None, out=None, keepdims=False):
+    """Find the global indices of the maxima ('argmax') or minima
+    ('argmin') of `a`, over the flattened array or along one axis.
+
+    Each process finds its local extremum and maps its position to a
+    global index; the (value, index) pairs are then combined as MPI's
+    MAXLOC and MINLOC do, with ties going to the smallest index and NaN
+    winning as in NumPy.
+    """
+    if isinstance(axis, (tuple, list)):
+        raise TypeError("axis must be an integer or None")
+    axes = _normalize_axes(axis, a.ndim)
+    local = a.local_array
+    shape = tuple(1 if dim in axes else n for dim, n in enumerate(local.shape))
+    if any(local.shape[dim] == 0 for dim in axes):
+        values = np.zeros(shape, dtype=local.dtype)
+        indices = np.empty(shape, dtype=np.intp)
+        indices.fill(-1)
+    elif axis is None:
+        position = getattr(np, name)(local)
+        local_index = np.unravel_index(position, local.shape)
+        global_index = [m.local_to_global(i)
+                        for m, i in zip(a.maps, local_index)]
+        values = local[local_index].reshape(shape)
+        indices = np.ravel_multi_index(global_index, a.global_shape)
+        indices = np.array(indices, dtype=np.intp).reshape(shape)
+    else:
+        positions = np.expand_dims(getattr(np, name)(local, axis=axes[0]),
+                                   axes[0])
+        index = list(np.ix_(*[np.arange(n) for n in positions.shape]))
+        index[axes[0]] = positions
+        values = local[tuple(index)]
+        indices = np.asarray(a.maps[axes[0]].local_to_global(positions),
+                             dtype=np.intp)
+
+    comm = _reduction_comm(a, axes)
+    if comm is not None:
+        values, indices = _combine_locations(comm, name, values, indices,
+                                             keepdims)
+    return _reduction_result(a, axes, indices, out=out, keepdims=keepdims)
+
+
+def _combine_locations(comm, name, values, indices, keepdims=False):
+    """Combine the (value, index) pairs of the processes of `comm`.
+
+    An index of -1 marks a process that owns no candidates.  With
+    `keepdims`, only the owner of the result (see `_combine`) gathers and
+    combines them.
+    """
+    values = np.ascontiguousarray(values)
+    indices = np.ascontiguousarray(indices)
+    all_values = np.empty((comm.Get_size(),) + values.shape, values.dtype)
+    all_indices = np.empty((comm.Get_size(),) + indices.shape, indices.dtype)
+    if keepdims:
+        root = comm.Get_cart_rank((0,) * comm.Get_dim())
+        comm.Gather(values, all_values, root=root)
+        comm.Gather(indices, all_indices, root=root)
+        if comm.Get_rank() != root:
+            return values, indices
+    else:
+        comm.Allgather(values, all_values)
+        comm.Allgather(indices, all_indices)
+
+    values, indices = all_values[0], all_indices[0]
+    for other_values, other_indices in zip(all_values[1:], all_indices[1:]):
+        if name == 'argmax':
+            beats = other_values > values
+        else:
+            beats = other_values < values
+        if values.dtype.kind in 'fc':
+            nan = np.isnan(values)
+            other_nan = np.isnan(other_values)
+            beats = (beats | other_nan) & ~nan
+            ties = (other_values == values) | (other_nan & nan)
+        else:
+            ties = other_values == values
+        better = (other_indices >= 0) & (
+            (indices < 0) | beats | (ties & (other_indices < indices)))
+        values = np.where(better, other_values, values)
+        indices = np.where(better, other_indices, indices)
+    return values, indices
+
+
+def _ptp(a, axis=None, out=None, keepdims=False):
+    """Return the range (maximum - minimum) of `a` over `axis`."""
+    axes = _normalize_axes(axis, a.ndim)
+    maxima = _combine(a, 'max', axes, _local_reduce(a, 'max', axes),
+                      keepdims=keepdims)
+    minima = _combine(a, 'min', axes, _local_reduce(a, 'min', axes),
+                      keepdims=keepdims)
+    return _reduction_result(a, axes, maxima - minima, out=out,
+                             keepdims=keepdims)
+
+
+# Number of elements at a time over which `var` and `std` compute
+# deviations from the mean.
+MOMENTS_CHUNK_SIZE = 2**16
+
+
+def _count(a, axes):
+    """Return the number of elements that a reduction over `axes` combines."""
+    return int(np.prod([a.global_shape[dim] for dim in axes]))
+
+
+def _accumulator_dtype(a, dtype):
+    """Return the dtype in which `mean` and `var` compute."""
+    if dtype is not None:
+        return np.dtype(dtype)
+    elif a.dtype.kind in 'biu':
+        return np.dtype(float)
+    else:
+        return a.dtype
+
+
+def sum(a, axis=None, dtype=None, out=None, keepdims=False):
+    return _reduce(a, 'sum', axis=axis, dtype=dtype, out=out,
+                   keepdims=keepdims)
+
+
+def prod(a, axis=None, dtype=None, out=None, keepdims=False):
+    return _reduce(a, 'prod', axis=axis, dtype=dtype, out=out,
+                   keepdims=keepdims)
+
+
+def mean(a, axis=None, dtype=None, out=None, keepdims=False):
+    axes = _normalize_axes(axis, a.ndim)
+    dtype = _accumulator_dtype(a, dtype)
+    values = _local_reduce(a, 'sum', axes, dtype=dtype)
+    values = _combine(a, 'sum', axes, values, keepdims=keepdims)
+    values = np.true_divide(values, _count(a, axes)).astype(dtype)
+    return _reduction_result(a, axes, values, out=out, keepdims=keepdims)
+
+
+def var(a, axis=None, dtype=None, out=None, ddof=0, keepdims=False):
+    axes = _normalize_axes(axis, a.ndim)
+    values = _var(a, axes, dtype, ddof, keepdims)
+    return _reduction_result(a, axes, values, out=out, keepdims=keepdims)
+
+
+def std(a, axis=None, dtype=None, out=None, ddof=0, keepdims=False):
+    axes = _normalize_axes(axis, a.ndim)
+    values = _var(a, axes, dtype, ddof, keepdims)
+    values = np.sqrt(values).astype(values.dtype)
+    return _reduction_result(a, axes, values, out=out, keepdims=keepdims)
+
+
+def _var(a, axes, dtype, ddof, keepdims):
+    """Compute the combined values of the variance of `a` over `axes`.
+
+    Each process computes the count, mean and sum of squared deviations
+    (M2) of its local array in one pass, and these are merged across
+    processes with a single collective (Chan et al.'s pairwise update).
+    An integer `dtype` is computed in floating point and then truncated.
+    """
+    dtype = _accumulator_dtype(a, dtype)
+    result_dtype = np.zeros(0, dtype).real.dtype
+    if dtype.kind not in 'fc':
+        dtype = np.dtype(float)
+
+    count, mean, m2 = _local_moments(a.local_array, axes, dtype)
+    comm = _reduction_comm(a, axes)
+    if comm is not None:
+        count, mean, m2 = _combine_moments(comm, count, mean, m2, keepdims)
+    values = np.true_divide(m2, max(_count(a, axes) - ddof, 0))
+    return values.astype(result_dtype)
+
+
+def _abs2(x):
+    """Return the squared magnitude of `x`, which may be complex."""
+    if np.iscomplexobj(x):
+        return x.real**2 + x.imag**2
+    return x * x
+
+
+def _merge_moments(count_a, mean_a, m2_a, count_b, mean_b, m2_b):
+    """Merge the count, mean and M2 of two sets of values."""
+    if count_b == 0:
+        return count_a, mean_a, m2_a
+    if count_a == 0:
+        return count_b, mean_b, m2_b
+    count = count_a + count_b
+    delta = mean_b - mean_a
+    mean = mean_a + delta * (count_b / count)
+    m2 = m2_a + m2_b + _abs2(delta) * (count_a * count_b / count)
+    return count, mean, m2
+
+
+def _local_moments(local, axes, dtype):
+    """Return the count, mean and M2 of `local` over `axes` (kept).
+
+    The deviations are computed a chunk of rows at a time, so no temporary
+    the size of `local` is made.
+    """
+    shape = tuple(1 if dim in axes else n for dim, n in enumerate(local.shape))
+    mean = np.zeros(shape, dtype=dtype)
+    m2 = np.zeros(shape, dtype=np.zeros(0, dtype).real.dtype)
+    if 0 in axes:
+        count = 0
+    else:
+        count = int(np.prod([local.shape[dim] for dim in axes]))
+
+    step = max(1, MOMENTS_CHUNK_SIZE // max(1, local[:1].size))
+    for start in range(0, local.shape[0], step):
+        chunk = local[start:start + step]
+        chunk_count = int(np.prod([chunk.shape[dim] for dim in axes]))
+        if chunk_count == 0:
+            continue
+        chunk_mean = chunk.sum(axis=axes, dtype=dtype, keepdims=True)
+        chunk_mean /= chunk_count
+        chunk_m2 = _abs2(chunk - chunk_mean).sum(axis=axes, keepdims=True)
+        if 0 in axes:
+            count, mean, m2 = _merge_moments(count, mean, m2, chunk_count,
+                                             chunk_mean, chunk_m2)
+        else:
+            mean[start:start + step] = chunk_mean
+            m2[start:start + step] = chunk_m2
+    return count, mean, m2
+
+
+def _combine_moments(comm, count, mean, m2, keepdims=False):
+    """Merge the moments of the processes of `comm`.
+
+    The moments are packed into one buffer and gathered in a single
+    collective.  With `keepdims`, only the owner of the result (see
+    `_combine`) gathers and merges them.
+    """
+    size = mean.size
+    buf = np.empty(1 + 2 * size, dtype=mean.dtype)
+    buf[0] = count
+    buf[1:size + 1] = mean.ravel()
+    buf[size + 1:] = m2.ravel()
+    gathered = np.empty((comm.Get_size(), buf.size), dtype=buf.dtype)
+    if keepdims:
+        root = comm.Get_cart_rank((0,) * comm.Get_dim())
+        comm.Gather(buf, gathered, root=root)
+        if comm.Get_rank() != root:
+            return count, mean, m2
+    else:
+        comm.Allgather(buf, gathered)
+
+    count, mean, m2 = 0, np.zeros_like(mean), np.zeros_like(m2)
+    for row in gathered:
+        count, mean, m2 = _merge_moments(
+            count, mean, m2, int(row[0].real),
+            row[1:size + 1].reshape(mean.shape),
+            row[size + 1:].real.reshape(m2.shape))
+    return count, mean, m2
+
+
+# For each prefix scan: the local scan, the MPI operation combining the
+# totals of the blocks, the ufunc applying them, and their identity.
+_scans = {'sum': (np.cumsum, MPI.SUM, np.add, 0),
+          'prod': (np.cumprod, MPI.PROD, np.multiply, 1)}
+
+
+def cumsum(a, axis=None, dtype=None, out=None):
+    """Return the cumulative sum of the elements along `axis`; see
+    `_accumulate`."""
+    return _accumulate(a, 'sum', axis=axis, dtype=dtype, out=out)
+
+
+def cumprod(a, axis=None, dtype=None, out=None):
+    """Return the cumulative product of the elements along `axis`; see
+    `_accumulate`."""
+    return _accumulate(a, 'prod', axis=axis, dtype=dtype, out=out)
+
+
+def _accumulate(a, name, axis=None, dtype=None, out=None):
+    """Compute the prefix scan `name` of `a` along `axis`.
+
+    Each process scans its local array.  Along a block distributed
+    `axis`, the processes then get the totals of the blocks before theirs
+    from a single ``Exscan`` over the communicator along that dimension,
+    and apply them to their results in place.  An `axis` distributed
+    otherwise is redistributed by blocks first, and the result back.  With
+    `axis` None, the flattened array is scanned; see `_flatten`.
+
+    Returns
+    -------
+    LocalArray
+        Distributed like `a` (or `out`, which must be), or like the result
+        of `_flatten`.
+    """
+    if axis is None:
+        if a.ndim > 1:
+            return _accumulate(_flatten(a), name, axis=0, dtype=dtype,
+                               out=out)
+        axis = 0
+    if isinstance(axis, (tuple, list)):
+        raise TypeError("axis must be an integer or None")
+    (axis,) = _normalize_axes(axis, a.ndim)
+    if out is not None and not arecompatible(a, out):
+        raise IncompatibleArrayError("out is not distributed like a.")
+
+    if a.dist[axis] not in ('b', 'n'):
+        dist = a.dist[:axis] + ('b',) + a.dist[axis + 1:]
+        blocked = a.__class__(a.global_shape, dtype=a.dtype, dist=dist,
+                              grid_shape=a.grid_shape, comm=a.base_comm)
+        redistribute(a, blocked)
+        result = _accumulate(blocked, name, axis=axis, dtype=dtype)
+        if out is None:
+            out = a._new_like(dtype=result.dtype)
+        redistribute(result, out)
+        return out
+
+    scan, op, apply, identity = _scans[name]
+    values = scan(a.local_array, axis=axis, dtype=dtype)
+    comm = _reduction_comm(a, (axis,))
+    if comm is not None:
+        shape = values.shape[:axis] + (1,) + values.shape[axis + 1:]
+        totals = np.empty(shape, dtype=values.dtype)
+        if values.shape[axis]:
+            totals[...] = values.take([-1], axis=axis)
+        else:
+            totals.fill(identity)
+        carries = np.empty_like(totals)
+        comm.Exscan(totals, carries, op=op)
+        if comm.Get_rank() == 0:
+            carries.fill(identity)
+        apply(values, carries, out=values)
+
+    if out is None:
+        return a._new_like(dtype=values.dtype, buf=values)
+    out.local_array[...] = values
+    return out
+
+
+def _flatten(a):
+    """Return a 1-d LocalArray of the elements of `a` in C order.
+
+    The rows of `a` are redistributed by blocks, unless they already are,
+    so each process's elements are contiguous in the flattened array.  The
+    result may share memory with `a`.
+    """
+    dist = ('b',) + ('n',) * (a.ndim - 1)
+    if a.dist == dist:
+        rows = a
+    else:
+        rows = a.__class__(a.global_shape, dtype=a.dtype, dist=dist,
+                           comm=a.base_comm)
+        redistribute(a, rows)
+    row_size = int(np.prod(a.global_shape[1:]))
+    dimdict = rows.dim_data[0]
+    dim_data = ({'dist_type': 'b', 'size': a.size,
+                 'start': dimdict['start'] * row_size,
+                 'stop': dimdict['stop'] * row_size,
+                 'proc_grid_size': dimdict['proc_grid_size']},)
+    return a.__class__.from_dim_data(dim_data, dtype=a.dtype,
+                                     buf=rows.local_array.ravel(),
+                                     comm=a.base_comm)
 
 
 def average(a, axis=None, weights=None, returned=0):
@@ -1106,20 +2452,312 @@ def corrcoef(x, y=None, rowvar=1, bias=0):
     _raise_nie()
 
 
-def median(m):
-    _raise_nie()
+# Number of candidates below which `quantile` gathers them all instead of
+# narrowing them further.
+SELECT_GATHER_SIZE = 4096
 
+# Capacity of the sketches of approximate quantiles; see
+# `distarray.local.sketch.QuantileSketch`.
+SKETCH_SIZE = 200
 
-def digitize(x, bins):
-    _raise_nie()
 
+def quantile(a, q, axis=None, out=None, keepdims=False, approximate=False):
+    """Compute the `q`-th quantiles of a LocalArray.
 
-def histogram(x, bins=None, range=None, normed=False):
-    _raise_nie()
+    Quantiles are interpolated linearly, as by `numpy.percentile`.  Over
+    the whole array, the exact quantiles are found by distributed
+    selection, without sorting: the processes narrow the candidates down
+    around a pivot (the weighted median of their local medians), with
+    one ``Allgather`` and one ``Allreduce`` of counts per round, then
+    gather the few that remain.  With `approximate`, each process
+    summarizes its elements in a bounded-memory sketch, in one pass, and
+    the sketches are merged instead.
 
+    Parameters
+    ----------
+    a : LocalArray
+    q : float or sequence of floats
+        In the range [0, 1].
+    axis : None or int or tuple of ints, optional
+        Axes other than all of them must be undistributed, and `q` a
+        float.
+    out : LocalArray, optional
+    keepdims : bool, optional
+    approximate : bool, optional
+        Return approximate quantiles, whose rank error is about
+        ``1.7 / SKETCH_SIZE`` of the number of elements.
 
-def histogram2d(x, y, bins, normed=False):
-    _raise_nie()
+    Returns
+    -------
+    A scalar, or an ndarray for several quantiles over the whole array
+    (the same on every process), else a LocalArray as for the other
+    reductions.
+    """
+    q = np.asarray(q, dtype=float)
+    if np.any((q < 0) | (q > 1)):
+        raise ValueError("Quantiles must be in the range [0, 1]")
+    if a.dtype.kind == 'c':
+        raise TypeError("Cannot compute quantiles of complex values.")
+    axes = _normalize_axes(axis, a.ndim)
+    if q.ndim and (len(axes) < a.ndim or out is not None or keepdims):
+        _raise_nie()
+    dtype = a.dtype if a.dtype.kind == 'f' else np.dtype(float)
+    shape = tuple(1 if dim in axes else n
+                  for dim, n in enumerate(a.local_shape))
+
+    if len(axes) < a.ndim:
+        if any(dim in a.distdims for dim in axes):
+            _raise_nie()
+        values = np.percentile(a.local_array, 100 * q, axis=axes,
+                               keepdims=True)
+    elif approximate:
+        values = _sketch_quantiles(a, q)
+    else:
+        values = _select_quantiles(a, q)
+    values = np.asarray(values).astype(dtype)
+    if q.ndim:
+        return values
+    return _reduction_result(a, axes, np.full(shape, values, dtype=dtype),
+                             out=out, keepdims=keepdims)
+
+
+def percentile(a, q, axis=None, out=None, keepdims=False,
+               approximate=False):
+    """Compute the `q`-th percentiles of a LocalArray; see `quantile`."""
+    return quantile(a, np.true_divide(q, 100), axis=axis, out=out,
+                    keepdims=keepdims, approximate=approximate)
+
+
+def median(a, axis=None, out=None, keepdims=False, approximate=False):
+    """Compute the median of a LocalArray; see `quantile`."""
+    return quantile(a, 0.5, axis=axis, out=out, keepdims=keepdims,
+                    approximate=approximate)
+
+
+def _sketch_quantiles(a, q):
+    """Approximate the quantiles `q` of `a` with merged sketches."""
+    comm = a.base_comm
+    local_sketch = sketch.QuantileSketch(SKETCH_SIZE)
+    local_sketch.update(a.local_array)
+    sketches = comm.gather(local_sketch, root=0)
+    values = None
+    if comm.Get_rank() == 0:
+        merged = sketches[0]
+        for other in sketches[1:]:
+            merged.merge(other)
+        values = merged.quantile(q)
+    return comm.bcast(values, root=0)
+
+
+def _select_quantiles(a, q):
+    """Find the exact quantiles `q` of `a` by distributed selection."""
+    comm = a.base_comm
+    local = a.local_array.ravel()
+    counts = np.array([local.size, 0])
+    if local.dtype.kind in 'fc':
+        counts[1] = np.isnan(local).sum()
+    comm.Allreduce(MPI.IN_PLACE, counts, op=MPI.SUM)
+    size, nan_count = counts
+    if size == 0:
+        raise ValueError("Cannot compute quantiles of an empty array.")
+    if nan_count:
+        return np.full(q.shape, np.nan)[()]
+
+    # The two elements to interpolate between, as `numpy.percentile` does.
+    position = q * (size - 1)
+    below = np.floor(position).astype(int)
+    above = np.minimum(below + 1, size - 1)
+    fraction = position - below
+    ranks = np.unique(np.concatenate((below.ravel(), above.ravel())))
+    selected = np.array([_select(comm, local, k, size) for k in ranks])
+    return _lerp(selected[np.searchsorted(ranks, below)],
+                 selected[np.searchsorted(ranks, above)], fraction)
+
+
+def _select(comm, local, k, size):
+    """Return the `k`-th smallest (from 0) of the `size` elements that the
+    processes of `comm` hold in their arrays `local`."""
+    candidates = local
+    while size > SELECT_GATHER_SIZE:
+        n = candidates.size
+        local_median = np.partition(candidates, n // 2)[n // 2] if n else None
+        medians = [(m, count) for (m, count) in
+                   comm.allgather((local_median, n)) if count]
+        pivot = _weighted_median(medians, size)
+
+        counts = np.array([(candidates < pivot).sum(),
+                           (candidates == pivot).sum()])
+        comm.Allreduce(MPI.IN_PLACE, counts, op=MPI.SUM)
+        less, equal = counts
+        if k < less:
+            candidates = candidates[candidates < pivot]
+            size = less
+        elif k < less + equal:
+            return pivot
+        else:
+            candidates = candidates[candidates > pivot]
+            k -= less + equal
+            size -= less + equal
+    gathered = np.concatenate(comm.allgather(candidates))
+    return np.partition(gathered, k)[k]
+
+
+def _weighted_median(values, total):
+    """Return the median of the (value, weight) pairs `values`, whose
+    weights add up to `total`.
+
+    At least a quarter of the elements lie on either side of the weighted
+    median of the local medians, so each round of `_select` discards at
+    least a quarter of the candidates.
+    """
+    values = sorted(values, key=lambda pair: pair[0])
+    cumulative = 0
+    for value, weight in values:
+        cumulative += weight
+        if 2 * cumulative >= total:
+            return value
+
+
+def _lerp(a, b, t):
+    """Interpolate between `a` and `b` as `numpy.percentile` does."""
+    a = np.asarray(a, dtype=float)
+    diff = np.asarray(b, dtype=float) - a
+    return np.where(t >= 0.5, b - diff * (1 - t), a + diff * t)
+
+
+def digitize(x, bins, right=False):
+    """Return the indices of the bins to which each element of `x`
+    belongs, distributed like `x`; see `numpy.digitize`."""
+    indices = np.digitize(x.local_array, bins, right=right)
+    return x._new_like(dtype=indices.dtype, buf=indices)
+
+
+def histogram(x, bins=10, range=None, normed=False, weights=None,
+              density=None):
+    """Compute the histogram of a LocalArray.
+
+    Each process histograms its elements with `numpy.histogram`, and the
+    counts are summed with one ``Allreduce``.  If `bins` is an int and
+    `range` isn't given, the range comes from a global min/max reduction
+    first.
+
+    Parameters
+    ----------
+    x : LocalArray
+        Flattened.
+    bins : int or sequence of scalars, optional
+    range : (float, float), optional
+    normed, density : bool, optional
+        Return the probability density instead of the counts.
+    weights : LocalArray, optional
+        Distributed like `x`.
+
+    Returns
+    -------
+    hist : ndarray
+    bin_edges : ndarray
+        The same on every process.
+    """
+    if isinstance(bins, six.string_types):
+        _raise_nie()
+    if range is None and np.isscalar(bins):
+        (range,) = _global_ranges(x)
+    hist, edges = np.histogram(x.local_array, bins=bins, range=range,
+                               weights=_local_weights(x, weights))
+    hist = _sum_counts(x, hist, normed or density, (edges,))
+    return hist, edges
+
+
+def histogram2d(x, y, bins=10, range=None, normed=False, weights=None,
+                density=None):
+    """Compute the bi-dimensional histogram of two LocalArrays.
+
+    `x` and `y` must be distributed alike; see `histogram` and
+    `numpy.histogram2d`.
+
+    Returns
+    -------
+    H : ndarray
+    xedges, yedges : ndarray
+        The same on every process.
+    """
+    if not arecompatible(x, y):
+        raise IncompatibleArrayError("x and y are distributed differently.")
+    if range is None:
+        pair = bins if not np.isscalar(bins) and len(bins) == 2 else \
+            (bins, bins)
+        if any(np.isscalar(b) for b in pair):
+            range = _global_ranges(x, y)
+    weights = _ravel(_local_weights(x, weights))
+    hist, xedges, yedges = np.histogram2d(x.local_array.ravel(),
+                                          y.local_array.ravel(), bins=bins,
+                                          range=range, weights=weights)
+    hist = _sum_counts(x, hist, normed or density, (xedges, yedges))
+    return hist, xedges, yedges
+
+
+def bincount(x, weights=None, minlength=0):
+    """Count the occurrences of each value in a LocalArray of
+    nonnegative ints.
+
+    The length of the result comes from a global max reduction, and the
+    counts are summed with one ``Allreduce``; see `numpy.bincount`.
+
+    Returns
+    -------
+    ndarray
+        The same on every process.
+    """
+    local = x.local_array.ravel()
+    length = np.array(local.max() + 1 if local.size else 0,
+                      dtype=np.int64)
+    x.base_comm.Allreduce(MPI.IN_PLACE, length, op=MPI.MAX)
+    counts = np.bincount(local, weights=_ravel(_local_weights(x, weights)),
+                         minlength=max(int(length), minlength))
+    return _sum_counts(x, counts)
+
+
+def _global_ranges(*arrays):
+    """The global (min, max) of each of `arrays`, in one reduction."""
+    bounds = []
+    for a in arrays:
+        if a.local_size:
+            bounds.extend([-float(a.local_array.min()),
+                           float(a.local_array.max())])
+        else:
+            bounds.extend([-np.inf, -np.inf])
+    bounds = np.array(bounds, dtype=float)
+    arrays[0].base_comm.Allreduce(MPI.IN_PLACE, bounds, op=MPI.MAX)
+    ranges = []
+    for lower, upper in zip(-bounds[::2], bounds[1::2]):
+        if lower > upper:
+            # No elements anywhere.
+            lower, upper = 0.0, 1.0
+        ranges.append((lower, upper))
+    return ranges
+
+
+def _local_weights(x, weights):
+    if weights is None:
+        return None
+    if not arecompatible(x, weights):
+        raise IncompatibleArrayError("weights are distributed unlike x.")
+    return weights.local_array
+
+
+def _ravel(local):
+    return None if local is None else local.ravel()
+
+
+def _sum_counts(x, counts, density=False, edges=()):
+    """Sum the local `counts` of a histogram over the processes."""
+    counts = np.ascontiguousarray(counts)
+    x.base_comm.Allreduce(MPI.IN_PLACE, counts, op=MPI.SUM)
+    if density:
+        counts = counts / counts.sum()
+        for widths in np.ix_(*[np.diff(e) for e in edges]):
+            counts = counts / widths
+    return counts
 
 
 def logspace(start, stop, num=50, endpoint=True, base=10.0):
@@ -1149,6 +2787,141 @@ def linspace(start, stop, num=50, endpoint=True, retstep=False):
 # 5.6 Other indexing devices
 #----------------------------------------------------------------------------
 
+def nonzero(a):
+    """Return the global indices of the nonzero elements of `a`.
+
+    Like `numpy.nonzero`, the indices are in C order: arrays that aren't
+    distributed by blocks of rows are redistributed first (see
+    `_flatten`).  Each process then maps the positions of its nonzero
+    elements through `local_to_global`.
+
+    Returns
+    -------
+    tuple of LocalArrays
+        One 1-d array per dimension, block distributed with as many
+        elements on each process as it found; see `_packed_dim_data`.
+    """
+    flat = _flatten(a)
+    positions = np.flatnonzero(flat.local_array)
+    indices = np.unravel_index(flat.local_to_global(positions)[0],
+                               a.global_shape)
+    dim_data = _packed_dim_data(a.base_comm, len(positions))
+    return tuple(a.__class__.from_dim_data(copy.deepcopy(dim_data),
+                                           dtype=np.intp, buf=index,
+                                           comm=a.base_comm)
+                 for index in indices)
+
+
+def compress(condition, a, axis=None, out=None):
+    """Return the slices of `a` along `axis` where `condition` is true.
+
+    `condition` is an array_like, so every process knows where each of
+    its slices ends up, and no communication is needed.  Along a block
+    distributed `axis`, the result stays block distributed; along a
+    cyclic one, it becomes unstructured.  With `axis` None, the flattened
+    array is compressed; see `_flatten`.
+    """
+    condition = np.asarray(condition, dtype=bool)
+    if condition.ndim != 1:
+        raise ValueError("condition must be a 1-d array")
+    if axis is None:
+        a = _flatten(a)
+        axis = 0
+    if isinstance(axis, (tuple, list)):
+        raise TypeError("axis must be an integer or None")
+    (axis,) = _normalize_axes(axis, a.ndim)
+    size = a.global_shape[axis]
+    if condition[size:].any():
+        msg = "condition selects index %d, out of bounds for axis %d" % (
+            size + np.flatnonzero(condition[size:])[0], axis)
+        raise IndexError(msg)
+    keep = np.zeros(size, dtype=bool)
+    keep[:len(condition)] = condition[:size]
+    new_size = int(keep.sum())
+
+    dimdict = a.dim_data[axis]
+    global_index = np.asarray(a.maps[axis].global_index, dtype=np.intp)
+    local_keep = keep[global_index]
+    if dimdict['dist_type'] == 'n':
+        new_dimdict = dict(dist_type='n', size=new_size)
+    elif dimdict['dist_type'] == 'b':
+        new_dimdict = dict(dist_type='b', size=new_size,
+                           start=int(keep[:dimdict['start']].sum()),
+                           stop=int(keep[:dimdict['stop']].sum()),
+                           proc_grid_size=dimdict['proc_grid_size'])
+    else:
+        new_index = np.cumsum(keep) - 1
+        indices = new_index[global_index[local_keep]].tolist()
+        new_dimdict = dict(dist_type='u', size=new_size, indices=indices,
+                           proc_grid_size=dimdict['proc_grid_size'])
+    dim_data = list(copy.deepcopy(a.dim_data))
+    dim_data[axis] = new_dimdict
+    values = np.compress(local_keep, a.local_array, axis=axis)
+    result = a.__class__.from_dim_data(dim_data, dtype=values.dtype,
+                                       buf=values, comm=a.base_comm)
+    if out is None:
+        return result
+    if not arecompatible(result, out):
+        raise IncompatibleArrayError("out is not distributed like the "
+                                     "result.")
+    out.local_array[...] = values
+    return out
+
+
+def putmask(a, mask, values):
+    """Set the elements of `a` where `mask` is true to `values`.
+
+    As with `numpy.putmask`, an array of `values` is repeated over the
+    flattened `a`, so each process picks the values for its elements by
+    their global flat indices.  `values` may also be a LocalArray
+    distributed like `a`, which is then used elementwise.
+    """
+    if not arecompatible(a, mask):
+        raise IncompatibleArrayError("mask is not distributed like a.")
+    local_mask = mask.local_array.astype(bool)
+    if isinstance(values, DenseLocalArray):
+        if not arecompatible(a, values):
+            raise IncompatibleArrayError("values are not distributed "
+                                         "like a.")
+        np.copyto(a.local_array, values.local_array, casting='unsafe',
+                  where=local_mask)
+        return
+    values = np.asarray(values).ravel()
+    if values.size == 1:
+        np.copyto(a.local_array, values[0], casting='unsafe',
+                  where=local_mask)
+    elif values.size:
+        local_inds = np.nonzero(local_mask)
+        flat = np.ravel_multi_index(a.local_to_global(*local_inds),
+                                    a.global_shape)
+        a.local_array[local_inds] = values[flat % values.size]
+
+
+def _masked_values(a, mask):
+    """Return the elements of `a` where the boolean LocalArray `mask` is
+    true, as a 1-d LocalArray in C order, like ``a[mask]`` in NumPy."""
+    if mask.dtype != bool:
+        raise IndexError("Only boolean LocalArrays can index LocalArrays.")
+    if not arecompatible(a, mask):
+        raise IncompatibleArrayError("mask is not distributed like a.")
+    values = _flatten(a).local_array[_flatten(mask).local_array]
+    dim_data = _packed_dim_data(a.base_comm, len(values))
+    return a.__class__.from_dim_data(dim_data, dtype=values.dtype,
+                                     buf=values, comm=a.base_comm)
+
+
+def _packed_dim_data(comm, count):
+    """The `dim_data` of a 1-d array with `count` elements on each
+    process of `comm`, in rank order.
+
+    The counts are exchanged in a single ``Allgather``.
+    """
+    counts = np.empty(comm.Get_size(), dtype=np.int64)
+    comm.Allgather(np.array([count], dtype=np.int64), counts)
+    start = int(counts[:comm.Get_rank()].sum())
+    return (dict(dist_type='b', size=int(counts.sum()), start=start,
+                 stop=start + count, proc_grid_size=comm.Get_size()),)
+
 
 #----------------------------------------------------------------------------
 # 5.7 Two-dimensional functions
@@ -1189,6 +2962,187 @@ finfo = np.finfo
 # 5.10 Misc functions
 #----------------------------------------------------------------------------
 
+def sort(a, axis=-1, kind='quicksort'):
+    """Return a sorted copy of a LocalArray.
+
+    Sorting along an undistributed axis is local, and the copy is
+    distributed like `a`.  A 1-d array is sorted with a parallel sample
+    sort: each process sorts its elements, splitters are chosen from
+    regular samples of every sorted local array, the pieces between the
+    splitters go to their processes in one ``Alltoallv``, and each process
+    merges the sorted runs it receives.  The result is block distributed,
+    with blocks of roughly, but not necessarily exactly, equal size.
+
+    Parameters
+    ----------
+    a : LocalArray
+    axis : int or None, optional
+        Only a 1-d array can be sorted along a distributed axis, or
+        flattened with None.
+    kind : str, optional
+        The local sorting algorithm.  Stable kinds give a stable sort if
+        `a` is block distributed.
+
+    Returns
+    -------
+    LocalArray
+    """
+    axis = _sort_axis(a, axis)
+    if a.dist[axis] == 'n':
+        return a._new_like(dtype=a.dtype,
+                           buf=np.sort(a.local_array, axis=axis, kind=kind))
+    values, _ = _sample_sort(a, kind)
+    return _sorted_result(a, values)
+
+
+def argsort(a, axis=-1, kind='quicksort'):
+    """Return the global indices that would sort a LocalArray.
+
+    The indices are distributed like the result of `sort`; see `sort` for
+    the parameters.
+    """
+    axis = _sort_axis(a, axis)
+    if a.dist[axis] == 'n':
+        indices = np.argsort(a.local_array, axis=axis, kind=kind)
+        return a._new_like(dtype=indices.dtype, buf=indices)
+    _, indices = _sample_sort(a, kind, with_indices=True)
+    return _sorted_result(a, indices)
+
+
+def searchsorted(a, v, side='left'):
+    """Find the global indices where `v` would be inserted into `a` to
+    keep it sorted.
+
+    Parameters
+    ----------
+    a : LocalArray
+        A sorted 1-d array, with any distribution.
+    v : array_like
+        The values to insert, the same on every process.
+    side : {'left', 'right'}, optional
+
+    Returns
+    -------
+    int or ndarray of ints
+        The same on every process.
+    """
+    if a.ndim != 1:
+        raise ValueError("searchsorted needs a 1-d array.")
+    # The local elements of a sorted array are sorted, and the index for a
+    # value is the number of elements below it on all processes.
+    local = np.asarray(np.searchsorted(a.local_array, v, side=side))
+    result = np.empty_like(local)
+    a.base_comm.Allreduce(local, result, op=MPI.SUM)
+    return result[()]
+
+
+def _sort_axis(a, axis):
+    if axis is None:
+        if a.ndim != 1:
+            _raise_nie()
+        return 0
+    (axis,) = _normalize_axes(axis, a.ndim)
+    if a.dist[axis] != 'n' and a.ndim != 1:
+        _raise_nie()
+    return axis
+
+
+def _sample_sort(a, kind, with_indices=False):
+    """Sample sort the 1-d LocalArray `a`.
+
+    Returns
+    -------
+    values : ndarray
+        The sorted elements that end up on this process.
+    indices : ndarray or None
+        Their global indices in `a`, if `with_indices`.
+    """
+    comm = a.base_comm
+    if with_indices:
+        order = np.argsort(a.local_array, kind=kind)
+        local = a.local_array[order]
+        indices = np.asarray(a.maps[0].global_index, dtype=np.intp)[order]
+    else:
+        local = np.sort(a.local_array, kind=kind)
+        indices = None
+
+    cuts = _sample_sort_cuts(comm, local, a.global_shape[0])
+    send_counts = np.diff(np.concatenate(([0], cuts, [len(local)])))
+    recv_counts = np.empty_like(send_counts)
+    comm.Alltoall(send_counts, recv_counts)
+    values = _alltoallv(comm, local, send_counts, recv_counts)
+    if with_indices:
+        indices = _alltoallv(comm, indices, send_counts, recv_counts)
+
+    # One sorted run came from each process, in rank order, so a stable
+    # sort merges them.
+    if with_indices:
+        order = np.argsort(values, kind='mergesort')
+        return values[order], indices[order]
+    return np.sort(values, kind='mergesort'), None
+
+
+# Number of samples each process contributes to the choice of splitters in
+# `sort`, per process.  With regular sampling, no process ends up with more
+# than about (1 + 1 / SORT_OVERSAMPLING) times its share of the elements.
+SORT_OVERSAMPLING = 4
+
+
+def _sample_sort_cuts(comm, local, size):
+    """Where to cut the sorted local array `local` into the pieces for
+    each process.
+
+    Elements equal to a splitter are shared out in rank order, so the
+    blocks stay balanced however many duplicates there are.
+    """
+    nprocs = comm.Get_size()
+    n = len(local)
+    nsamples = SORT_OVERSAMPLING * nprocs
+    samples = local[(np.arange(nsamples) * n) // nsamples] if n else local
+    samples = np.sort(np.concatenate(comm.allgather(samples)))
+    if len(samples) == 0:
+        return np.zeros(nprocs - 1, dtype=np.int64)
+    splitters = samples[(np.arange(1, nprocs) * len(samples)) // nprocs]
+
+    lower = np.searchsorted(local, splitters, side='left').astype(np.int64)
+    upper = np.searchsorted(local, splitters, side='right').astype(np.int64)
+    counts = np.concatenate((lower, upper))
+    totals = np.empty_like(counts)
+    comm.Allreduce(counts, totals, op=MPI.SUM)
+    equal = upper - lower
+    equal_below = np.zeros_like(equal)
+    comm.Exscan(equal, equal_below, op=MPI.SUM)
+    if comm.Get_rank() == 0:
+        # Exscan leaves the result undefined on rank 0.
+        equal_below[...] = 0
+
+    total_lower, total_upper = totals[:nprocs - 1], totals[nprocs - 1:]
+    target = (np.arange(1, nprocs, dtype=np.int64) * size) // nprocs
+    target = np.clip(target, total_lower, total_upper)
+    return lower + np.clip(target - total_lower - equal_below, 0, equal)
+
+
+def _alltoallv(comm, send_buf, send_counts, recv_counts):
+    """Send consecutive pieces of `send_buf` to each process."""
+    send_displs = np.concatenate(([0], np.cumsum(send_counts)[:-1]))
+    recv_displs = np.concatenate(([0], np.cumsum(recv_counts)[:-1]))
+    recv_buf = np.empty(recv_counts.sum(), dtype=send_buf.dtype)
+    comm.Alltoallv([send_buf, (send_counts, send_displs)],
+                   [recv_buf, (recv_counts, recv_displs)])
+    return recv_buf
+
+
+def _sorted_result(a, buf):
+    """A 1-d LocalArray holding the block `buf` of a sorted `a`."""
+    comm = a.base_comm
+    start = comm.exscan(len(buf)) or 0
+    dim_data = (dict(dist_type='b', size=a.global_shape[0], start=start,
+                     stop=start + len(buf),
+                     proc_grid_size=comm.Get_size()),)
+    return a.__class__.from_dim_data(dim_data, dtype=buf.dtype, buf=buf,
+                                     comm=comm)
+
+
 
 #----------------------------------------------------------------------------
 # 5.11 Utility functions
@@ -1251,11 +3205,14 @@ class LocalArrayUnaryOperation(object):
         self.__name__ = getattr(numpy_ufunc, "__name__", str(numpy_ufunc))
 
     def __call__(self, x1, y=None, *args, **kwargs):
+        if y is None:
+            y = kwargs.pop('out', None)
         # What types of input are allowed?
         x1_isdla = isinstance(x1, DenseLocalArray)
         y_isdla = isinstance(y, DenseLocalArray)
         assert x1_isdla or isscalar(x1), "Invalid type for unary ufunc"
         assert y is None or y_isdla, "Invalid return array type"
+        _check_where(kwargs.get('where'), x1, y)
         if y is None:
             return self.func(x1, *args, **kwargs)
         elif y_isdla:
@@ -1279,6 +3236,8 @@ class LocalArrayBinaryOperation(object):
         self.__name__ = getattr(numpy_ufunc, "__name__", str(numpy_ufunc))
 
     def __call__(self, x1, x2, y=None, *args, **kwargs):
+        if y is None:
+            y = kwargs.pop('out', None)
         # What types of input are allowed?
         x1_isdla = isinstance(x1, DenseLocalArray)
         x2_isdla = isinstance(x2, DenseLocalArray)
@@ -1286,6 +3245,7 @@ class LocalArrayBinaryOperation(object):
         assert x1_isdla or isscalar(x1), "Invalid type for binary ufunc"
         assert x2_isdla or isscalar(x2), "Invalid type for binary ufunc"
         assert y is None or y_isdla
+        _check_where(kwargs.get('where'), x1, x2, y)
         if y is None:
                 if x1_isdla and x2_isdla:
                     if not arecompatible(x1, x2):
@@ -1308,6 +3268,14 @@ class LocalArrayBinaryOperation(object):
         return "LocalArray version of " + str(self.func)
 
 
+def _check_where(where, *arrays):
+    """Check that a LocalArray `where` mask is compatible with `arrays`."""
+    if isinstance(where, DenseLocalArray):
+        for a in arrays:
+            if isinstance(a, DenseLocalArray) and not arecompatible(where, a):
+                raise IncompatibleArrayError("Incompatible LocalArrays")
+
+
 def _add_operations(wrapper, ops):
     """Wrap numpy ufuncs for `LocalArray`s.
 
@@ -0,0 +1,238 @@
+# encoding: utf-8
+
+__docformat__ = "restructuredtext en"
+
+#----------------------------------------------------------------------------
+#  Copyright (C) 2008-2014, IPython Development Team and Enthought, Inc.
+#
+#  Distributed under the terms of the BSD License.  The full license is in
+#  the file COPYING, distributed as part of this software.
+#----------------------------------------------------------------------------
+
+"""
+Distributed fast Fourier transforms.
+
+`numpy.fft` transforms the axes that are undistributed locally.  A
+distributed axis is transformed after an all-to-all transpose that swaps
+its distribution with that of an axis already done: with one distributed
+axis this is the slab decomposition, with two the pencil decomposition.
+The transposes keep the sizes of the process grid, so each process only
+exchanges data with the processes that share its other grid coordinates.
+
+An `FFTPlan` works out the passes and the exchange schedules of the
+transposes once, for arrays laid out like a given one, and can be applied
+to any number of them.  The functions here cache their plans.
+"""
+
+#----------------------------------------------------------------------------
+# Imports
+#----------------------------------------------------------------------------
+
+import copy
+from collections import OrderedDict
+
+import numpy as np
+
+from distarray.utils import _raise_nie
+from distarray.local import construct, denselocalarray
+from distarray.local.base import _layout_key
+from distarray.local.error import GridShapeError, IncompatibleArrayError
+
+__all__ = ['FFTPlan', 'fftn', 'ifftn', 'rfftn']
+
+
+#----------------------------------------------------------------------------
+# Code
+#----------------------------------------------------------------------------
+
+# Number of most recently used plans the functions keep.
+PLAN_CACHE_SIZE = 16
+
+_plans = OrderedDict()
+
+
+class FFTPlan(object):
+
+    """A distributed FFT of arrays laid out like a given LocalArray.
+
+    Creating a plan is collective.
+
+    Parameters
+    ----------
+    a : LocalArray
+        Any array with the layout to transform.  Its data isn't used.
+    kind : {'fftn', 'ifftn', 'rfftn'}, optional
+    axes : sequence of int, optional
+        The axes to transform; default all.
+
+    Notes
+    -----
+    The result is distributed like `a`, except that if the transform has
+    to move data, dimensions distributed other than by blocks come back
+    block distributed.  At least one dimension of an array that has to
+    move data must be left distributed, so distributed 1-d transforms are
+    not supported.
+    """
+
+    def __init__(self, a, kind='fftn', axes=None):
+        if kind not in ('fftn', 'ifftn', 'rfftn'):
+            raise ValueError("Unknown kind of transform: %r" % (kind,))
+        if axes is None:
+            axes = range(a.ndim)
+        axes = [ax % a.ndim for ax in axes]
+        if len(set(axes)) != len(axes):
+            raise ValueError("Duplicate value in axes: %r" % (axes,))
+
+        self.kind = kind
+        self.axes = tuple(axes)
+        self.key = _plan_key(a, kind, self.axes)
+        self.steps = []
+
+        self._current = a
+        self._moved = False
+        if kind == 'rfftn' and axes:
+            # The real transform comes first, along the last axis.
+            last = axes.pop()
+            self._make_local(last)
+            self.steps.append(('rfft', (last,)))
+            self._resize(last, a.global_shape[last] // 2 + 1)
+        name = 'ifftn' if kind == 'ifftn' else 'fftn'
+        while axes:
+            local = [ax for ax in axes if self._current.dist[ax] == 'n']
+            if local:
+                self.steps.append((name, tuple(local)))
+                axes = [ax for ax in axes if ax not in local]
+            else:
+                self._make_local(axes[0])
+
+        # Transpose back to the layout of `a`.
+        if self._moved:
+            dist = tuple('n' if d == 'n' else 'b' for d in a.dist)
+            self._transpose(dist, a.grid_shape)
+        self.dim_data = self._current.dim_data
+        self.local_shape = self._current.local_shape
+        self.base_comm = a.base_comm
+        del self._current
+
+    def __call__(self, a):
+        """Transform the LocalArray `a`, which must be laid out like the
+        array the plan was made for."""
+        if _plan_key(a, self.kind, self.axes) != self.key:
+            raise IncompatibleArrayError("a is not laid out like the plan.")
+        data = a.local_array
+        for step in self.steps:
+            if step[0] == 'transpose':
+                _, schedule, local_shape = step
+                buf = np.empty(local_shape, dtype=data.dtype)
+                denselocalarray._apply_redistribution(schedule, data, buf)
+                data = buf
+            elif step[0] == 'rfft':
+                data = np.fft.rfft(data, axis=step[1][0])
+            else:
+                data = getattr(np.fft, step[0])(data, axes=step[1])
+        if data is a.local_array:
+            data = data.astype(complex)
+        return a.__class__.from_dim_data(copy.deepcopy(self.dim_data),
+                                         dtype=data.dtype, buf=data,
+                                         comm=self.base_comm)
+
+    def _make_local(self, axis):
+        """Add a transpose that makes `axis` undistributed."""
+        dist = list(self._current.dist)
+        if dist[axis] == 'n':
+            return
+        sizes = dict(zip(self._current.distdims, self._current.grid_shape))
+        others = [ax for ax in range(len(dist)) if dist[ax] == 'n']
+        dist[axis] = 'n'
+        if others:
+            # Swap distributions with the nearest undistributed axis, which
+            # takes over the grid size of `axis`.
+            other = min(others, key=lambda ax: abs(ax - axis))
+            dist[other] = 'b'
+            sizes[other] = sizes.pop(axis)
+            grid_shape = tuple(sizes[ax] for ax in sorted(sizes))
+        else:
+            distdims = tuple(ax for ax in range(len(dist)) if dist[ax] != 'n')
+            if not distdims:
+                _raise_nie()
+            grid_shape = _grid_shape(self._current.global_shape, distdims,
+                                     self._current.comm_size)
+        self._transpose(tuple(dist), grid_shape)
+
+    def _transpose(self, dist, grid_shape):
+        current = self._current
+        target = denselocalarray.LocalArray(current.global_shape, dist=dist,
+                                            grid_shape=grid_shape,
+                                            comm=current.base_comm)
+        if current.dist == target.dist and current.dim_data == \
+                target.dim_data:
+            return
+        schedule = denselocalarray._redistribution_schedule(current, target)
+        self.steps.append(('transpose', schedule, target.local_shape))
+        self._current = target
+        self._moved = True
+
+    def _resize(self, axis, size):
+        """Change the size of the undistributed `axis` of the layout."""
+        dim_data = copy.deepcopy(self._current.dim_data)
+        dim_data[axis]['size'] = size
+        self._current = denselocalarray.LocalArray.from_dim_data(
+            dim_data, comm=self._current.base_comm)
+
+
+def _plan_key(a, kind, axes):
+    """Identify the arrays that a plan can transform."""
+    layout = tuple(_layout_key(dd) for dd in a.dim_data)
+    return (kind, axes, a.global_shape, a.dist, a.grid_shape, layout,
+            a.base_comm.py2f())
+
+
+def _grid_shape(shape, distdims, comm_size):
+    try:
+        return construct.optimize_grid_shape(shape, distdims, comm_size)
+    except GridShapeError:
+        # A prime number of processes.
+        return (comm_size,) + (1,) * (len(distdims) - 1)
+
+
+def get_plan(a, kind='fftn', axes=None):
+    """Return a cached `FFTPlan` for `a`, making it if need be."""
+    if axes is not None:
+        axes = tuple(ax % a.ndim for ax in axes)
+    else:
+        axes = tuple(range(a.ndim))
+    key = _plan_key(a, kind, axes)
+    if key in _plans:
+        # Move the plan to the most recently used end.
+        plan = _plans.pop(key)
+        _plans[key] = plan
+        return plan
+    plan = FFTPlan(a, kind=kind, axes=axes)
+    _plans[key] = plan
+    if len(_plans) > PLAN_CACHE_SIZE:
+        _plans.popitem(last=False)
+    return plan
+
+
+def fftn(a, axes=None):
+    """N-dimensional discrete Fourier transform of a LocalArray.
+
+    See `numpy.fft.fftn` and `FFTPlan`.
+    """
+    return get_plan(a, 'fftn', axes)(a)
+
+
+def ifftn(a, axes=None):
+    """N-dimensional inverse discrete Fourier transform of a LocalArray.
+
+    See `numpy.fft.ifftn` and `FFTPlan`.
+    """
+    return get_plan(a, 'ifftn', axes)(a)
+
+
+def rfftn(a, axes=None):
+    """N-dimensional discrete Fourier transform of a real LocalArray.
+
+    See `numpy.fft.rfftn` and `FFTPlan`.
+    """
+    return get_plan(a, 'rfftn', axes)(a)
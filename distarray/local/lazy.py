@@ -0,0 +1,179 @@
+# encoding: utf-8
+
+__docformat__ = "restructuredtext en"
+
+#----------------------------------------------------------------------------
+#  Copyright (C) 2008-2014, IPython Development Team and Enthought, Inc.
+#
+#  Distributed under the terms of the BSD License.  The full license is in
+#  the file COPYING, distributed as part of this software.
+#----------------------------------------------------------------------------
+
+"""
+Fused evaluation of elementwise expressions on LocalArrays.
+
+An expression is sent from the client as a *program*: a list of
+instructions in topological order, where the instruction at position ``k``
+computes the value of slot ``k``.  The instructions are
+
+``('array', i)``
+    The i-th LocalArray passed to `evaluate`.
+``('scalar', value)``
+    A Python or NumPy scalar.
+``('ufunc', name, operands, kwargs)``
+    ``numpy.<name>(*[slot for slot in operands], **kwargs)``, where
+    `name` is a ufunc or ``'where'``.
+
+The last instruction is the result.  Rather than creating a LocalArray per
+operation, `evaluate` runs the whole program over one chunk of the local
+arrays at a time, writing intermediate values into a few reusable buffers
+that are small enough to stay in cache.
+"""
+
+#----------------------------------------------------------------------------
+# Imports
+#----------------------------------------------------------------------------
+
+import numpy as np
+
+from distarray.externals.six.moves import range
+from distarray.local.base import arecompatible
+from distarray.local.denselocalarray import empty_like
+from distarray.local.error import IncompatibleArrayError
+
+
+#----------------------------------------------------------------------------
+# Code
+#----------------------------------------------------------------------------
+
+# Number of elements evaluated per chunk.
+CHUNK_SIZE = 2**14
+
+
+def evaluate(program, arrays, chunk_size=CHUNK_SIZE):
+    """Evaluate an expression `program` on compatible LocalArrays.
+
+    Parameters
+    ----------
+    program : list of tuples
+        The expression, as described in the module docstring.
+    arrays : sequence of LocalArrays
+        The arrays referred to by the program's 'array' instructions.
+    chunk_size : int, optional
+        Approximate number of elements to evaluate at a time.
+
+    Returns
+    -------
+    LocalArray
+        A new LocalArray, distributed like `arrays`.
+    """
+    template = arrays[0]
+    for other in arrays[1:]:
+        if not arecompatible(template, other):
+            raise IncompatibleArrayError("Incompatible LocalArrays")
+
+    dtypes = _probe_dtypes(program, arrays)
+    result = empty_like(template, dtype=dtypes[-1])
+    plan = _plan_buffers(program, dtypes)
+
+    views = [a.local_array for a in arrays] + [result.local_array]
+    if all(v.flags.c_contiguous for v in views):
+        views = [v.reshape(-1) for v in views]
+    out_view = views.pop()
+
+    nrows = out_view.shape[0]
+    row_size = max(1, out_view[:1].size)
+    step = max(1, chunk_size // row_size)
+    buffers = [np.empty((min(step, nrows),) + out_view.shape[1:], dtype=dt)
+               for dt in plan['dtypes']]
+
+    last = len(program) - 1
+    for start in range(0, nrows, step):
+        stop = min(start + step, nrows)
+        values = []
+        for k, instr in enumerate(program):
+            kind = instr[0]
+            if kind == 'array':
+                values.append(views[instr[1]][start:stop])
+            elif kind == 'scalar':
+                values.append(instr[1])
+            else:
+                name, operands, kwargs = instr[1:]
+                if k == last:
+                    out = out_view[start:stop]
+                else:
+                    out = buffers[plan['slots'][k]][:stop - start]
+                _apply(name, [values[i] for i in operands], out, kwargs)
+                values.append(out)
+
+    return result
+
+
+def _apply(name, operands, out, kwargs):
+    """Compute the operation `name` of `operands` into `out`."""
+    if name == 'where':
+        condition, x, y = operands
+        np.copyto(out, y)
+        np.copyto(out, x, where=np.asarray(condition, dtype=bool))
+    else:
+        getattr(np, name)(*operands, out=out, **kwargs)
+
+
+def _probe_dtypes(program, arrays):
+    """Find the dtype of every slot by running `program` on one element."""
+    values = []
+    with np.errstate(all='ignore'):
+        for instr in program:
+            kind = instr[0]
+            if kind == 'array':
+                values.append(np.ones(1, dtype=arrays[instr[1]].dtype))
+            elif kind == 'scalar':
+                values.append(instr[1])
+            else:
+                name, operands, kwargs = instr[1:]
+                func = getattr(np, name)
+                values.append(func(*[values[i] for i in operands], **kwargs))
+    return [getattr(v, 'dtype', None) for v in values]
+
+
+def _plan_buffers(program, dtypes):
+    """Assign the intermediate results of `program` to reusable buffers.
+
+    A buffer is released for reuse as soon as the last instruction that
+    reads it has been assigned an output, so an operation may write its
+    result over one of its own operands.  ``'where'`` makes two passes
+    over its output, so its operands are only released afterwards.
+
+    Returns
+    -------
+    dict
+        'slots' maps each intermediate instruction to a buffer number, and
+        'dtypes' gives the dtype of each buffer.
+    """
+    last_use = {}
+    for k, instr in enumerate(program):
+        if instr[0] == 'ufunc':
+            for i in instr[2]:
+                last_use[i] = k
+
+    slots = {}
+    buffer_dtypes = []
+    free = []
+    for k, instr in enumerate(program[:-1]):
+        if instr[0] != 'ufunc':
+            continue
+        released = [slots[i] for i in set(instr[2])
+                    if i in slots and last_use[i] == k]
+        elementwise = instr[1] != 'where'
+        if elementwise:
+            free.extend(released)
+        for n, buf in enumerate(free):
+            if buffer_dtypes[buf] == dtypes[k]:
+                slots[k] = free.pop(n)
+                break
+        else:
+            slots[k] = len(buffer_dtypes)
+            buffer_dtypes.append(dtypes[k])
+        if not elementwise:
+            free.extend(released)
+    return {'slots': slots, 'dtypes': buffer_dtypes}
@@ -11,94 +11,254 @@ __docformat__ = "restructuredtext en"
 #  the file COPYING, distributed as part of this software.
 #----------------------------------------------------------------------------
 
-from distarray.externals.six.moves import range, zip
-from math import ceil
+import numpy as np
 
+from distarray.externals.six.moves import range
 
-def not_distributed(dd):
-    """Return the global indicies owned by this undistributed process.
 
-    Requires the 'size' key.
-    """
-    return range(dd['size'])
+#----------------------------------------------------------------------------
+# Sequence and mapping views
+#----------------------------------------------------------------------------
 
+class GlobalIndex(object):
 
-def block(dd):
-    """Return the global indices owned by this block-distributed process.
+    """Sequence view of an IndexMap: local index -> global index.
 
-    Requires 'start' and 'stop' keys.
+    Supports indexing (raising IndexError), iteration, `len`, and
+    conversion to an ndarray with `numpy.asarray`.
     """
-    return range(dd['start'], dd['stop'])
 
+    def __init__(self, index_map):
+        self._map = index_map
 
-def cyclic(dd):
-    """Return the global indices owned by this (block-)cyclically-distributed
-    process.
+    def __getitem__(self, local_index):
+        return self._map.local_to_global(local_index)
 
-    Requires 'start', 'size', 'proc_grid_size', and (optionally) 'block_size'
-    keys.  If 'block_size' key does not exist, it is set to 1.
-    """
-    dd.setdefault('block_size', 1)
-    nblocks = int(ceil(dd['size'] / dd['block_size']))
-    block_indices = range(0, nblocks, dd['proc_grid_size'])
+    def __len__(self):
+        return self._map.size
 
-    global_indices = []
-    for block_index in block_indices:
-        block_start = block_index * dd['block_size'] + dd['start']
-        block_stop = block_start + dd['block_size']
-        block = range(block_start, min(block_stop, dd['size']))
-        global_indices.extend(block)
+    def __iter__(self):
+        for local_index in range(self._map.size):
+            yield self._map.local_to_global(local_index)
 
-    return global_indices
+    def __array__(self, dtype=None):
+        indices = self._map.local_to_global(np.arange(self._map.size))
+        return np.asarray(indices, dtype=dtype)
 
 
-def unstructured(dd):
-    """Return the arbitrary global indices owned by this  process.
+class LocalIndex(object):
 
-    Requires the 'indices' key.
+    """Mapping view of an IndexMap: global index -> local index.
+
+    Supports lookup (raising KeyError for global indices that are not
+    owned), iteration over the owned global indices, `len` and `in`.
     """
-    return dd['indices']
 
+    def __init__(self, index_map):
+        self._map = index_map
+
+    def __getitem__(self, global_index):
+        return self._map.global_to_local(global_index)
+
+    def __len__(self):
+        return self._map.size
 
-dist_type_to_global_indices = {
-    'n': not_distributed,
-    'b': block,
-    'c': cyclic,
-    'u': unstructured,
-}
+    def __iter__(self):
+        return iter(GlobalIndex(self._map))
 
+    def __contains__(self, global_index):
+        try:
+            self._map.global_to_local(global_index)
+        except KeyError:
+            return False
+        return True
+
+
+#----------------------------------------------------------------------------
+# IndexMaps
+#----------------------------------------------------------------------------
 
 class IndexMap(object):
 
     """Provide global->local and local->global index mappings.
 
+    This generic map stores the owned global indices explicitly, and is
+    used for unstructured dimensions.  The subclasses compute the mappings
+    in closed form and use constant memory.
+
+    Both mapping methods accept an int or an integer ndarray.
+
     Attributes
     ----------
-    global_index : list of int or range object
+    global_index : GlobalIndex
         Given a local index as a key, return the corresponding global index.
-    local_index : dict of int -> int
+    local_index : LocalIndex
         Given a global index as a key, return the corresponding local index.
     """
 
     def __init__(self, global_indices):
-        """Make an IndexMap from a local_index and global_index.
+        """Make an IndexMap from a sequence of global indices.
 
         Parameters
         ----------
-        global_indices: list of int or range object
+        global_indices: sequence of int
             Each position contains the corresponding global index for a
             local index (position).
         """
-        self.global_index = global_indices
-        local_indices = range(len(global_indices))
-        self.local_index = dict(zip(global_indices, local_indices))
+        self._global_indices = np.asarray(global_indices, dtype=np.intp)
+        self._sorter = np.argsort(self._global_indices, kind='mergesort')
+        self._sorted_indices = self._global_indices[self._sorter]
 
     @property
     def size(self):
-        return len(self.global_index)
+        return len(self._global_indices)
+
+    @property
+    def global_index(self):
+        return GlobalIndex(self)
+
+    @property
+    def local_index(self):
+        return LocalIndex(self)
+
+    def local_to_global(self, local_index):
+        index = _check_local(local_index, self.size)
+        return _as_scalar_if_int(self._global_indices[index], local_index)
+
+    def global_to_local(self, global_index):
+        index = np.asarray(global_index)
+        position = np.searchsorted(self._sorted_indices, index)
+        position = np.minimum(position, max(self.size - 1, 0))
+        if (self.size == 0 or
+                np.any(self._sorted_indices[position] != index)):
+            raise KeyError(global_index)
+        return _as_scalar_if_int(self._sorter[position], global_index)
 
     @classmethod
     def from_dimdict(cls, dimdict):
         """Make an IndexMap from a `dimdict` data structure."""
-        global_indices_fn = dist_type_to_global_indices[dimdict['dist_type']]
-        return IndexMap(global_indices_fn(dimdict))
+        dist_type = dimdict['dist_type']
+        if dist_type == 'n':
+            return NoDistMap(dimdict['size'])
+        elif dist_type == 'b':
+            return BlockMap(dimdict['start'], dimdict['stop'])
+        elif dist_type == 'c':
+            dimdict.setdefault('block_size', 1)
+            if dimdict['block_size'] == 1:
+                return CyclicMap(dimdict['start'], dimdict['size'],
+                                 dimdict['proc_grid_size'])
+            else:
+                return BlockCyclicMap(dimdict['start'], dimdict['size'],
+                                      dimdict['proc_grid_size'],
+                                      dimdict['block_size'])
+        elif dist_type == 'u':
+            return IndexMap(dimdict['indices'])
+        else:
+            raise ValueError("Unknown dist_type %r" % (dist_type,))
+
+
+class BlockMap(IndexMap):
+
+    """IndexMap for the contiguous global indices ``[start, stop)``."""
+
+    def __init__(self, start, stop):
+        self.start = start
+        self.stop = stop
+
+    @property
+    def size(self):
+        return max(self.stop - self.start, 0)
+
+    def local_to_global(self, local_index):
+        index = _check_local(local_index, self.size)
+        return _as_scalar_if_int(index + self.start, local_index)
+
+    def global_to_local(self, global_index):
+        index = np.asarray(global_index)
+        if np.any((index < self.start) | (index >= self.stop)):
+            raise KeyError(global_index)
+        return _as_scalar_if_int(index - self.start, global_index)
+
+
+class NoDistMap(BlockMap):
+
+    """IndexMap for an undistributed dimension of length `size`."""
+
+    def __init__(self, size):
+        super(NoDistMap, self).__init__(0, size)
+
+
+class BlockCyclicMap(IndexMap):
+
+    """IndexMap for a block-cyclic distribution.
+
+    The owned global indices are ``start + j*grid_size*block_size + o``
+    for ``0 <= o < block_size``, in increasing order, up to the global
+    `size`.
+    """
+
+    def __init__(self, start, size, grid_size, block_size):
+        self.start = start
+        self.global_size = size
+        self.grid_size = grid_size
+        self.block_size = block_size
+
+        nblocks = -(-size // block_size)
+        nlocal_blocks = len(range(0, nblocks, grid_size))
+        remaining = size - start
+        if remaining <= 0:
+            nbelow = 0
+        else:
+            period = grid_size * block_size
+            nbelow = ((remaining // period) * block_size +
+                      min(remaining % period, block_size))
+        self._size = min(nlocal_blocks * block_size, nbelow)
+
+    @property
+    def size(self):
+        return self._size
+
+    def local_to_global(self, local_index):
+        index = _check_local(local_index, self.size)
+        block, offset = divmod(index, self.block_size)
+        period = self.grid_size * self.block_size
+        return _as_scalar_if_int(self.start + block * period + offset,
+                                 local_index)
+
+    def global_to_local(self, global_index):
+        index = np.asarray(global_index)
+        period = self.grid_size * self.block_size
+        block, offset = divmod(index - self.start, period)
+        local = block * self.block_size + offset
+        if np.any((index < self.start) | (offset >= self.block_size) |
+                  (local >= self.size)):
+            raise KeyError(global_index)
+        return _as_scalar_if_int(local, global_index)
+
+
+class CyclicMap(BlockCyclicMap):
+
+    """IndexMap for a cyclic distribution: every `grid_size`-th index."""
+
+    def __init__(self, start, size, grid_size):
+        super(CyclicMap, self).__init__(start, size, grid_size, 1)
+
+
+#----------------------------------------------------------------------------
+# Utilities
+#----------------------------------------------------------------------------
+
+def _check_local(local_index, size):
+    """Return `local_index` as an array; raise IndexError if it is not
+    in ``[0, size)``."""
+    index = np.asarray(local_index)
+    if np.any((index < 0) | (index >= size)):
+        raise IndexError(local_index)
+    return index
+
+
+def _as_scalar_if_int(result, index):
+    """Return a Python int if `index` was a scalar."""
+    if np.ndim(index) == 0:
+        return int(result)
+    return result
@@ -0,0 +1,138 @@
+# encoding: utf-8
+
+__docformat__ = "restructuredtext en"
+
+#----------------------------------------------------------------------------
+#  Copyright (C) 2008-2014, IPython Development Team and Enthought, Inc.
+#
+#  Distributed under the terms of the BSD License.  The full license is in
+#  the file COPYING, distributed as part of this software.
+#----------------------------------------------------------------------------
+
+"""
+Mergeable quantile sketches.
+
+A `QuantileSketch` summarizes any number of values in bounded memory, in
+one pass over them, and answers quantile queries with a rank error of
+about ``1.7 / k`` of the number of values.  Sketches of different parts of
+the data merge into a sketch of the whole, so each process can summarize
+its local array and the sketches be combined afterwards.
+
+This is the KLL sketch (Karnin, Lang and Liberty, "Optimal Quantile
+Approximation in Streams", 2016): a stack of compactors, where compacting
+a level sorts it and promotes every other item, at twice the weight, to
+the level above.
+"""
+
+#----------------------------------------------------------------------------
+# Imports
+#----------------------------------------------------------------------------
+
+import numpy as np
+
+__all__ = ['QuantileSketch']
+
+
+#----------------------------------------------------------------------------
+# Code
+#----------------------------------------------------------------------------
+
+# Ratio of the capacities of consecutive levels.
+_CAPACITY_RATIO = 2.0 / 3.0
+
+# Number of values at a time that `QuantileSketch.update` adds.
+UPDATE_CHUNK_SIZE = 2**16
+
+
+class QuantileSketch(object):
+
+    """A KLL sketch of a set of values.
+
+    Parameters
+    ----------
+    k : int, optional
+        Capacity of the top level.  The sketch keeps at most about ``3 * k``
+        values.
+    seed : int, optional
+        Seed of the random choices of the compactions.
+    """
+
+    def __init__(self, k=200, seed=None):
+        self.k = k
+        self.count = 0
+        self.nan_count = 0
+        self._levels = [np.empty(0)]
+        self._random = np.random.RandomState(seed)
+
+    @property
+    def exact(self):
+        """Whether the sketch still holds all its values."""
+        return len(self._levels) == 1
+
+    def update(self, values):
+        """Add the values of the array `values`."""
+        values = np.asarray(values).ravel()
+        for start in range(0, values.size, UPDATE_CHUNK_SIZE):
+            chunk = values[start:start + UPDATE_CHUNK_SIZE].astype(float)
+            nan = np.isnan(chunk)
+            if nan.any():
+                self.nan_count += int(nan.sum())
+                chunk = chunk[~nan]
+            self.count += chunk.size
+            self._levels[0] = np.concatenate((self._levels[0], chunk))
+            self._compress()
+
+    def merge(self, other):
+        """Add the values summarized by the sketch `other`."""
+        for level, items in enumerate(other._levels):
+            if level == len(self._levels):
+                self._levels.append(np.empty(0))
+            self._levels[level] = np.concatenate((self._levels[level], items))
+        self.count += other.count
+        self.nan_count += other.nan_count
+        self._compress()
+        return self
+
+    def quantile(self, q):
+        """Return the approximate `q`-th quantiles of the values.
+
+        Quantiles of a sketch that still holds all its values are exact,
+        and interpolated as `numpy.percentile` does.  Any NaN value
+        makes them NaN.
+        """
+        q = np.asarray(q, dtype=float)
+        if self.count + self.nan_count == 0:
+            raise ValueError("Cannot compute quantiles of no values.")
+        if self.nan_count:
+            return np.full(q.shape, np.nan)[()]
+        if self.exact:
+            return np.percentile(self._levels[0], 100 * q)
+        items = np.concatenate(self._levels)
+        weights = np.concatenate([np.full(len(level_items), 2.0**level)
+                                  for level, level_items in
+                                  enumerate(self._levels)])
+        order = np.argsort(items, kind='mergesort')
+        cumulative = np.cumsum(weights[order])
+        index = np.searchsorted(cumulative, q * cumulative[-1])
+        return items[order][np.minimum(index, len(items) - 1)]
+
+    def _capacity(self, level):
+        depth = len(self._levels) - level - 1
+        return max(int(np.ceil(self.k * _CAPACITY_RATIO**depth)), 2)
+
+    def _compress(self):
+        """Compact the levels that are over capacity, from the bottom up."""
+        level = 0
+        while level < len(self._levels):
+            items = self._levels[level]
+            if items.size > self._capacity(level):
+                if level + 1 == len(self._levels):
+                    self._levels.append(np.empty(0))
+                items = np.sort(items)
+                # An odd item out stays behind, so no weight is lost.
+                odd = items.size % 2
+                offset = odd + self._random.randint(2)
+                self._levels[level] = items[:odd]
+                self._levels[level + 1] = np.concatenate(
+                    (self._levels[level + 1], items[offset::2]))
+            level += 1
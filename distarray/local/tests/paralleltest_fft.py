@@ -0,0 +1,127 @@
+import unittest
+import numpy as np
+from numpy.testing import assert_allclose
+
+from distarray.local import fft
+from distarray.local.error import IncompatibleArrayError
+from distarray.testing import MpiTestCase
+
+
+class FFTTestCase(MpiTestCase):
+
+    def check(self, arr, dist, grid_shape=None, axes=None):
+        a = self.make_localarray(arr, dist, grid_shape)
+        for name in ('fftn', 'ifftn', 'rfftn'):
+            result = getattr(fft, name)(a, axes=axes)
+            self.assertEqual(result.dist, a.dist)
+            self.assertEqual(result.grid_shape, a.grid_shape)
+            assert_allclose(self.gather_localarray(result),
+                            getattr(np.fft, name)(arr, axes=axes),
+                            atol=1e-10)
+
+
+class TestFFT(FFTTestCase):
+
+    def setUp(self):
+        random = np.random.RandomState(0)
+        self.arr2 = random.random_sample((8, 12))
+        self.arr3 = random.random_sample((8, 6, 10))
+
+    def test_slabs(self):
+        self.check(self.arr2, ('b', 'n'))
+        self.check(self.arr2, ('n', 'b'))
+        self.check(self.arr3, ('b', 'n', 'n'))
+        self.check(self.arr3, ('n', 'n', 'b'))
+
+    def test_pencils(self):
+        self.check(self.arr3, ('b', 'b', 'n'), (2, 2))
+        self.check(self.arr3, ('b', 'n', 'b'), (2, 2))
+        self.check(self.arr3, ('n', 'b', 'b'), (4, 1))
+
+    def test_all_distributed(self):
+        self.check(self.arr2, ('b', 'b'), (2, 2))
+        self.check(self.arr3, ('b', 'b', 'b'), (1, 2, 2))
+
+    def test_axes(self):
+        self.check(self.arr3, ('b', 'b', 'n'), (2, 2), axes=(1, 2))
+        self.check(self.arr3, ('b', 'n', 'n'), axes=(0,))
+        self.check(self.arr3, ('b', 'n', 'n'), axes=(2, 1))
+
+    def test_local_only(self):
+        # No data moves, and cyclic distributions are kept.
+        a = self.make_localarray(self.arr3, ('c', 'n', 'n'))
+        plan = fft.FFTPlan(a, axes=(1, 2))
+        self.assertFalse(any(step[0] == 'transpose' for step in plan.steps))
+        result = plan(a)
+        self.assertEqual(result.dist, ('c', 'n', 'n'))
+        assert_allclose(self.gather_localarray(result),
+                        np.fft.fftn(self.arr3, axes=(1, 2)))
+
+    def test_cyclic(self):
+        a = self.make_localarray(self.arr2, ('c', 'n'))
+        result = fft.fftn(a)
+        self.assertEqual(result.dist, ('b', 'n'))
+        assert_allclose(self.gather_localarray(result), np.fft.fftn(self.arr2))
+
+    def test_round_trip(self):
+        arr = self.arr3 + 1j * self.arr3[::-1]
+        a = self.make_localarray(arr, ('b', 'b', 'n'), (2, 2))
+        assert_allclose(self.gather_localarray(fft.ifftn(fft.fftn(a))), arr)
+
+    def test_one_dimension(self):
+        a = self.make_localarray(np.arange(8.0), ('b',))
+        self.assertRaises(NotImplementedError, fft.fftn, a)
+
+
+class TestPlans(FFTTestCase):
+
+    def test_reuse(self):
+        random = np.random.RandomState(0)
+        arrays = [random.random_sample((8, 6, 4)) for i in range(3)]
+        plan = fft.FFTPlan(self.make_localarray(arrays[0], ('b', 'b', 'n'),
+                                                (2, 2)))
+        for arr in arrays:
+            a = self.make_localarray(arr, ('b', 'b', 'n'), (2, 2))
+            assert_allclose(self.gather_localarray(plan(a)), np.fft.fftn(arr))
+
+    def test_steps(self):
+        a = self.make_localarray(np.zeros((8, 6, 4)), ('b', 'b', 'n'), (2, 2))
+        plan = fft.FFTPlan(a)
+        kinds = [step[0] for step in plan.steps]
+        self.assertEqual(kinds, ['fftn', 'transpose', 'fftn', 'transpose',
+                                 'fftn', 'transpose'])
+
+    def test_incompatible(self):
+        a = self.make_localarray(np.zeros((8, 6)), ('b', 'n'))
+        plan = fft.FFTPlan(a)
+        self.assertRaises(IncompatibleArrayError, plan,
+                          self.make_localarray(np.zeros((8, 6)), ('n', 'b')))
+
+    def test_cache(self):
+        a = self.make_localarray(np.zeros((8, 6)), ('b', 'n'))
+        self.assertIs(fft.get_plan(a, 'rfftn'), fft.get_plan(a, 'rfftn'))
+        self.assertIsNot(fft.get_plan(a, 'rfftn'), fft.get_plan(a))
+
+    def test_cache_keeps_recently_used(self):
+        a = self.make_localarray(np.zeros((8, 6)), ('b', 'n'))
+        cache_size, plans = fft.PLAN_CACHE_SIZE, fft._plans.copy()
+        fft.PLAN_CACHE_SIZE = 2
+        fft._plans.clear()
+        try:
+            plan = fft.get_plan(a, 'fftn')
+            rplan = fft.get_plan(a, 'rfftn')
+            fft.get_plan(a, 'fftn')
+            fft.get_plan(a, 'ifftn')
+            self.assertIs(fft.get_plan(a, 'fftn'), plan)
+            self.assertIsNot(fft.get_plan(a, 'rfftn'), rplan)
+        finally:
+            fft.PLAN_CACHE_SIZE = cache_size
+            fft._plans.clear()
+            fft._plans.update(plans)
+
+
+if __name__ == '__main__':
+    try:
+        unittest.main()
+    except SystemExit:
+        pass
@@ -0,0 +1,113 @@
+import unittest
+import numpy as np
+from numpy.testing import assert_array_equal
+
+import distarray.local.denselocalarray as da
+from distarray.testing import MpiTestCase
+from distarray.utils import local_block
+
+
+class TestGhostCells(MpiTestCase):
+
+    def make(self, arr, dist, grid_shape=None, width=1):
+        a = da.LocalArray(arr.shape, dtype=arr.dtype, dist=dist,
+                          grid_shape=grid_shape, comm=self.comm)
+        a.local_array[...] = local_block(arr, a.dim_data)
+        a.set_ghost_width(width)
+        return a
+
+    def expected(self, arr, a):
+        """The padded local array: the neighbouring data, with zeros
+        beyond the edge of the global array."""
+        width = a.ghost_width
+        padded = np.zeros([n + 2 * w for n, w in zip(arr.shape, width)],
+                          dtype=arr.dtype)
+        padded[tuple(slice(w, w + n) for n, w in zip(arr.shape, width))] = arr
+        dim_data = []
+        for w, dd in zip(width, a.dim_data):
+            if w and dd['dist_type'] == 'n':
+                dd = dict(dd, size=dd['size'] + 2 * w)
+            elif w:
+                dd = dict(dd, size=dd['size'] + 2 * w,
+                          stop=dd['stop'] + 2 * w)
+            dim_data.append(dd)
+        return local_block(padded, dim_data)
+
+    def check(self, arr, dist, grid_shape=None, width=1):
+        a = self.make(arr, dist, grid_shape, width)
+        a.exchange_halos()
+        assert_array_equal(a.padded_array, self.expected(arr, a))
+        assert_array_equal(a.local_array, local_block(arr, a.dim_data))
+
+    def test_one_dimension(self):
+        arr = np.arange(20.0)
+        self.check(arr, ('b',))
+        self.check(arr, ('b',), width=3)
+
+    def test_rows(self):
+        arr = np.arange(48).reshape(12, 4)
+        self.check(arr, ('b', 'n'), width=2)
+        self.check(arr, ('b', 'n'), width=(1, 0))
+        self.check(arr, ('b', 'c'), width=1)
+
+    def test_undistributed_ghosts_are_kept(self):
+        arr = np.arange(48).reshape(12, 4)
+        a = self.make(arr, ('b', 'n'), width=(1, 2))
+        a.padded_array[:, :2] = -1
+        a.exchange_halos()
+        assert_array_equal(a.padded_array[:, :2], -1)
+
+    def test_corners(self):
+        arr = np.arange(96.0).reshape(8, 12)
+        self.check(arr, ('b', 'b'), grid_shape=(2, 2))
+        self.check(arr, ('b', 'b'), grid_shape=(2, 2), width=(2, 1))
+        self.check(arr, ('b', 'b'), grid_shape=(1, 4), width=(1, 2))
+
+    def test_three_dimensions(self):
+        arr = np.random.RandomState(0).random_sample((6, 5, 8))
+        self.check(arr, ('b', 'n', 'b'), grid_shape=(2, 2))
+        self.check(arr, ('n', 'b', 'c'), width=(0, 1, 0))
+
+    def test_dtypes(self):
+        arr = np.arange(24).reshape(8, 3)
+        for dtype in (bool, 'int8', 'int32', 'float32', complex):
+            self.check(arr.astype(dtype), ('b', 'n'))
+
+    def test_repeated_exchange(self):
+        arr = np.arange(40.0).reshape(8, 5)
+        a = self.make(arr, ('b', 'n'))
+        a.exchange_halos()
+        a.local_array[...] *= 2
+        a.sync()
+        assert_array_equal(a.padded_array, self.expected(2 * arr, a))
+
+    def test_set_localarray(self):
+        arr = np.arange(40.0).reshape(8, 5)
+        a = self.make(arr, ('b', 'n'))
+        a.set_localarray(-local_block(arr, a.dim_data))
+        a.exchange_halos()
+        assert_array_equal(a.padded_array, self.expected(-arr, a))
+
+    def test_no_ghosts(self):
+        a = da.LocalArray((8, 5), dist=('b', 'n'), comm=self.comm)
+        self.assertEqual(a.ghost_width, (0, 0))
+        self.assertIs(a.padded_array, a.local_array)
+        a.exchange_halos()
+
+    def test_bad_widths(self):
+        a = da.LocalArray((8, 5), dist=('b', 'c'), grid_shape=(2, 2),
+                          comm=self.comm)
+        self.assertRaises(ValueError, a.set_ghost_width, (1, 1))
+        self.assertEqual(a.ghost_width, (0, 0))
+        self.assertRaises(ValueError, a.set_ghost_width, (-1, 0))
+        self.assertRaises(ValueError, a.set_ghost_width, (5, 0))
+        self.assertRaises(ValueError, a.set_ghost_width,
+                          (self.comm.Get_rank(), 0))
+        self.assertRaises(da.InvalidDimensionError, a.set_ghost_width, (1,))
+
+
+if __name__ == '__main__':
+    try:
+        unittest.main()
+    except SystemExit:
+        pass
@@ -0,0 +1,102 @@
+import unittest
+import numpy as np
+from numpy.testing import assert_allclose, assert_array_equal
+
+import distarray.local.denselocalarray as da
+from distarray.local.error import IncompatibleArrayError
+from distarray.testing import MpiTestCase
+from distarray.utils import local_block
+
+
+class TestHistogram(MpiTestCase):
+
+    def setUp(self):
+        self.arr = np.random.RandomState(0).normal(size=(9, 7))
+
+    def test_histogram(self):
+        for dist in (('b', 'n'), ('c', 'b'), ('n', 'c')):
+            a = self.make_localarray(self.arr, dist)
+            for kwargs in ({}, {'bins': 4}, {'range': (-1, 1)},
+                           {'bins': [-3, -1, 0, 0.5, 3]},
+                           {'bins': 5, 'density': True}):
+                hist, edges = da.histogram(a, **kwargs)
+                expected, expected_edges = np.histogram(self.arr, **kwargs)
+                assert_allclose(hist, expected)
+                assert_allclose(edges, expected_edges)
+
+    def test_weights(self):
+        w = np.arange(63.0).reshape(9, 7)
+        a = self.make_localarray(self.arr, ('b', 'n'))
+        hist, edges = da.histogram(a, bins=6,
+                                   weights=self.make_localarray(w, ('b', 'n')))
+        assert_allclose(hist, np.histogram(self.arr, bins=6, weights=w)[0])
+        self.assertRaises(IncompatibleArrayError, da.histogram, a,
+                          weights=self.make_localarray(w, ('c', 'n')))
+
+    def test_empty_local_arrays(self):
+        arr = np.array([[3.0, 5.0, 4.0]])
+        a = self.make_localarray(arr, ('b', 'n'))
+        hist, edges = da.histogram(a, bins=3)
+        expected, expected_edges = np.histogram(arr, bins=3)
+        assert_array_equal(hist, expected)
+        assert_allclose(edges, expected_edges)
+
+    def test_unsigned(self):
+        arr = np.random.RandomState(0).randint(3, 250, size=(9, 7))
+        arr = arr.astype(np.uint8)
+        a = self.make_localarray(arr, ('b', 'c'))
+        hist, edges = da.histogram(a, bins=5)
+        expected, expected_edges = np.histogram(arr, bins=5)
+        assert_array_equal(hist, expected)
+        assert_allclose(edges, expected_edges)
+        hist, xedges, yedges = da.histogram2d(a, a, bins=4)
+        expected = np.histogram2d(arr.ravel(), arr.ravel(), bins=4)
+        assert_allclose(hist, expected[0])
+        assert_allclose(xedges, expected[1])
+        assert_allclose(yedges, expected[2])
+
+    def test_histogram2d(self):
+        y = np.random.RandomState(1).uniform(size=(9, 7))
+        for bins in (5, (3, 4), [[-3, 0, 3], [0, 0.5, 1]], [3, [0, 1]]):
+            hist, xedges, yedges = da.histogram2d(
+                self.make_localarray(self.arr, ('b', 'c')),
+                self.make_localarray(y, ('b', 'c')), bins=bins)
+            expected = np.histogram2d(self.arr.ravel(), y.ravel(), bins=bins)
+            assert_allclose(hist, expected[0])
+            assert_allclose(xedges, expected[1])
+            assert_allclose(yedges, expected[2])
+        self.assertRaises(IncompatibleArrayError, da.histogram2d,
+                          self.make_localarray(self.arr, ('b', 'n')),
+                          self.make_localarray(y, ('n', 'b')))
+
+    def test_digitize(self):
+        a = self.make_localarray(self.arr, ('c', 'b'))
+        bins = [-1, 0, 1]
+        result = da.digitize(a, bins)
+        self.assertEqual(result.dim_data, a.dim_data)
+        assert_array_equal(result.local_array,
+                           local_block(np.digitize(self.arr, bins),
+                                       a.dim_data))
+
+    def test_bincount(self):
+        arr = np.random.RandomState(0).randint(0, 11, size=30)
+        a = self.make_localarray(arr, ('c',))
+        assert_array_equal(da.bincount(a), np.bincount(arr))
+        assert_array_equal(da.bincount(a, minlength=20),
+                           np.bincount(arr, minlength=20))
+        w = np.linspace(0, 1, 30)
+        weights = self.make_localarray(w, ('c',))
+        assert_allclose(da.bincount(a, weights=weights),
+                        np.bincount(arr, weights=w))
+
+    def test_bincount_empty_local_arrays(self):
+        arr = np.array([2, 5], dtype=np.int32)
+        a = self.make_localarray(arr, ('b',))
+        assert_array_equal(da.bincount(a), np.bincount(arr))
+
+
+if __name__ == '__main__':
+    try:
+        unittest.main()
+    except SystemExit:
+        pass
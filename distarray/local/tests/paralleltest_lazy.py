@@ -0,0 +1,148 @@
+import unittest
+import numpy as np
+from numpy.testing import assert_array_equal, assert_allclose
+
+import distarray.local.denselocalarray as da
+from distarray.local import lazy
+from distarray.local.error import IncompatibleArrayError
+from distarray.testing import MpiTestCase
+
+
+class TestEvaluate(MpiTestCase):
+
+    def setUp(self):
+        self.a = da.LocalArray((40, 30), dist=('b', 'n'), comm=self.comm)
+        self.b = da.LocalArray((40, 30), dist=('b', 'n'), comm=self.comm)
+        self.a.local_array[...] = np.random.random(self.a.local_shape)
+        self.b.local_array[...] = np.random.random(self.b.local_shape)
+
+    def test_expression(self):
+        # cos(10.0 * a) + sin(b / 20.0)
+        program = [('array', 0),
+                   ('scalar', 10.0),
+                   ('ufunc', 'multiply', (1, 0), {}),
+                   ('ufunc', 'cos', (2,), {}),
+                   ('array', 1),
+                   ('scalar', 20.0),
+                   ('ufunc', 'divide', (4, 5), {}),
+                   ('ufunc', 'sin', (6,), {}),
+                   ('ufunc', 'add', (3, 7), {})]
+        expected = (np.cos(10.0 * self.a.local_array) +
+                    np.sin(self.b.local_array / 20.0))
+        for chunk_size in (1, 7, 30, 1000, lazy.CHUNK_SIZE):
+            c = lazy.evaluate(program, (self.a, self.b),
+                              chunk_size=chunk_size)
+            assert_allclose(c.local_array, expected)
+            self.assertEqual(c.dim_data, self.a.dim_data)
+
+    def test_shared_subexpression(self):
+        # t = a * b; t + t * a
+        program = [('array', 0),
+                   ('array', 1),
+                   ('ufunc', 'multiply', (0, 1), {}),
+                   ('ufunc', 'multiply', (2, 0), {}),
+                   ('ufunc', 'add', (2, 3), {})]
+        t = self.a.local_array * self.b.local_array
+        c = lazy.evaluate(program, (self.a, self.b), chunk_size=13)
+        assert_allclose(c.local_array, t + t * self.a.local_array)
+
+    def test_dtypes(self):
+        a = da.LocalArray((40,), dtype='int32', comm=self.comm)
+        a.fill(3)
+        program = [('array', 0),
+                   ('scalar', 2),
+                   ('ufunc', 'multiply', (0, 1), {}),
+                   ('scalar', 0.5),
+                   ('ufunc', 'add', (2, 3), {}),
+                   ('scalar', 6.5),
+                   ('ufunc', 'equal', (4, 5), {})]
+        c = lazy.evaluate(program, (a,), chunk_size=3)
+        self.assertEqual(c.dtype, np.dtype(bool))
+        self.assertTrue(np.all(c.local_array))
+
+    def test_noncontiguous(self):
+        a = self.a[3:37:3, 5:25]
+        program = [('array', 0), ('ufunc', 'negative', (0,), {})]
+        c = lazy.evaluate(program, (a,), chunk_size=8)
+        assert_array_equal(c.local_array, -a.local_array)
+
+    def test_incompatible(self):
+        c = da.LocalArray((40, 30), dist=('n', 'b'), comm=self.comm)
+        program = [('array', 0), ('array', 1), ('ufunc', 'add', (0, 1), {})]
+        self.assertRaises(IncompatibleArrayError, lazy.evaluate, program,
+                          (self.a, c))
+
+    def test_where(self):
+        # where(a < b, a * 2, b - 1) + 1
+        program = [('array', 0),
+                   ('array', 1),
+                   ('ufunc', 'less', (0, 1), {}),
+                   ('scalar', 2),
+                   ('ufunc', 'multiply', (0, 3), {}),
+                   ('scalar', 1),
+                   ('ufunc', 'subtract', (1, 5), {}),
+                   ('ufunc', 'where', (2, 4, 6), {}),
+                   ('ufunc', 'add', (7, 5), {})]
+        a, b = self.a.local_array, self.b.local_array
+        expected = np.where(a < b, a * 2, b - 1) + 1
+        for chunk_size in (7, lazy.CHUNK_SIZE):
+            c = lazy.evaluate(program, (self.a, self.b),
+                              chunk_size=chunk_size)
+            assert_allclose(c.local_array, expected)
+
+    def test_where_nonbool_condition(self):
+        # where(floor(2 * a), a, b)
+        program = [('array', 0),
+                   ('scalar', 2.0),
+                   ('ufunc', 'multiply', (1, 0), {}),
+                   ('ufunc', 'floor', (2,), {}),
+                   ('array', 1),
+                   ('ufunc', 'where', (3, 0, 4), {})]
+        a, b = self.a.local_array, self.b.local_array
+        expected = np.where(np.floor(2 * a), a, b)
+        c = lazy.evaluate(program, (self.a, self.b), chunk_size=7)
+        assert_allclose(c.local_array, expected)
+
+
+class TestPlanBuffers(unittest.TestCase):
+
+    def test_buffers_are_reused(self):
+        program = [('array', 0),
+                   ('ufunc', 'sin', (0,), {}),
+                   ('ufunc', 'cos', (1,), {}),
+                   ('ufunc', 'exp', (2,), {}),
+                   ('ufunc', 'sqrt', (3,), {})]
+        dtypes = [np.dtype(float)] * len(program)
+        plan = lazy._plan_buffers(program, dtypes)
+        self.assertEqual(len(plan['dtypes']), 1)
+
+    def test_live_buffers_are_not_reused(self):
+        program = [('array', 0),
+                   ('ufunc', 'sin', (0,), {}),
+                   ('ufunc', 'cos', (0,), {}),
+                   ('ufunc', 'add', (1, 2), {}),
+                   ('ufunc', 'multiply', (3, 1), {})]
+        dtypes = [np.dtype(float)] * len(program)
+        plan = lazy._plan_buffers(program, dtypes)
+        self.assertNotEqual(plan['slots'][1], plan['slots'][2])
+        self.assertNotEqual(plan['slots'][1], plan['slots'][3])
+
+    def test_where_keeps_its_operands(self):
+        program = [('array', 0),
+                   ('ufunc', 'sin', (0,), {}),
+                   ('ufunc', 'cos', (0,), {}),
+                   ('ufunc', 'greater', (1, 2), {}),
+                   ('ufunc', 'where', (3, 1, 2), {}),
+                   ('ufunc', 'sqrt', (4,), {})]
+        dtypes = [np.dtype(float)] * 3 + [np.dtype(bool)] + \
+            [np.dtype(float)] * 2
+        plan = lazy._plan_buffers(program, dtypes)
+        self.assertNotIn(plan['slots'][4], (plan['slots'][1],
+                                            plan['slots'][2]))
+
+
+if __name__ == '__main__':
+    try:
+        unittest.main()
+    except SystemExit:
+        pass
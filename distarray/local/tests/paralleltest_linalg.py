@@ -0,0 +1,144 @@
+import unittest
+import numpy as np
+from numpy.testing import assert_allclose
+
+import distarray.local.denselocalarray as da
+from distarray.testing import MpiTestCase
+
+
+class TestMatrixProduct(MpiTestCase):
+
+    def setUp(self):
+        random = np.random.RandomState(0)
+        self.x = random.random_sample((9, 7))
+        self.y = random.random_sample((7, 10))
+
+    def check(self, x_dist, y_dist, x_grid=None, y_grid=None):
+        a = self.make_localarray(self.x, x_dist, x_grid)
+        b = self.make_localarray(self.y, y_dist, y_grid)
+        c = da.dot(a, b)
+        self.assertEqual(c.dist, ('b', 'b'))
+        assert_allclose(self.gather_localarray(c), np.dot(self.x, self.y))
+
+    def test_summa(self):
+        for grid_shape in ((2, 2), (1, 4), (4, 1)):
+            self.check(('b', 'b'), ('b', 'b'), grid_shape, grid_shape)
+
+    def test_result_distribution(self):
+        a = self.make_localarray(self.x, ('b', 'b'), (2, 2))
+        b = self.make_localarray(self.y, ('b', 'b'), (2, 2))
+        c = da.dot(a, b)
+        self.assertEqual(c.grid_shape, (2, 2))
+        self.assertEqual(c.dim_data[0]['start'], a.dim_data[0]['start'])
+        self.assertEqual(c.dim_data[1]['stop'], b.dim_data[1]['stop'])
+
+    def test_redistributes(self):
+        self.check(('b', 'n'), ('n', 'b'))
+        self.check(('b', 'b'), ('b', 'b'), (2, 2), (4, 1))
+        self.check(('c', 'b'), ('b', 'c'), (2, 2), (2, 2))
+
+    def test_narrow_panels(self):
+        width = da.DOT_PANEL_WIDTH
+        da.DOT_PANEL_WIDTH = 2
+        try:
+            self.check(('b', 'b'), ('b', 'b'), (2, 2), (2, 2))
+        finally:
+            da.DOT_PANEL_WIDTH = width
+
+    def test_dtypes(self):
+        x = np.arange(12).reshape(4, 3)
+        y = np.arange(6).reshape(3, 2) * 1j
+        c = da.dot(self.make_localarray(x, ('b', 'b'), (2, 2)),
+                   self.make_localarray(y, ('b', 'b'), (2, 2)))
+        self.assertEqual(c.dtype, np.dtype(complex))
+        assert_allclose(self.gather_localarray(c), np.dot(x, y))
+
+    def test_method_and_operator(self):
+        a = self.make_localarray(self.x, ('b', 'b'), (2, 2))
+        b = self.make_localarray(self.y, ('b', 'b'), (2, 2))
+        expected = np.dot(self.x, self.y)
+        assert_allclose(self.gather_localarray(a.dot(b)), expected)
+        assert_allclose(self.gather_localarray(a.__matmul__(b)), expected)
+        assert_allclose(self.gather_localarray(da.matmul(a, b)), expected)
+
+    def test_not_aligned(self):
+        a = self.make_localarray(self.x, ('b', 'b'), (2, 2))
+        self.assertRaises(ValueError, da.dot, a, a)
+
+
+class TestSummaPanels(unittest.TestCase):
+
+    def test_aligned(self):
+        panels = da._summa_panels([(0, 4), (4, 8)], [(0, 4), (4, 8)], 256)
+        self.assertEqual(panels, [(0, 4, 0, 0), (4, 8, 1, 1)])
+
+    def test_misaligned(self):
+        panels = da._summa_panels([(0, 5), (5, 8)],
+                                  [(0, 2), (2, 4), (4, 6), (6, 8)], 256)
+        self.assertEqual(panels, [(0, 2, 0, 0), (2, 4, 0, 1), (4, 5, 0, 2),
+                                  (5, 6, 1, 2), (6, 8, 1, 3)])
+
+    def test_width(self):
+        panels = da._summa_panels([(0, 5)], [(0, 5)], 2)
+        self.assertEqual(panels, [(0, 2, 0, 0), (2, 4, 0, 0), (4, 5, 0, 0)])
+
+    def test_empty_blocks(self):
+        panels = da._summa_panels([(0, 3), (3, 3)], [(0, 3), (3, 3)], 256)
+        self.assertEqual(panels, [(0, 3, 0, 0)])
+
+
+class TestMatrixVector(MpiTestCase):
+
+    def setUp(self):
+        random = np.random.RandomState(0)
+        self.x = random.random_sample((10, 7))
+        self.v = random.random_sample(7)
+
+    def test_block_rows(self):
+        a = self.make_localarray(self.x, ('b', 'n'))
+        for dist in ('b', 'c'):
+            v = self.make_localarray(self.v, (dist,))
+            result = da.dot(a, v)
+            self.assertEqual(result.dim_data[0], a.dim_data[0])
+            assert_allclose(self.gather_localarray(result),
+                            np.dot(self.x, self.v))
+
+    def test_other_distributions(self):
+        v = self.make_localarray(self.v, ('b',))
+        for dist, grid_shape in ((('b', 'b'), (2, 2)), (('n', 'b'), None),
+                                 (('c', 'n'), None)):
+            a = self.make_localarray(self.x, dist, grid_shape)
+            assert_allclose(self.gather_localarray(da.dot(a, v)),
+                            np.dot(self.x, self.v))
+
+    def test_not_aligned(self):
+        a = self.make_localarray(self.x, ('b', 'n'))
+        v = self.make_localarray(np.ones(10), ('b',))
+        self.assertRaises(ValueError, da.dot, a, v)
+
+
+class TestVectorProducts(MpiTestCase):
+
+    def test_dot(self):
+        x = np.arange(10.0)
+        y = np.linspace(0, 1, 10)
+        a = self.make_localarray(x, ('b',))
+        for dist in ('b', 'c'):
+            b = self.make_localarray(y, (dist,))
+            assert_allclose(da.dot(a, b), np.dot(x, y))
+
+    def test_vdot(self):
+        x = np.arange(12.0).reshape(4, 3) * 1j
+        y = np.arange(12.0).reshape(4, 3) + 1j
+        a = self.make_localarray(x, ('b', 'n'))
+        b = self.make_localarray(y, ('n', 'b'))
+        assert_allclose(da.vdot(a, b), np.vdot(x, y))
+        self.assertRaises(ValueError, da.vdot, a,
+                          self.make_localarray(x.T, ('b', 'n')))
+
+
+if __name__ == '__main__':
+    try:
+        unittest.main()
+    except SystemExit:
+        pass
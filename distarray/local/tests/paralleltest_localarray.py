@@ -1,8 +1,11 @@
 import unittest
 import numpy as np
+from numpy.testing import assert_array_equal
 
 import distarray.local.denselocalarray as da
 from distarray import utils
+from distarray.local import construct
+from distarray.utils import local_block
 from distarray.testing import MpiTestCase
 from distarray.local.error import IncompatibleArrayError
 
@@ -200,6 +203,41 @@ class TestGridShape(MpiTestCase):
         self.assertEqual(self.larr.grid_shape, (2,2,3))
 
 
+class TestCommCache(MpiTestCase):
+
+    """Test sharing of cartesian communicators between LocalArrays."""
+
+    def test_compatible_arrays_share_comm(self):
+        a = da.LocalArray((16, 16), dist=('b', 'n'), comm=self.comm)
+        b = da.LocalArray((8, 4), dist=('c', 'n'), comm=self.comm)
+        c = np.cos(a)
+        self.assertIs(a.comm, b.comm)
+        self.assertIs(a.comm, c.comm)
+
+    def test_different_grids_get_different_comms(self):
+        a = da.LocalArray((16, 16), dist=('b', 'b'), grid_shape=(2, 2),
+                          comm=self.comm)
+        b = da.LocalArray((16, 16), dist=('b', 'b'), grid_shape=(1, 4),
+                          comm=self.comm)
+        c = da.LocalArray((16, 16), dist=('b', 'n'), comm=self.comm)
+        self.assertIsNot(a.comm, b.comm)
+        self.assertIsNot(a.comm, c.comm)
+        self.assertEqual(a.comm.Get_topo()[0], [2, 2])
+        self.assertEqual(b.comm.Get_topo()[0], [1, 4])
+
+    def test_free_unused_comms(self):
+        from distarray.local import construct
+        a = da.LocalArray((16, 16), dist=('b', 'b'), grid_shape=(4, 1),
+                          comm=self.comm)
+        comm = a.comm
+        del a
+        construct.free_unused_comms(self.comm)
+        b = da.LocalArray((16, 16), dist=('b', 'b'), grid_shape=(4, 1),
+                          comm=self.comm)
+        self.assertIsNot(b.comm, comm)
+        self.assertEqual(b.comm.Get_topo()[0], [4, 1])
+
+
 class TestDistMatrix(MpiTestCase):
 
     """Test the dist_matrix."""
@@ -390,6 +428,122 @@ class TestIndexing(MpiTestCase):
             self.assertEqual(global_inds, a.unpack_index(packed_ind))
 
 
+class TestSlicing(MpiTestCase):
+
+    def setUp(self):
+        self.a = da.LocalArray((20, 6), dist=('b', 'n'), comm=self.comm)
+        for global_inds, value in da.ndenumerate(self.a):
+            self.a[global_inds] = global_inds[0] * 6 + global_inds[1]
+        self.expected = np.arange(120).reshape(20, 6)
+
+    def gather(self, la):
+        out = np.zeros(la.global_shape)
+        for global_inds, value in da.ndenumerate(la):
+            out[global_inds] = value
+        return self.comm.allreduce(out)
+
+    def test_block_slice(self):
+        b = self.a[3:17:3, 1:5]
+        self.assertEqual(b.global_shape, (5, 4))
+        self.assertEqual(b.dist, ('b', 'n'))
+        np.testing.assert_array_equal(self.gather(b),
+                                      self.expected[3:17:3, 1:5])
+
+    def test_view_shares_data(self):
+        b = self.a[5:15]
+        b[:] = -1
+        c = self.gather(self.a)
+        self.expected[5:15] = -1
+        np.testing.assert_array_equal(c, self.expected)
+
+    def test_setitem_slice(self):
+        self.a[2:18:4, 0] = 7
+        self.expected[2:18:4, 0] = 7
+        np.testing.assert_array_equal(self.gather(self.a), self.expected)
+
+    def test_int_on_undistributed_dim(self):
+        b = self.a[:, 2]
+        self.assertEqual(b.global_shape, (20,))
+        np.testing.assert_array_equal(self.gather(b), self.expected[:, 2])
+
+    def test_int_on_distributed_dim_raises(self):
+        with self.assertRaises(NotImplementedError):
+            self.a[2, 1:3]
+
+    def test_cyclic_slice(self):
+        a = da.LocalArray((21,), dist={0: 'c'}, comm=self.comm)
+        for global_inds, value in da.ndenumerate(a):
+            a[global_inds] = global_inds[0]
+        b = a[2:20:3]
+        self.assertEqual(b.dist, ('u',))
+        np.testing.assert_array_equal(self.gather(b), np.arange(2, 20, 3))
+
+    def test_ufunc_on_slice(self):
+        b = self.a[1:19:2]
+        c = da.negative(b)
+        self.assertEqual(c.dim_data, b.dim_data)
+        np.testing.assert_array_equal(self.gather(c),
+                                      -self.expected[1:19:2])
+
+    def test_incompatible_slices(self):
+        b = self.a[0:10]
+        c = self.a[10:20]
+        self.assertRaises(IncompatibleArrayError, da.add, b, c)
+
+
+class TestRedist(MpiTestCase):
+
+    def setUp(self):
+        self.arr = np.arange(7 * 9 * 2).reshape(7, 9, 2)
+
+    def make(self, dist, grid_shape=None):
+        a = da.LocalArray(self.arr.shape, dtype=self.arr.dtype, dist=dist,
+                          grid_shape=grid_shape, comm=self.comm)
+        a.local_array[...] = local_block(self.arr, a.dim_data)
+        return a
+
+    def check(self, a, dist, grid_shape=None):
+        b = a.redist(dist=dist, grid_shape=grid_shape)
+        self.assertEqual(b.dist, construct.init_dist(dist, b.ndim))
+        if grid_shape is not None:
+            self.assertEqual(b.grid_shape, tuple(grid_shape))
+        self.assertEqual(b.dtype, a.dtype)
+        assert_array_equal(b.local_array, local_block(self.arr, b.dim_data))
+
+    def test_rows_to_columns(self):
+        self.check(self.make(('b', 'n', 'n')), ('n', 'b', 'n'))
+
+    def test_cyclic_to_block(self):
+        self.check(self.make(('c', 'n', 'n')), ('b', 'n', 'n'))
+        self.check(self.make(('n', 'c', 'n')), ('b', 'c', 'n'), (2, 2))
+
+    def test_grid_shapes(self):
+        a = self.make(('b', 'b', 'n'), (2, 2))
+        for grid_shape in ((1, 4), (4, 1), (2, 2)):
+            self.check(a, ('c', 'b', 'n'), grid_shape)
+
+    def test_same_distribution(self):
+        a = self.make(('b', 'n', 'n'))
+        b = a.redist(dist=('b', 'n', 'n'))
+        self.assertIsNot(b, a)
+        assert_array_equal(b.local_array, a.local_array)
+
+    def test_unstructured_source(self):
+        a = self.make(('c', 'n', 'n'))[::2]
+        self.arr = self.arr[::2]
+        self.check(a, ('n', 'b', 'n'))
+
+    def test_asdist(self):
+        a = self.make(('b', 'n', 'n'))
+        b = a.asdist(self.arr.shape, dist=('n', 'n', 'b'))
+        assert_array_equal(b.local_array, local_block(self.arr, b.dim_data))
+
+    def test_redistribute_shape_mismatch(self):
+        a = self.make(('b', 'n', 'n'))
+        b = da.LocalArray((7, 9), comm=self.comm)
+        self.assertRaises(ValueError, da.redistribute, a, b)
+
+
 class TestLocalArrayMethods(MpiTestCase):
 
     def test_asdist_like(self):
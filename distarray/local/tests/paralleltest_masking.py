@@ -0,0 +1,155 @@
+import unittest
+import numpy as np
+from numpy.testing import assert_array_equal
+
+import distarray.local.denselocalarray as da
+from distarray.local.error import IncompatibleArrayError
+from distarray.testing import MpiTestCase
+
+
+class MaskingTestCase(MpiTestCase):
+
+    def setUp(self):
+        self.arr = np.random.RandomState(0).normal(size=(9, 7))
+        self.dists = (('b', 'n'), ('c', 'b'), ('n', 'c'), ('b', 'b'))
+
+
+class TestWhere(MaskingTestCase):
+
+    def test_where(self):
+        y = np.arange(63.0).reshape(9, 7)
+        for dist in self.dists:
+            a = self.make_localarray(self.arr, dist)
+            result = da.where(a > 0, a, self.make_localarray(y, dist))
+            self.assertEqual(result.dim_data, a.dim_data)
+            assert_array_equal(self.gather_localarray(result),
+                               np.where(self.arr > 0, self.arr, y))
+
+    def test_scalars(self):
+        a = self.make_localarray(self.arr, ('b', 'c'))
+        result = da.where(a > 0, 1, -1)
+        assert_array_equal(self.gather_localarray(result),
+                           np.where(self.arr > 0, 1, -1))
+
+    def test_condition_only(self):
+        a = self.make_localarray(self.arr, ('c', 'b'))
+        for index, expected in zip(da.where(a > 0),
+                                   np.where(self.arr > 0)):
+            assert_array_equal(self.gather_localarray(index), expected)
+
+    def test_errors(self):
+        a = self.make_localarray(self.arr, ('b', 'n'))
+        self.assertRaises(ValueError, da.where, a > 0, a)
+        self.assertRaises(IncompatibleArrayError, da.where, a > 0, a,
+                          self.make_localarray(self.arr, ('n', 'b')))
+
+
+class TestMasking(MaskingTestCase):
+
+    def test_mask(self):
+        for dist in self.dists:
+            a = self.make_localarray(self.arr, dist)
+            result = a[a > 0]
+            self.assertEqual(result.dist, ('b',))
+            expected = self.arr[self.arr > 0]
+            self.assertEqual(result.global_shape, expected.shape)
+            self.assertEqual(result.local_shape,
+                             (result.dim_data[0]['stop'] -
+                              result.dim_data[0]['start'],))
+            assert_array_equal(self.gather_localarray(result), expected)
+
+    def test_nothing_selected(self):
+        a = self.make_localarray(self.arr, ('b', 'n'))
+        result = a[a > 100]
+        self.assertEqual(result.global_shape, (0,))
+        for index in a.nonzero():
+            self.assertEqual(index.global_shape, (63,))
+            self.assertEqual(index.dtype, np.intp)
+
+    def test_nonzero(self):
+        arr = self.arr > 0.5
+        for dist in self.dists:
+            a = self.make_localarray(arr, dist)
+            result = a.nonzero()
+            self.assertEqual(len(result), 2)
+            for index, expected in zip(result, arr.nonzero()):
+                assert_array_equal(self.gather_localarray(index), expected)
+
+    def test_mask_errors(self):
+        a = self.make_localarray(self.arr, ('b', 'n'))
+        self.assertRaises(IndexError, a.__getitem__, a)
+        self.assertRaises(IncompatibleArrayError, a.__getitem__,
+                          self.make_localarray(self.arr > 0, ('n', 'b')))
+
+    def test_setitem(self):
+        for dist in self.dists:
+            a = self.make_localarray(self.arr, dist)
+            a[a < 0] = 0
+            assert_array_equal(self.gather_localarray(a),
+                               np.maximum(self.arr, 0))
+
+
+class TestCompress(MaskingTestCase):
+
+    def setUp(self):
+        super(TestCompress, self).setUp()
+        self.condition = np.random.RandomState(1).random_sample(9) > 0.4
+
+    def test_axes(self):
+        for dist in self.dists:
+            a = self.make_localarray(self.arr, dist)
+            for axis, condition in ((0, self.condition),
+                                    (1, self.condition[:7]),
+                                    (1, [True, False, True])):
+                result = a.compress(condition, axis=axis)
+                assert_array_equal(self.gather_localarray(result),
+                                   self.arr.compress(condition, axis=axis))
+
+    def test_flattened(self):
+        condition = np.random.RandomState(2).random_sample(50) > 0.5
+        a = self.make_localarray(self.arr, ('c', 'b'))
+        assert_array_equal(self.gather_localarray(da.compress(condition, a)),
+                           np.compress(condition, self.arr))
+
+    def test_block_stays_block(self):
+        a = self.make_localarray(self.arr, ('b', 'n'))
+        result = a.compress(self.condition, axis=0)
+        self.assertEqual(result.dist, ('b', 'n'))
+
+    def test_out_of_bounds(self):
+        a = self.make_localarray(self.arr, ('b', 'n'))
+        condition = np.zeros(10, dtype=bool)
+        condition[9] = True
+        self.assertRaises(IndexError, a.compress, condition, axis=0)
+
+
+class TestPutmask(MaskingTestCase):
+
+    def test_scalar(self):
+        a = self.make_localarray(self.arr, ('c', 'b'))
+        da.putmask(a, a > 0, 5)
+        expected = self.arr.copy()
+        np.putmask(expected, expected > 0, 5)
+        assert_array_equal(self.gather_localarray(a), expected)
+
+    def test_repeated_values(self):
+        for dist in self.dists:
+            a = self.make_localarray(self.arr, dist)
+            da.putmask(a, a > 0, [10, 20, 30])
+            expected = self.arr.copy()
+            np.putmask(expected, expected > 0, [10, 20, 30])
+            assert_array_equal(self.gather_localarray(a), expected)
+
+    def test_localarray_values(self):
+        y = np.arange(63.0).reshape(9, 7)
+        a = self.make_localarray(self.arr, ('b', 'b'))
+        a.putmask(self.make_localarray(y, ('b', 'b')), a > 0)
+        assert_array_equal(self.gather_localarray(a), np.where(self.arr > 0, y,
+                                                    self.arr))
+
+
+if __name__ == '__main__':
+    try:
+        unittest.main()
+    except SystemExit:
+        pass
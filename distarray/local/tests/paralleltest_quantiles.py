@@ -0,0 +1,92 @@
+import unittest
+import numpy as np
+from numpy.testing import assert_allclose
+
+import distarray.local.denselocalarray as da
+from distarray.testing import MpiTestCase
+
+
+class TestQuantiles(MpiTestCase):
+
+    def setUp(self):
+        self.arr = np.random.RandomState(0).normal(size=(40, 30))
+        self.q = np.array([0, 0.1, 0.25, 0.5, 0.9, 1])
+
+    def test_exact(self):
+        gather_size = da.SELECT_GATHER_SIZE
+        da.SELECT_GATHER_SIZE = 10
+        try:
+            for dist in (('b', 'n'), ('c', 'b'), ('n', 'c')):
+                a = self.make_localarray(self.arr, dist)
+                assert_allclose(da.quantile(a, self.q),
+                                np.percentile(self.arr, 100 * self.q))
+                self.assertEqual(a.median(), np.median(self.arr))
+                assert_allclose(a.percentile(37), np.percentile(self.arr, 37))
+        finally:
+            da.SELECT_GATHER_SIZE = gather_size
+
+    def test_ties(self):
+        arr = np.random.RandomState(0).randint(0, 5, size=(30, 7))
+        gather_size = da.SELECT_GATHER_SIZE
+        da.SELECT_GATHER_SIZE = 4
+        try:
+            a = self.make_localarray(arr, ('b', 'c'))
+            assert_allclose(da.quantile(a, self.q),
+                            np.percentile(arr, 100 * self.q))
+            self.assertEqual(a.median(), np.median(arr))
+        finally:
+            da.SELECT_GATHER_SIZE = gather_size
+
+    def test_nan(self):
+        arr = self.arr.copy()
+        arr[3, 4] = np.nan
+        a = self.make_localarray(arr, ('b', 'n'))
+        self.assertTrue(np.isnan(a.median()))
+        self.assertTrue(np.isnan(a.median(approximate=True)))
+
+    def test_empty_local_arrays(self):
+        arr = np.array([[4.0, 1.0, 3.0], [2.0, 5.0, 0.0]])
+        a = self.make_localarray(arr, ('b', 'n'))
+        self.assertEqual(a.median(), np.median(arr))
+
+    def test_keepdims(self):
+        a = self.make_localarray(self.arr, ('b', 'n'))
+        result = a.median(keepdims=True)
+        self.assertEqual(result.global_shape, (1, 1))
+        assert_allclose(self.gather_localarray(result),
+                        [[np.median(self.arr)]])
+
+    def test_undistributed_axis(self):
+        a = self.make_localarray(self.arr, ('b', 'n'))
+        result = a.quantile(0.3, axis=1)
+        self.assertIsInstance(result, da.LocalArray)
+        assert_allclose(self.gather_localarray(result),
+                        np.percentile(self.arr, 30, axis=1))
+        self.assertRaises(NotImplementedError, a.median, axis=0)
+
+    def test_bad_quantile(self):
+        a = self.make_localarray(self.arr, ('b', 'n'))
+        self.assertRaises(ValueError, a.quantile, 1.5)
+
+    def test_approximate(self):
+        arr = np.random.RandomState(0).normal(size=(400, 250))
+        a = self.make_localarray(arr, ('c', 'b'))
+        result = da.quantile(a, self.q, approximate=True)
+        # The same on every process.
+        for other in self.comm.allgather(result):
+            assert_allclose(other, result)
+        ranks = np.searchsorted(np.sort(arr.ravel()), result) / arr.size
+        self.assertLess(np.abs(ranks - self.q).max(), 0.03)
+
+    def test_approximate_small_is_exact(self):
+        # Fewer elements than a sketch holds.
+        arr = self.arr[:12, :10]
+        a = self.make_localarray(arr, ('b', 'n'))
+        assert_allclose(a.median(approximate=True), np.median(arr))
+
+
+if __name__ == '__main__':
+    try:
+        unittest.main()
+    except SystemExit:
+        pass
@@ -0,0 +1,223 @@
+import unittest
+import numpy as np
+from numpy.testing import assert_allclose, assert_array_equal
+
+import distarray.local.denselocalarray as da
+from distarray.local.error import IncompatibleArrayError
+from distarray.testing import MpiTestCase
+
+
+class ReductionTestCase(MpiTestCase):
+
+    def check(self, arr, dist, name, grid_shape=None, **kwargs):
+        a = self.make_localarray(arr, dist, grid_shape)
+        result = getattr(a, name)(**kwargs)
+        expected = self.expected(arr, name, **kwargs)
+        if np.isscalar(expected):
+            self.assertTrue(np.isscalar(result))
+        else:
+            self.assertIsInstance(result, da.LocalArray)
+            result = self.gather_localarray(result)
+        self.assertEqual(result.dtype, expected.dtype)
+        assert_allclose(result, expected)
+
+    def expected(self, arr, name, keepdims=False, **kwargs):
+        """Reduce the ndarray `arr` with NumPy, adding the `keepdims`
+        axes ourselves: older NumPy lacks the keyword on some methods."""
+        expected = getattr(arr, name)(**kwargs)
+        if keepdims:
+            axis = kwargs.get('axis')
+            if axis is None:
+                axis = tuple(range(arr.ndim))
+            axes = [ax % arr.ndim for ax in np.atleast_1d(axis)]
+            shape = [1 if dim in axes else n
+                     for dim, n in enumerate(arr.shape)]
+            expected = np.reshape(expected, shape)
+        return expected
+
+
+class TestReductions(ReductionTestCase):
+
+    def setUp(self):
+        self.arr = np.arange(42, dtype=float).reshape(7, 6) - 20
+
+    def test_full(self):
+        for name in ('sum', 'prod', 'min', 'max', 'mean', 'var', 'std'):
+            for dist in (('b', 'n'), ('c', 'b'), ('n', 'c')):
+                self.check(self.arr, dist, name)
+
+    def test_axes(self):
+        for name in ('sum', 'prod', 'min', 'max', 'mean', 'var', 'std'):
+            for dist in (('b', 'n'), ('c', 'b'), ('n', 'c'), ('b', 'b')):
+                for axis in (0, 1, -1, (0, 1)):
+                    self.check(self.arr, dist, name, axis=axis)
+
+    def test_keepdims(self):
+        for name in ('sum', 'max', 'mean', 'var'):
+            for dist in (('b', 'n'), ('c', 'b')):
+                for axis in (None, 0, 1):
+                    self.check(self.arr, dist, name, axis=axis,
+                               keepdims=True)
+
+    def test_three_dimensions(self):
+        arr = np.random.RandomState(0).random_sample((5, 4, 3))
+        for dist in (('b', 'c', 'n'), ('b', 'n', 'b'), ('n', 'b', 'c')):
+            for axis in (0, 1, 2, (0, 1), (0, 2), (1, 2)):
+                self.check(arr, dist, 'sum', axis=axis)
+                self.check(arr, dist, 'std', axis=axis, ddof=1)
+
+    def test_grid_shapes(self):
+        arr = np.random.RandomState(0).random_sample((6, 8))
+        for grid_shape in ((1, 4), (4, 1), (2, 2)):
+            for axis in (0, 1):
+                self.check(arr, ('b', 'c'), 'mean', grid_shape=grid_shape,
+                           axis=axis)
+
+    def test_dtypes(self):
+        arr = np.arange(1, 25, dtype='int32').reshape(4, 6)
+        for dtype in (None, int, 'float32'):
+            self.check(arr, ('b', 'n'), 'sum', axis=0, dtype=dtype)
+            self.check(arr, ('b', 'n'), 'mean', axis=0, dtype=dtype)
+        for dtype in (None, 'float32'):
+            self.check(arr, ('b', 'n'), 'var', dtype=dtype)
+            self.check(arr, ('b', 'n'), 'std', axis=1, dtype=dtype)
+        self.check(arr, ('b', 'n'), 'max', axis=0)
+        self.check(arr % 3 + 1j, ('c', 'n'), 'var', axis=0)
+
+    def test_all_any(self):
+        arr = np.zeros((5, 4), dtype=bool)
+        arr[1, 2] = True
+        for dist in (('b', 'n'), ('b', 'c')):
+            for axis in (None, 0, 1):
+                self.check(arr, dist, 'any', axis=axis)
+                self.check(~arr, dist, 'all', axis=axis)
+
+    def test_empty_local_arrays(self):
+        # Some processes own no rows.
+        arr = np.arange(6.0).reshape(2, 3)
+        for name in ('sum', 'min', 'max', 'mean', 'all'):
+            self.check(arr, ('b', 'n'), name, axis=0)
+
+    def test_integer_var(self):
+        # Computed in floating point, then truncated.
+        arr = np.arange(1, 25).reshape(4, 6)
+        a = self.make_localarray(arr, ('b', 'n'))
+        self.assertEqual(a.var(dtype=int), int(arr.var()))
+        assert_array_equal(self.gather_localarray(a.std(axis=0, dtype=int)),
+                           arr.std(axis=0).astype(int))
+
+    def test_var_chunks(self):
+        arr = np.random.RandomState(0).random_sample((23, 3, 2))
+        chunk_size = da.MOMENTS_CHUNK_SIZE
+        da.MOMENTS_CHUNK_SIZE = 10
+        try:
+            for dist in (('b', 'n', 'n'), ('n', 'c', 'n')):
+                for axis in (None, 0, 1, (0, 2), (1, 2)):
+                    self.check(arr, dist, 'var', axis=axis)
+        finally:
+            da.MOMENTS_CHUNK_SIZE = chunk_size
+
+    def test_var_large_offset(self):
+        arr = 1e9 + np.random.RandomState(0).random_sample((40, 5))
+        a = self.make_localarray(arr, ('b', 'n'))
+        assert_allclose(a.var(), arr.var(), rtol=1e-6)
+        assert_allclose(self.gather_localarray(a.var(axis=0)), arr.var(axis=0),
+                        rtol=1e-6)
+
+    def test_module_functions(self):
+        a = self.make_localarray(self.arr, ('b', 'n'))
+        self.assertEqual(da.sum(a), self.arr.sum())
+        assert_allclose(self.gather_localarray(da.prod(a, axis=1)),
+                        self.arr.prod(1))
+
+
+class TestLocations(ReductionTestCase):
+
+    def setUp(self):
+        self.arr = np.random.RandomState(0).random_sample((7, 6))
+
+    def test_argmax_argmin(self):
+        for name in ('argmax', 'argmin'):
+            for dist in (('b', 'n'), ('c', 'b'), ('n', 'c'), ('b', 'b')):
+                for axis in (None, 0, 1):
+                    self.check(self.arr, dist, name, axis=axis)
+                    self.check(self.arr, dist, name, axis=axis,
+                               keepdims=True)
+
+    def test_ties_go_to_first_index(self):
+        arr = np.zeros((7, 6))
+        arr[2:, 3] = 1
+        for name in ('argmax', 'argmin'):
+            for dist in (('b', 'n'), ('c', 'c')):
+                for axis in (None, 0, 1):
+                    self.check(arr, dist, name, axis=axis)
+
+    def test_nan(self):
+        arr = self.arr.copy()
+        arr[5, 1] = arr[6, 1] = arr[3, 4] = np.nan
+        for name in ('argmax', 'argmin'):
+            for axis in (None, 0, 1):
+                self.check(arr, ('c', 'n'), name, axis=axis)
+
+    def test_integers(self):
+        arr = np.random.RandomState(0).randint(-5, 5, size=(7, 6))
+        for name in ('argmax', 'argmin', 'ptp'):
+            for axis in (None, 0, 1):
+                self.check(arr, ('b', 'c'), name, axis=axis)
+
+    def test_ptp(self):
+        for dist in (('b', 'n'), ('n', 'c'), ('b', 'b')):
+            for axis in (None, 0, 1):
+                self.check(self.arr, dist, 'ptp', axis=axis)
+        self.check(self.arr, ('b', 'n'), 'ptp', axis=0, keepdims=True)
+
+    def test_empty_local_arrays(self):
+        arr = self.arr[:2]
+        for name in ('argmax', 'argmin', 'ptp'):
+            for axis in (None, 0):
+                self.check(arr, ('b', 'n'), name, axis=axis)
+
+    def test_tuple_axis(self):
+        a = self.make_localarray(self.arr, ('b', 'n'))
+        self.assertRaises(TypeError, a.argmax, axis=(0, 1))
+
+
+class TestReductionResult(ReductionTestCase):
+
+    def test_column_sums_keep_distribution(self):
+        a = self.make_localarray(np.ones((8, 6)), ('b', 'n'))
+        result = a.sum(axis=0)
+        self.assertEqual(result.dist, ('b',))
+        self.assertEqual(result.grid_shape, (4,))
+
+    def test_row_sums_need_no_communication(self):
+        a = self.make_localarray(np.ones((8, 6)), ('b', 'n'))
+        result = a.sum(axis=1)
+        self.assertEqual(result.dim_data[0]['start'],
+                         a.dim_data[0]['start'])
+        self.assertEqual(result.local_shape, (a.local_shape[0],))
+
+    def test_out(self):
+        arr = np.random.RandomState(0).random_sample((8, 6))
+        a = self.make_localarray(arr, ('n', 'b'))
+        out = a.max(axis=0)
+        result = a.min(axis=0, out=out)
+        self.assertIs(result, out)
+        assert_allclose(self.gather_localarray(out), arr.min(axis=0))
+
+    def test_out_incompatible(self):
+        a = self.make_localarray(np.ones((8, 6)), ('b', 'n'))
+        out = da.LocalArray((8,), dist='c', comm=self.comm)
+        self.assertRaises(IncompatibleArrayError, a.sum, axis=1, out=out)
+        self.assertRaises(IncompatibleArrayError, a.sum, axis=0, out=out)
+
+    def test_bad_axis(self):
+        a = self.make_localarray(np.ones((8, 6)), ('b', 'n'))
+        self.assertRaises(ValueError, a.sum, axis=(0, 0))
+
+
+if __name__ == '__main__':
+    try:
+        unittest.main()
+    except SystemExit:
+        pass
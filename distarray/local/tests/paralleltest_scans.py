@@ -0,0 +1,68 @@
+import unittest
+import numpy as np
+from numpy.testing import assert_allclose
+
+import distarray.local.denselocalarray as da
+from distarray.local.error import IncompatibleArrayError
+from distarray.testing import MpiTestCase
+
+
+class TestScans(MpiTestCase):
+
+    def check(self, arr, dist, name, grid_shape=None, **kwargs):
+        a = self.make_localarray(arr, dist, grid_shape)
+        result = getattr(a, name)(**kwargs)
+        expected = getattr(arr, name)(**kwargs)
+        self.assertEqual(result.dtype, expected.dtype)
+        if kwargs.get('axis') is not None:
+            self.assertEqual(result.dim_data, a.dim_data)
+        assert_allclose(self.gather_localarray(result), expected)
+
+    def setUp(self):
+        self.arr = np.random.RandomState(0).random_sample((9, 6)) + 0.5
+
+    def test_axes(self):
+        for name in ('cumsum', 'cumprod'):
+            for dist in (('b', 'n'), ('n', 'b'), ('b', 'b'), ('c', 'n'),
+                         ('b', 'c')):
+                for axis in (0, 1, -1):
+                    self.check(self.arr, dist, name, axis=axis)
+
+    def test_grid_shapes(self):
+        for grid_shape in ((1, 4), (4, 1), (2, 2)):
+            for axis in (0, 1):
+                self.check(self.arr, ('b', 'b'), 'cumsum',
+                           grid_shape=grid_shape, axis=axis)
+
+    def test_flattened(self):
+        for dist in (('b', 'n'), ('c', 'b'), ('n', 'b')):
+            self.check(self.arr, dist, 'cumsum')
+        self.check(np.arange(1, 11), ('c',), 'cumprod')
+
+    def test_empty_local_arrays(self):
+        arr = np.arange(1.0, 7.0).reshape(2, 3)
+        for name in ('cumsum', 'cumprod'):
+            self.check(arr, ('b', 'n'), name, axis=0)
+
+    def test_dtype(self):
+        arr = np.arange(24, dtype='int8').reshape(4, 6)
+        self.check(arr, ('b', 'n'), 'cumsum', axis=0)
+        self.check(arr, ('b', 'n'), 'cumsum', axis=0, dtype=float)
+        self.check(arr % 2 == 0, ('n', 'b'), 'cumsum', axis=1)
+
+    def test_out(self):
+        a = self.make_localarray(self.arr, ('c', 'b'))
+        out = a._new_like(dtype=float)
+        result = da.cumsum(a, axis=0, out=out)
+        self.assertIs(result, out)
+        assert_allclose(self.gather_localarray(out), self.arr.cumsum(axis=0))
+        other = self.make_localarray(self.arr, ('b', 'n'))
+        self.assertRaises(IncompatibleArrayError, da.cumsum, a, axis=1,
+                          out=other)
+
+
+if __name__ == '__main__':
+    try:
+        unittest.main()
+    except SystemExit:
+        pass
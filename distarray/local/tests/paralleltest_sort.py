@@ -0,0 +1,104 @@
+from __future__ import division
+
+import unittest
+import numpy as np
+from numpy.testing import assert_array_equal
+
+import distarray.local.denselocalarray as da
+from distarray.testing import MpiTestCase
+
+
+class SortTestCase(MpiTestCase):
+
+    def block_sizes(self, a):
+        return self.comm.allgather(a.local_shape[0])
+
+
+class TestSort(SortTestCase):
+
+    def setUp(self):
+        random = np.random.RandomState(0)
+        self.arrays = [random.random_sample(1000),
+                       random.randint(0, 3, size=997),
+                       np.zeros(100),
+                       np.arange(50)[::-1].copy(),
+                       np.array([3.0, np.nan, 1.0, -np.inf, 2.0]),
+                       np.arange(2.0)]
+
+    def test_sort(self):
+        for arr in self.arrays:
+            for dist in ('b', 'c'):
+                result = da.sort(self.make_localarray(arr, (dist,)))
+                self.assertEqual(result.dist, ('b',))
+                assert_array_equal(self.gather_localarray(result),
+                                   np.sort(arr))
+
+    def test_balance(self):
+        for arr in self.arrays[:3]:
+            sizes = self.block_sizes(da.sort(self.make_localarray(arr)))
+            share = len(arr) / len(sizes)
+            self.assertLessEqual(max(sizes),
+                                 (1 + 1 / da.SORT_OVERSAMPLING) * share + 1)
+
+    def test_duplicates_are_shared_out(self):
+        sizes = self.block_sizes(da.sort(self.make_localarray(np.ones(102))))
+        self.assertLessEqual(max(sizes) - min(sizes), 1)
+
+    def test_argsort(self):
+        for arr in self.arrays:
+            for dist in ('b', 'c'):
+                a = self.make_localarray(arr, (dist,))
+                indices = self.gather_localarray(da.argsort(a))
+                assert_array_equal(np.sort(indices), np.arange(len(arr)))
+                assert_array_equal(arr[indices], np.sort(arr))
+
+    def test_stable_argsort(self):
+        arr = self.arrays[1]
+        indices = da.argsort(self.make_localarray(arr), kind='mergesort')
+        assert_array_equal(self.gather_localarray(indices),
+                           np.argsort(arr, kind='mergesort'))
+
+    def test_sort_in_place(self):
+        arr = self.arrays[0]
+        for dist in ('b', 'c'):
+            a = self.make_localarray(arr, (dist,))
+            dim_data = a.dim_data
+            self.assertIsNone(a.sort())
+            self.assertEqual(a.dim_data, dim_data)
+            assert_array_equal(self.gather_localarray(a), np.sort(arr))
+
+    def test_undistributed_axis(self):
+        arr = np.random.RandomState(0).random_sample((8, 5))
+        a = self.make_localarray(arr, ('b', 'n'))
+        assert_array_equal(self.gather_localarray(da.sort(a)), np.sort(arr))
+        assert_array_equal(self.gather_localarray(a.argsort()),
+                           np.argsort(arr))
+        self.assertRaises(NotImplementedError, da.sort, a, axis=0)
+        self.assertRaises(NotImplementedError, da.sort, a, axis=None)
+
+
+class TestSearchsorted(SortTestCase):
+
+    def test_searchsorted(self):
+        arr = np.sort(np.random.RandomState(0).randint(0, 20, size=50))
+        values = np.array([-1, 0, 3, 7, 7.5, 19, 25])
+        for dist in ('b', 'c'):
+            a = self.make_localarray(arr, (dist,))
+            for side in ('left', 'right'):
+                assert_array_equal(a.searchsorted(values, side=side),
+                                   np.searchsorted(arr, values, side=side))
+            self.assertEqual(da.searchsorted(a, 7), np.searchsorted(arr, 7))
+
+    def test_after_sort(self):
+        arr = np.random.RandomState(0).random_sample(200)
+        a = da.sort(self.make_localarray(arr))
+        values = np.linspace(0, 1, 11)
+        assert_array_equal(da.searchsorted(a, values),
+                           np.searchsorted(np.sort(arr), values))
+
+
+if __name__ == '__main__':
+    try:
+        unittest.main()
+    except SystemExit:
+        pass
@@ -0,0 +1,155 @@
+import unittest
+import numpy as np
+from numpy.testing import assert_allclose
+
+import distarray.local.denselocalarray as da
+from distarray.local.error import IncompatibleArrayError
+from distarray.testing import MpiTestCase
+from distarray.utils import local_block
+
+
+def correlate_nd(arr, kernel, mode):
+    """Reference N-d correlation, with the modes of `numpy.correlate`."""
+    full_shape = [n + k - 1 for n, k in zip(arr.shape, kernel.shape)]
+    padded = np.zeros([n + 2 * (k - 1)
+                       for n, k in zip(arr.shape, kernel.shape)],
+                      dtype=np.result_type(arr, kernel))
+    padded[tuple(slice(k - 1, k - 1 + n)
+                 for n, k in zip(arr.shape, kernel.shape))] = arr
+    full = np.zeros(full_shape, dtype=padded.dtype)
+    for p in np.ndindex(*kernel.shape):
+        full += np.conj(kernel[p]) * padded[tuple(
+            slice(i, i + n) for i, n in zip(p, full_shape))]
+    if mode == 'full':
+        return full
+    elif mode == 'same':
+        return full[tuple(slice((k - 1) // 2, (k - 1) // 2 + n)
+                          for n, k in zip(arr.shape, kernel.shape))]
+    else:
+        return full[tuple(slice(k - 1, n)
+                          for n, k in zip(arr.shape, kernel.shape))]
+
+
+def laplacian(u):
+    return (u[:-2, 1:-1] + u[2:, 1:-1] + u[1:-1, :-2] + u[1:-1, 2:] -
+            4 * u[1:-1, 1:-1])
+
+
+class TestStencil(MpiTestCase):
+
+    def setUp(self):
+        self.arr = np.random.RandomState(0).random_sample((13, 11))
+        padded = np.zeros((15, 13))
+        padded[1:-1, 1:-1] = self.arr
+        self.expected = laplacian(padded)
+
+    def test_laplacian(self):
+        for dist, grid_shape in ((('b', 'n'), None), (('n', 'b'), None),
+                                 (('b', 'b'), (2, 2)), (('b', 'b'), (4, 1))):
+            a = self.make_localarray(self.arr, dist, grid_shape)
+            result = da.stencil(a, laplacian, 1)
+            assert_allclose(self.gather_localarray(result), self.expected)
+            self.assertEqual(result.dim_data, a.dim_data)
+
+    def test_wide_radius(self):
+        def smooth(u):
+            return sum(u[i:i + u.shape[0] - 4] for i in range(5)) / 5
+        arr = np.random.RandomState(0).random_sample((20, 3))
+        padded = np.zeros((24, 3))
+        padded[2:-2] = arr
+        a = self.make_localarray(arr, ('b', 'n'))
+        result = da.stencil(a, smooth, (2, 0))
+        assert_allclose(self.gather_localarray(result), smooth(padded))
+
+    def test_boundary_values_from_ghosts(self):
+        a = self.make_localarray(self.arr, ('b', 'n'))
+        a.set_ghost_width(1)
+        a.padded_array[:, 0] = 1.0
+        result = da.stencil(a, laplacian, 1)
+        padded = np.zeros((15, 13))
+        padded[1:-1, 1:-1] = self.arr
+        padded[1:-1, 0] = 1.0
+        # Only the ghost cells in the undistributed dimension, and those of
+        # the processes at the edges, are boundary values.
+        if a.dim_data[0]['start'] == 0:
+            padded[0, 0] = 1.0
+        if a.dim_data[0]['stop'] == 13:
+            padded[-1, 0] = 1.0
+        assert_allclose(result.local_array,
+                        local_block(laplacian(padded), a.dim_data))
+
+    def test_out(self):
+        a = self.make_localarray(self.arr, ('b', 'n'))
+        out = a._new_like(dtype=a.dtype)
+        self.assertIs(da.stencil(a, laplacian, 1, out=out), out)
+        assert_allclose(self.gather_localarray(out), self.expected)
+        self.assertRaises(ValueError, da.stencil, a, laplacian, 1, out=a)
+        other = da.LocalArray(self.arr.shape, dist=('n', 'b'),
+                              comm=self.comm)
+        self.assertRaises(IncompatibleArrayError, da.stencil, a, laplacian,
+                          1, out=other)
+
+    def test_bad_radius(self):
+        a = self.make_localarray(self.arr, ('b', 'c'))
+        self.assertRaises(ValueError, da.stencil, a, laplacian, 1)
+        self.assertRaises(ValueError, da.stencil, a, laplacian, (-1, 0))
+        self.assertRaises(da.InvalidDimensionError, da.stencil, a,
+                          laplacian, (1,))
+
+
+class TestCorrelate(MpiTestCase):
+
+    def check(self, arr, kernel, dist, grid_shape=None):
+        a = self.make_localarray(arr, dist, grid_shape)
+        for mode in ('valid', 'same', 'full'):
+            expected = correlate_nd(arr, kernel, mode)
+            result = da.correlate(a, kernel, mode)
+            self.assertEqual(result.global_shape, expected.shape)
+            assert_allclose(self.gather_localarray(result), expected)
+            flipped = kernel[(slice(None, None, -1),) * kernel.ndim]
+            result = da.convolve(a, np.conj(flipped), mode)
+            assert_allclose(self.gather_localarray(result), expected)
+
+    def test_one_dimension(self):
+        arr = np.random.RandomState(0).random_sample(17)
+        for k in (1, 2, 3, 4, 5):
+            kernel = np.arange(1.0, k + 1)
+            self.check(arr, kernel, ('b',))
+            for mode in ('valid', 'same', 'full'):
+                a = self.make_localarray(arr, ('b',))
+                result = da.convolve(a, kernel, mode)
+                assert_allclose(self.gather_localarray(result),
+                                np.convolve(arr, kernel, mode))
+                result = da.correlate(a, kernel, mode)
+                assert_allclose(self.gather_localarray(result),
+                                np.correlate(arr, kernel, mode))
+
+    def test_two_dimensions(self):
+        arr = np.random.RandomState(0).random_sample((12, 9))
+        for shape in ((3, 3), (2, 3), (1, 4), (4, 2)):
+            kernel = np.random.RandomState(1).random_sample(shape)
+            self.check(arr, kernel, ('b', 'n'))
+            self.check(arr, kernel, ('b', 'b'), (2, 2))
+
+    def test_cyclic_dimension(self):
+        arr = np.random.RandomState(0).random_sample((12, 9))
+        self.check(arr, np.ones((3, 1)), ('b', 'c'))
+
+    def test_dtypes(self):
+        arr = np.arange(40).reshape(8, 5)
+        self.check(arr, np.array([[1, 2, 1]]), ('b', 'n'))
+        self.check(arr, np.array([[0.5], [1j]]), ('b', 'n'))
+
+    def test_errors(self):
+        a = self.make_localarray(np.zeros((8, 3)), ('b', 'n'))
+        self.assertRaises(ValueError, da.correlate, a, np.ones(3))
+        self.assertRaises(ValueError, da.correlate, a, np.ones((3, 4)))
+        self.assertRaises(ValueError, da.convolve, a, np.ones((3, 3)),
+                          'middle')
+
+
+if __name__ == '__main__':
+    try:
+        unittest.main()
+    except SystemExit:
+        pass
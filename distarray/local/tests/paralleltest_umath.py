@@ -55,6 +55,32 @@ class TestBinaryUFunc(MpiTestCase):
         self.assertRaises(IncompatibleArrayError, denselocalarray.add, a, b, c)
 
 
+class TestOutWhere(MpiTestCase):
+
+    def test_out_keyword(self):
+        a = da.ones((16, 16), comm=self.comm)
+        b = da.empty_like(a)
+        self.assertIs(denselocalarray.add(a, 2, out=b), b)
+        self.assertTrue(np.all(b.local_array == 3))
+        self.assertIs(denselocalarray.negative(a, out=b), b)
+        self.assertTrue(np.all(b.local_array == -1))
+
+    def test_where(self):
+        a = da.ones((16, 16), comm=self.comm)
+        b = da.zeros((16, 16), comm=self.comm)
+        mask = da.zeros((16, 16), dtype=bool, comm=self.comm)
+        mask.local_array[::2] = True
+        denselocalarray.add(a, a, out=b, where=mask)
+        assert_array_equal(b.local_array, np.where(mask.local_array, 2, 0))
+
+    def test_where_incompatible(self):
+        a = da.ones((16, 16), dist=('b', 'n'), comm=self.comm)
+        mask = da.ones((16, 16), dtype=bool, dist=('n', 'b'),
+                       comm=self.comm)
+        self.assertRaises(IncompatibleArrayError, denselocalarray.sqrt, a,
+                          where=mask)
+
+
 def add_checkers(cls, ops, bad_ops):
     """Add a test method to `cls` for all `ops`
 
@@ -115,6 +141,43 @@ class TestLocalArrayBinaryOperations(MpiTestCase):
         assert_array_equal(result0.local_array, y.local_array)
 
 
+class TestInplaceOperations(MpiTestCase):
+
+    def test_inplace_ops(self):
+        """In-place operators write into the existing local array."""
+        for op in ('__iadd__', '__isub__', '__imul__', '__itruediv__',
+                   '__ifloordiv__', '__imod__', '__ipow__'):
+            for other in (2.0, da.ones((16, 16), comm=self.comm) * 3):
+                a = da.ones((16, 16), comm=self.comm)
+                local_array = a.local_array
+                expected = getattr(local_array.copy(), op)(
+                    np.asarray(other))
+                result = getattr(a, op)(other)
+                self.assertIs(result, a)
+                self.assertIs(a.local_array, local_array)
+                assert_array_equal(a.local_array, expected)
+
+    def test_inplace_bitwise(self):
+        a = da.ones((16, 16), dtype=int, comm=self.comm)
+        a <<= 3
+        a |= 1
+        a ^= 2
+        a &= 7
+        a >>= 1
+        self.assertTrue(np.all(a.local_array == 1))
+
+    def test_inplace_incompatible(self):
+        a = da.ones((16, 16), dist=('b', 'n'), comm=self.comm)
+        b = da.ones((16, 16), dist=('n', 'b'), comm=self.comm)
+        with self.assertRaises(IncompatibleArrayError):
+            a += b
+
+    def test_inplace_casting(self):
+        a = da.ones((16, 16), dtype=int, comm=self.comm)
+        with self.assertRaises(TypeError):
+            a += 1.5
+
+
 uops = (dc.absolute, dc.arccos, dc.arccosh, dc.arcsin, dc.arcsinh, dc.arctan,
         dc.arctanh, dc.conjugate, dc.cos, dc.cosh, dc.exp, dc.expm1, dc.log,
         dc.log10, dc.log1p, dc.negative, dc.reciprocal, dc.rint, dc.sign,
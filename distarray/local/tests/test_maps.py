@@ -1,4 +1,5 @@
 import unittest
+import numpy
 from distarray.local import maps
 
 from distarray.externals.six.moves import range
@@ -161,6 +162,84 @@ class TestMapEquivalences(unittest.TestCase):
         self.assertEqual(bcm_lis, cm_lis)
 
 
+class TestUnstructuredMap(unittest.TestCase):
+
+    def setUp(self):
+        dimdict = dict(dist_type='u', size=20, indices=[7, 1, 12, 3])
+        self.m = maps.IndexMap.from_dimdict(dimdict)
+
+    def test_local_index(self):
+        lis = [self.m.local_index[gi] for gi in (7, 1, 12, 3)]
+        self.assertEqual(lis, [0, 1, 2, 3])
+
+    def test_local_index_KeyError(self):
+        self.assertRaises(KeyError, self.m.local_index.__getitem__, 2)
+        self.assertRaises(KeyError, self.m.local_index.__getitem__, 13)
+
+    def test_global_index(self):
+        self.assertEqual(list(self.m.global_index), [7, 1, 12, 3])
+
+    def test_global_index_IndexError(self):
+        self.assertRaises(IndexError, self.m.global_index.__getitem__, 4)
+
+
+class TestArrayIndices(unittest.TestCase):
+
+    def check_roundtrip(self, dimdict):
+        m = maps.IndexMap.from_dimdict(dimdict)
+        lis = numpy.arange(m.size)
+        gis = m.local_to_global(lis)
+        numpy.testing.assert_array_equal(gis, numpy.asarray(m.global_index))
+        numpy.testing.assert_array_equal(m.global_to_local(gis), lis)
+        self.assertEqual(list(gis), [m.global_index[li] for li in range(m.size)])
+
+    def test_block(self):
+        self.check_roundtrip(dict(dist_type='b', start=16, stop=39))
+
+    def test_cyclic(self):
+        self.check_roundtrip(dict(dist_type='c', start=3, size=30,
+                                  proc_grid_size=4))
+
+    def test_block_cyclic(self):
+        self.check_roundtrip(dict(dist_type='c', start=2, size=17,
+                                  proc_grid_size=4, block_size=2))
+
+    def test_unstructured(self):
+        self.check_roundtrip(dict(dist_type='u', size=20,
+                                  indices=[7, 1, 12, 3]))
+
+    def test_KeyError_if_any_not_owned(self):
+        m = maps.IndexMap.from_dimdict(dict(dist_type='c', start=1, size=16,
+                                            proc_grid_size=4))
+        self.assertRaises(KeyError, m.global_to_local, numpy.array([1, 2]))
+
+    def test_IndexError_if_any_out_of_range(self):
+        m = maps.IndexMap.from_dimdict(dict(dist_type='b', start=0, stop=4))
+        self.assertRaises(IndexError, m.local_to_global, numpy.array([0, 4]))
+
+
+class TestClosedForm(unittest.TestCase):
+
+    def test_block_cyclic_sizes(self):
+        """Compare the computed local sizes with explicit enumeration."""
+        for size in range(0, 40):
+            for grid in (1, 2, 3, 4):
+                for block in (1, 2, 3, 5):
+                    for rank in range(grid):
+                        start = rank * block
+                        m = maps.BlockCyclicMap(start, size, grid, block)
+                        expected = [i for i in range(size)
+                                    if (i // block) % grid == rank]
+                        self.assertEqual(list(m.global_index), expected)
+
+    def test_large_map_is_cheap(self):
+        m = maps.IndexMap.from_dimdict(dict(dist_type='c', start=1,
+                                            size=10**15, proc_grid_size=4))
+        self.assertEqual(m.size, (10**15 - 1 + 3) // 4)
+        self.assertEqual(m.global_index[m.size - 1], 10**15 - 3)
+        self.assertEqual(m.local_index[10**15 - 3], m.size - 1)
+
+
 if __name__ == '__main__':
     try:
         unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+
+import numpy as np
+from numpy.testing import assert_allclose
+
+from distarray.local.sketch import QuantileSketch
+
+
+class TestQuantileSketch(unittest.TestCase):
+
+    def setUp(self):
+        self.values = np.random.RandomState(0).normal(size=200000)
+        self.q = np.linspace(0, 1, 21)
+
+    def rank_error(self, values, result):
+        ranks = np.searchsorted(np.sort(values), result) / float(len(values))
+        return np.abs(ranks - self.q).max()
+
+    def test_exact_while_small(self):
+        sketch = QuantileSketch(k=100, seed=0)
+        sketch.update(self.values[:50])
+        self.assertTrue(sketch.exact)
+        assert_allclose(sketch.quantile(self.q),
+                        np.percentile(self.values[:50], 100 * self.q))
+
+    def test_bounded_memory(self):
+        sketch = QuantileSketch(k=100, seed=0)
+        for chunk in np.array_split(self.values, 50):
+            sketch.update(chunk)
+        self.assertEqual(sketch.count, self.values.size)
+        self.assertLessEqual(sum(len(level) for level in sketch._levels),
+                             3 * 100 + 2 * len(sketch._levels))
+        self.assertLess(self.rank_error(self.values,
+                                        sketch.quantile(self.q)), 0.05)
+
+    def test_merge(self):
+        sketches = []
+        for seed, part in enumerate(np.array_split(self.values, 4)):
+            sketches.append(QuantileSketch(k=200, seed=seed))
+            sketches[-1].update(part)
+        merged = sketches[0]
+        for other in sketches[1:]:
+            merged.merge(other)
+        self.assertEqual(merged.count, self.values.size)
+        self.assertLess(self.rank_error(self.values,
+                                        merged.quantile(self.q)), 0.03)
+
+    def test_nan(self):
+        sketch = QuantileSketch()
+        sketch.update([1.0, np.nan, 3.0])
+        self.assertTrue(np.isnan(sketch.quantile(0.5)))
+
+    def test_empty(self):
+        self.assertRaises(ValueError, QuantileSketch().quantile, 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -41,6 +41,7 @@ class Random(object):
         self.context._execute(
             '%s = distarray.local.random.rand(%s,%s,%s,%s)' % subs
         )
+        self.context._delete_keys(*keys)
         return DistArray(new_key, self.context)
 
     def normal(self, loc=0.0, scale=1.0, size=None, dist={0: 'b'},
@@ -106,6 +107,7 @@ class Random(object):
         self.context._execute(
             '%s = distarray.local.random.normal(%s,%s,%s,%s,%s,%s)' % subs
         )
+        self.context._delete_keys(*keys)
         return DistArray(new_key, self.context)
 
     def randint(self, low, high=None, size=None, dist={0: 'b'},
@@ -150,6 +152,7 @@ class Random(object):
         self.context._execute(
             '%s = distarray.local.random.randint(%s,%s,%s,%s,%s,%s)' % subs
         )
+        self.context._delete_keys(*keys)
         return DistArray(new_key, self.context)
 
     def randn(self, size=None, dist={0: 'b'}, grid_shape=None):
@@ -181,4 +184,5 @@ class Random(object):
         self.context._execute(
             '%s = distarray.local.random.randn(%s,%s,%s,%s)' % subs
         )
+        self.context._delete_keys(*keys)
         return DistArray(new_key, self.context)
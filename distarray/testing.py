@@ -8,10 +8,14 @@ from uuid import uuid4
 from functools import wraps
 from distarray.externals import six
 
+import numpy as np
+from numpy.testing import assert_array_equal
 from IPython.parallel import Client
 
 from distarray.error import InvalidCommSizeError
+from distarray.local.denselocalarray import LocalArray
 from distarray.mpiutils import MPI, create_comm_of_size
+from distarray.utils import local_block, place_local_block
 
 
 def temp_filepath(extension=''):
@@ -115,6 +119,26 @@ class MpiTestCase(unittest.TestCase):
         if cls.comm != MPI.COMM_NULL:
             cls.comm.Free()
 
+    def make_localarray(self, arr, dist=None, grid_shape=None):
+        """Distribute the ndarray `arr` over `self.comm`."""
+        a = LocalArray(arr.shape, dtype=arr.dtype, dist=dist,
+                       grid_shape=grid_shape, comm=self.comm)
+        a.local_array[...] = local_block(arr, a.dim_data)
+        return a
+
+    def gather_localarray(self, a):
+        """Assemble the LocalArray `a` on every process, checking each
+        element is owned exactly once."""
+        result = np.zeros(a.global_shape, dtype=a.dtype)
+        owners = np.zeros(a.global_shape, dtype=int)
+        for block, dim_data in self.comm.allgather((a.local_array,
+                                                    a.dim_data)):
+            place_local_block(result, block, dim_data)
+            place_local_block(owners, np.ones(block.shape, dtype=int),
+                              dim_data)
+        assert_array_equal(owners, 1)
+        return result
+
 
 class IpclusterTestCase(unittest.TestCase):
 
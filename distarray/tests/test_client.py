@@ -9,17 +9,23 @@ engines should be launched with MPI, using the MPIEngineSetLauncher.
 import unittest
 import numpy
 
-from numpy.testing import assert_array_equal
+from numpy.testing import assert_allclose, assert_array_equal
 from random import shuffle
-from IPython.parallel import Client
+from IPython.parallel import Client, interactive
 from distarray.externals.six.moves import range
 
+import distarray
 from distarray.client import DistArray
 from distarray.context import Context
-from distarray.local import LocalArray
+from distarray.local import LocalArray, construct
 from distarray.testing import IpclusterTestCase
 
 
+@interactive
+def _has_key(key):
+    return key in globals()
+
+
 class TestContext(unittest.TestCase):
     """Test Context methods"""
 
@@ -71,6 +77,91 @@ class TestContextCreation(IpclusterTestCase):
         self.assertEqual(ctx1.targets, ctx2.targets)
 
 
+class TestContextBatch(IpclusterTestCase):
+    """Test batching of engine commands."""
+
+    def setUp(self):
+        self.dac = Context(self.client)
+
+    def test_batch_results(self):
+        with self.dac.batch():
+            a = self.dac.ones((16, 16))
+            b = self.dac.zeros((16, 16))
+            b.fill(2.0)
+            c = a + b
+        assert_array_equal(c.tondarray(), numpy.ones((16, 16)) * 3)
+
+    def test_commands_are_queued(self):
+        with self.dac.batch():
+            a = self.dac.zeros((16,))
+            a.fill(5)
+            self.assertTrue(self.dac._batch_lines)
+            self.dac.flush()
+            self.assertFalse(self.dac._batch_lines)
+            self.assertFalse(self.dac._batch_pushes)
+
+    def test_pull_flushes(self):
+        with self.dac.batch():
+            a = self.dac.zeros((16,))
+            a.fill(5)
+            self.assertEqual(a.shape, (16,))
+            assert_array_equal(a.tondarray(), numpy.ones(16) * 5)
+
+    def test_nested_batch(self):
+        with self.dac.batch():
+            with self.dac.batch():
+                a = self.dac.ones((4,))
+            self.assertTrue(self.dac._batch_lines)
+        self.assertFalse(self.dac._batch_lines)
+        assert_array_equal(a.tondarray(), numpy.ones(4))
+
+
+class TestContextGarbage(IpclusterTestCase):
+    """Test deferred deletion of engine-side keys."""
+
+    def setUp(self):
+        self.dac = Context(self.client)
+
+    def has_key(self, key):
+        flags = self.dac._apply(_has_key, key)
+        return all(flags)
+
+    def test_deleted_with_next_execute(self):
+        a = self.dac.zeros((4,))
+        key = a.key
+        del a
+        self.assertIn(key, self.dac._garbage)
+        self.assertTrue(self.has_key(key))
+        self.dac.ones((4,))
+        self.assertNotIn(key, self.dac._garbage)
+        self.assertFalse(self.has_key(key))
+
+    def test_size_threshold(self):
+        self.dac.garbage_size_threshold = 3
+        self.dac._collect_garbage(force=True)
+        keys = self.dac._key_and_push(1, 2)
+        self.dac._delete_keys(*keys)
+        self.dac.flush()
+        self.assertEqual(len(self.dac._garbage), 2)
+        self.assertTrue(self.has_key(keys[0]))
+        more_keys = self.dac._key_and_push(3)
+        self.dac._delete_keys(*more_keys)
+        self.dac.flush()
+        self.assertEqual(self.dac._garbage, [])
+        for key in keys + more_keys:
+            self.assertFalse(self.has_key(key))
+
+    def test_scratch_keys_are_deleted(self):
+        a = self.dac.zeros((4,))
+        a.fill(3)
+        a.get_localshapes()
+        pending = list(self.dac._garbage)
+        self.assertTrue(pending)
+        self.dac._collect_garbage(force=True)
+        for key in pending:
+            self.assertFalse(self.has_key(key))
+
+
 class TestDistArray(IpclusterTestCase):
 
     def setUp(self):
@@ -86,6 +177,65 @@ class TestDistArray(IpclusterTestCase):
         for val in range(size):
             self.assertEqual(dap[val], val)
 
+    def test_redist(self):
+        arr = numpy.arange(48).reshape(8, 6)
+        da = self.dac.fromndarray(arr)
+        for dist in (('n', 'b'), ('c', 'n'), {1: 'c'}):
+            db = da.redist(dist=dist)
+            self.assertIsInstance(db, DistArray)
+            self.assertEqual(db.dist, construct.init_dist(dist, 2))
+            assert_array_equal(db.tondarray(), arr)
+
+    def test_dot(self):
+        x = numpy.arange(48.0).reshape(8, 6)
+        y = numpy.arange(24.0).reshape(6, 4)
+        v = numpy.arange(6.0)
+        dx = self.dac.fromndarray(x, dist=('b', 'b'))
+        dy = self.dac.fromndarray(y, dist=('b', 'b'))
+        dv = self.dac.fromndarray(v)
+        dz = dx.dot(dy)
+        self.assertIsInstance(dz, DistArray)
+        assert_allclose(dz.tondarray(), numpy.dot(x, y))
+        assert_allclose(dx.redist(('b', 'n')).dot(dv).tondarray(),
+                        numpy.dot(x, v))
+        assert_allclose(dv.dot(dv), numpy.dot(v, v))
+
+    def test_sort(self):
+        arr = numpy.random.RandomState(0).randint(0, 50, size=40)
+        da = self.dac.fromndarray(arr, dist={0: 'c'})
+        indices = da.argsort()
+        self.assertIsInstance(indices, DistArray)
+        assert_array_equal(arr[indices.tondarray()], numpy.sort(arr))
+        da.sort()
+        self.assertEqual(da.dist, ('c',))
+        assert_array_equal(da.tondarray(), numpy.sort(arr))
+        values = numpy.array([-1, 10, 25, 60])
+        assert_array_equal(da.searchsorted(values),
+                           numpy.searchsorted(numpy.sort(arr), values))
+
+    def test_mask(self):
+        arr = numpy.random.RandomState(0).normal(size=(8, 5))
+        da = self.dac.fromndarray(arr)
+        selected = da[da > 0]
+        self.assertIsInstance(selected, DistArray)
+        assert_array_equal(selected.tondarray(), arr[arr > 0])
+        for index, expected in zip(da.nonzero(), arr.nonzero()):
+            assert_array_equal(index.tondarray(), expected)
+        assert_array_equal(da.compress([True, False, True], axis=1)
+                           .tondarray(),
+                           arr.compress([True, False, True], axis=1))
+        da[da < 0] = 0
+        assert_array_equal(da.tondarray(), numpy.maximum(arr, 0))
+
+    def test_where_and_putmask(self):
+        arr = numpy.random.RandomState(0).normal(size=(8, 5))
+        da = self.dac.fromndarray(arr)
+        assert_array_equal(distarray.where(da > 0, da, -1).tondarray(),
+                           numpy.where(arr > 0, arr, -1))
+        distarray.putmask(da, da > 0, [1, 2, 3])
+        numpy.putmask(arr, arr > 0, [1, 2, 3])
+        assert_array_equal(da.tondarray(), arr)
+
     def test_set_and_getitem_nd_block_dist(self):
         size = 5
         dap = self.dac.empty((size, size), dist={0: 'b', 1: 'b'})
@@ -110,22 +260,40 @@ class TestDistArray(IpclusterTestCase):
         for val in range(size):
             self.assertEqual(dap[val], val)
 
-    @unittest.skip("Slicing not yet implemented.")
     def test_slice_in_getitem_block_dist(self):
         dap = self.dac.empty((100,), dist={0: 'b'})
         self.assertIsInstance(dap[20:40], DistArray)
 
-    @unittest.skip("Slicing not yet implemented.")
-    def test_slice_in_setitem_raises_valueerror(self):
-        dap = self.dac.empty((100,), dist={0: 'b'})
+    def test_slice_in_getitem_values(self):
+        ndarr = numpy.arange(200).reshape(40, 5)
+        dap = self.dac.fromndarray(ndarr, dist={0: 'b'})
+        view = dap[3:37:2, 1:4]
+        self.assertEqual(view.shape, (17, 3))
+        assert_array_equal(view.tondarray(), ndarr[3:37:2, 1:4])
+
+    def test_slice_in_getitem_cyclic_dist(self):
+        ndarr = numpy.arange(40)
+        dap = self.dac.fromndarray(ndarr, dist={0: 'c'})
+        assert_array_equal(dap[5:33:3].tondarray(), ndarr[5:33:3])
+
+    def test_slice_in_setitem_scalar(self):
+        dap = self.dac.zeros((100,), dist={0: 'b'})
+        dap[20:40] = 5
+        expected = numpy.zeros(100)
+        expected[20:40] = 5
+        assert_array_equal(dap.tondarray(), expected)
+
+    def test_slice_in_setitem_ndarray(self):
+        dap = self.dac.zeros((100,), dist={0: 'c'})
         vals = numpy.random.random(20)
-        with self.assertRaises(NotImplementedError):
-            dap[20:40] = vals
+        dap[20:40] = vals
+        expected = numpy.zeros(100)
+        expected[20:40] = vals
+        assert_array_equal(dap.tondarray(), expected)
 
-    @unittest.skip('Slice assignment not yet implemented.')
     def test_slice_size_error(self):
         dap = self.dac.empty((100,), dist={0: 'c'})
-        with self.assertRaises(NotImplementedError):
+        with self.assertRaises(ValueError):
             dap[20:40] = (11, 12)
 
     def test_get_index_error(self):
@@ -152,12 +320,51 @@ class TestDistArray(IpclusterTestCase):
             dap[i, j] = ndarr[i, j]
         numpy.testing.assert_array_equal(dap.tondarray(), ndarr)
 
+    def test_tondarray_cyclic(self):
+        ndarr = numpy.arange(50).reshape(10, 5)
+        dap = self.dac.fromndarray(ndarr, dist=('c', 'b'), grid_shape=(2, 2))
+        numpy.testing.assert_array_equal(dap.tondarray(), ndarr)
+
+    def test_tondarray_out(self):
+        ndarr = numpy.arange(50.0).reshape(10, 5)
+        dap = self.dac.fromndarray(ndarr)
+        out = numpy.empty_like(ndarr)
+        result = dap.tondarray(out=out)
+        self.assertIs(result, out)
+        numpy.testing.assert_array_equal(out, ndarr)
+
+    def test_tondarray_out_wrong_shape(self):
+        dap = self.dac.zeros((10, 5))
+        with self.assertRaises(ValueError):
+            dap.tondarray(out=numpy.empty((5, 10)))
+
     def test_global_tolocal_bug(self):
         # gh-issue #154
         dap = self.dac.zeros((3, 3), dist=('n', 'b'))
         ndarr = numpy.zeros((3, 3))
         numpy.testing.assert_array_equal(dap.tondarray(), ndarr)
 
+    def test_metadata_properties(self):
+        dap = self.dac.zeros((6, 4, 5), dtype=numpy.int32,
+                             dist=('n', 'c', 'n'))
+        self.assertEqual(dap.shape, (6, 4, 5))
+        self.assertEqual(dap.size, 120)
+        self.assertEqual(dap.ndim, 3)
+        self.assertEqual(dap.dist, ('n', 'c', 'n'))
+        self.assertEqual(dap.dtype, numpy.dtype(numpy.int32))
+        self.assertEqual(dap.item_size, 4)
+        self.assertEqual(dap.nbytes, 480)
+        self.assertEqual(len(dap.dim_data_per_rank), len(self.dac.targets))
+        self.assertEqual(dap.grid_shape, (len(self.dac.targets),))
+
+    def test_metadata_is_cached(self):
+        dap = self.dac.zeros((6, 4))
+        dap.shape
+        self.assertIsNotNone(dap._metadata)
+        metadata = dap._metadata
+        dap.dtype, dap.dist, dap.grid_shape
+        self.assertIs(dap._metadata, metadata)
+
 
 class TestDistArrayCreation(IpclusterTestCase):
 
@@ -189,6 +396,19 @@ class TestDistArrayCreation(IpclusterTestCase):
         for (i, j), val in numpy.ndenumerate(ndarr):
             self.assertEqual(distarr[i, j], ndarr[i, j])
 
+    def test_fromndarray_cyclic(self):
+        ndarr = numpy.arange(30).reshape(10, 3)
+        distarr = self.context.fromndarray(ndarr, dist={0: 'c'})
+        for (i, j), val in numpy.ndenumerate(ndarr):
+            self.assertEqual(distarr[i, j], ndarr[i, j])
+
+    def test_fromndarray_2d_mixed(self):
+        ndarr = numpy.arange(35).reshape(7, 5)
+        distarr = self.context.fromndarray(ndarr, dist=('b', 'c'),
+                                           grid_shape=(2, 2))
+        for (i, j), val in numpy.ndenumerate(ndarr):
+            self.assertEqual(distarr[i, j], ndarr[i, j])
+
 
 class TestReduceMethods(unittest.TestCase):
     """Test reduction methods"""
@@ -245,6 +465,61 @@ class TestReduceMethods(unittest.TestCase):
         da_std = self.darr.std(dtype=int)
         self.assertEqual(da_std, np_std)
 
+    def test_axis(self):
+        for name in ('sum', 'prod', 'min', 'max', 'mean', 'var', 'std'):
+            for axis in (0, 1):
+                result = getattr(self.darr, name)(axis=axis)
+                self.assertIsInstance(result, DistArray)
+                expected = getattr(self.arr, name)(axis=axis)
+                assert_allclose(result.tondarray(), expected)
+
+    def test_locations(self):
+        arr = numpy.sin(numpy.arange(40.0)).reshape(8, 5)
+        darr = self.context.fromndarray(arr)
+        self.assertEqual(darr.argmax(), arr.argmax())
+        self.assertEqual(darr.argmin(), arr.argmin())
+        self.assertEqual(darr.ptp(), arr.ptp())
+        for axis in (0, 1):
+            assert_array_equal(darr.argmax(axis=axis).tondarray(),
+                               arr.argmax(axis=axis))
+            assert_allclose(darr.ptp(axis=axis).tondarray(),
+                            arr.ptp(axis=axis))
+
+    def test_scans(self):
+        for axis in (None, 0, 1):
+            assert_array_equal(self.darr.cumsum(axis=axis).tondarray(),
+                               self.arr.cumsum(axis=axis))
+        assert_allclose(self.darr.cumprod(axis=1, dtype=float).tondarray(),
+                        self.arr.cumprod(axis=1, dtype=float))
+
+    def test_quantiles(self):
+        self.assertEqual(self.darr.median(), numpy.median(self.arr))
+        assert_allclose(self.darr.quantile([0.1, 0.75]),
+                        numpy.percentile(self.arr, [10, 75]))
+        self.assertEqual(self.darr.percentile(30),
+                         numpy.percentile(self.arr, 30))
+        self.assertEqual(self.darr.median(approximate=True),
+                         numpy.median(self.arr))
+
+    def test_keepdims(self):
+        result = self.darr.sum(axis=0, keepdims=True)
+        self.assertEqual(result.shape, (1, 4))
+        assert_array_equal(result.tondarray(),
+                           self.arr.sum(axis=0, keepdims=True))
+
+    def test_out(self):
+        out = self.darr.min(axis=1)
+        result = self.darr.max(axis=1, out=out)
+        self.assertIs(result, out)
+        assert_array_equal(out.tondarray(), self.arr.max(axis=1))
+
+    def test_all_any(self):
+        positive = self.darr > 0
+        self.assertFalse(positive.all())
+        self.assertTrue(positive.any())
+        assert_array_equal(positive.all(axis=0).tondarray(),
+                           (self.arr > 0).all(axis=0))
+
 
 if __name__ == '__main__':
     unittest.main(verbosity=2)
@@ -170,6 +170,12 @@ class TestLocalDecorator(TestCase):
         dc = self.local_add50(self.da)
         self.assert_allclose(dc, 2 * numpy.pi + 50)
 
+    def test_local_result_metadata(self):
+        dc = self.local_add50(self.da)
+        self.assertIsNotNone(dc._metadata)
+        self.assertEqual(dc.shape, (5, 5))
+        self.assertEqual(dc.dtype, self.da.dtype)
+
     def test_local_sum(self):
         dd = self.local_sum(self.da)
         lshapes = self.da.get_localshapes()
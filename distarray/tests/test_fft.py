@@ -0,0 +1,46 @@
+"""
+Tests for distarray.fft.
+
+Many of these tests require a 4-engine cluster to be running locally.
+"""
+
+import unittest
+
+import numpy as np
+from numpy.testing import assert_allclose
+
+from distarray import fft
+from distarray.client import DistArray
+from distarray.context import Context
+from distarray.testing import IpclusterTestCase
+
+
+class TestFFT(IpclusterTestCase):
+
+    def setUp(self):
+        self.context = Context(self.client)
+        self.arr = np.random.RandomState(0).random_sample((8, 6, 4))
+        self.da = self.context.fromndarray(self.arr)
+
+    def test_fftn(self):
+        result = fft.fftn(self.da)
+        self.assertIsInstance(result, DistArray)
+        self.assertEqual(result.dist, self.da.dist)
+        assert_allclose(result.tondarray(), np.fft.fftn(self.arr))
+
+    def test_round_trip(self):
+        result = fft.ifftn(fft.fftn(self.da))
+        assert_allclose(result.tondarray(), self.arr, atol=1e-12)
+
+    def test_rfftn(self):
+        result = fft.rfftn(self.da, axes=(0, 1))
+        self.assertEqual(result.shape, (8, 4, 4))
+        assert_allclose(result.tondarray(),
+                        np.fft.rfftn(self.arr, axes=(0, 1)))
+
+    def test_not_a_distarray(self):
+        self.assertRaises(TypeError, fft.fftn, self.arr)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
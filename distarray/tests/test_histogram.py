@@ -0,0 +1,55 @@
+"""
+Tests for the distributed histogram functions.
+
+Many of these tests require a 4-engine cluster to be running locally.
+"""
+
+import unittest
+
+import numpy as np
+from numpy.testing import assert_allclose, assert_array_equal
+
+import distarray
+from distarray.client import DistArray
+from distarray.context import Context
+from distarray.testing import IpclusterTestCase
+
+
+class TestHistogram(IpclusterTestCase):
+
+    def setUp(self):
+        self.context = Context(self.client)
+        self.arr = np.random.RandomState(0).normal(size=(12, 5))
+        self.da = self.context.fromndarray(self.arr)
+
+    def test_histogram(self):
+        hist, edges = distarray.histogram(self.da, bins=6)
+        expected, expected_edges = np.histogram(self.arr, bins=6)
+        assert_array_equal(hist, expected)
+        assert_allclose(edges, expected_edges)
+
+    def test_histogram2d(self):
+        y = np.linspace(0, 1, 60).reshape(12, 5)
+        hist, xedges, yedges = distarray.histogram2d(
+            self.da, self.context.fromndarray(y), bins=(3, 4),
+            weights=self.da)
+        expected = np.histogram2d(self.arr.ravel(), y.ravel(), bins=(3, 4),
+                                  weights=self.arr.ravel())
+        assert_allclose(hist, expected[0])
+        assert_allclose(yedges, expected[2])
+
+    def test_digitize(self):
+        result = distarray.digitize(self.da, [-1, 0, 1])
+        self.assertIsInstance(result, DistArray)
+        assert_array_equal(result.tondarray(),
+                           np.digitize(self.arr, [-1, 0, 1]))
+
+    def test_bincount(self):
+        arr = np.arange(20) % 7
+        result = distarray.bincount(self.context.fromndarray(arr),
+                                    minlength=9)
+        assert_array_equal(result, np.bincount(arr, minlength=9))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
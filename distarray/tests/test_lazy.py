@@ -0,0 +1,86 @@
+"""
+Tests for lazily evaluated DistArray expressions.
+
+Many of these tests require a 4-engine cluster to be running locally.
+"""
+
+import unittest
+
+import numpy as np
+from numpy.testing import assert_allclose, assert_array_equal
+
+import distarray
+from distarray.lazy import LazyDistArray, linearize
+from distarray.testing import IpclusterTestCase
+from distarray.context import Context
+
+
+class TestLazy(IpclusterTestCase):
+
+    def setUp(self):
+        self.context = Context(self.client)
+        self.a = np.linspace(0, 1, 60).reshape(12, 5)
+        self.b = np.linspace(2, 3, 60).reshape(12, 5)
+        self.da = self.context.fromndarray(self.a)
+        self.db = self.context.fromndarray(self.b)
+
+    def test_expression(self):
+        with self.context.lazy():
+            dc = distarray.cos(10.0 * self.da) + distarray.sin(self.db / 20.0)
+        self.assertIsInstance(dc, LazyDistArray)
+        expected = np.cos(10.0 * self.a) + np.sin(self.b / 20.0)
+        assert_allclose(dc.tondarray(), expected)
+
+    def test_not_evaluated_until_used(self):
+        with self.context.lazy():
+            dc = self.da * 2 + 1
+        self.assertIsNone(dc._key)
+        dd = dc - 1
+        self.assertIsNotNone(dc._key)
+        assert_allclose(dd.tondarray(), self.a * 2)
+
+    def test_lazy_operands_are_merged(self):
+        with self.context.lazy():
+            t = self.da * self.db
+            dc = t + t
+        program, arrays = linearize(dc._operation)
+        self.assertEqual(len(arrays), 2)
+        self.assertEqual(sum(1 for p in program if p[0] == 'ufunc'), 2)
+        assert_allclose(dc.tondarray(), 2 * self.a * self.b)
+
+    def test_inplace_op_on_operand(self):
+        with self.context.lazy():
+            dc = self.da * 2
+            self.da += 1
+        assert_allclose(dc.tondarray(), self.a * 2)
+        assert_allclose(self.da.tondarray(), self.a + 1)
+
+    def test_writes_to_operand(self):
+        with self.context.lazy():
+            dc = self.da + self.db
+        self.db[2:5] = 0
+        assert_allclose(dc.tondarray(), self.a + self.b)
+        with self.context.lazy():
+            dd = self.db * 2
+        distarray.negative(self.da, out=self.db)
+        expected = self.b * 2
+        expected[2:5] = 0
+        assert_allclose(dd.tondarray(), expected)
+
+    def test_where(self):
+        with self.context.lazy():
+            dc = distarray.where(self.da < 0.5, self.da * 2, self.db) + 1
+        self.assertIsInstance(dc, LazyDistArray)
+        program, arrays = linearize(dc._operation)
+        self.assertEqual(len(arrays), 2)
+        assert_allclose(dc.tondarray(),
+                        np.where(self.a < 0.5, self.a * 2, self.b) + 1)
+
+    def test_comparison(self):
+        with self.context.lazy():
+            dc = self.da < 0.5
+        assert_array_equal(dc.tondarray(), self.a < 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
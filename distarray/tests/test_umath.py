@@ -84,6 +84,56 @@ class TestDistArrayUfuncs(unittest.TestCase):
         assert_array_equal(result.toarray(), expected)
 
 
+class TestUfuncOut(unittest.TestCase):
+    """Test the out and where arguments of the ufuncs"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.client = Client()
+        cls.context = Context(cls.client)
+        cls.a = np.arange(1.0, 11.0)
+        cls.b = np.ones_like(cls.a) * 2
+        cls.da = cls.context.fromndarray(cls.a)
+        cls.db = cls.context.fromndarray(cls.b)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.client.close()
+
+    def test_binary_out(self):
+        dc = self.context.zeros(self.da.shape)
+        key = dc.key
+        result = distarray.add(self.da, self.db, out=dc)
+        self.assertIs(result, dc)
+        self.assertEqual(dc.key, key)
+        assert_array_equal(dc.toarray(), self.a + self.b)
+        distarray.multiply(self.da, 3, dc)
+        assert_array_equal(dc.toarray(), self.a * 3)
+
+    def test_unary_out(self):
+        dc = self.context.zeros(self.da.shape)
+        self.assertIs(distarray.negative(self.da, out=dc), dc)
+        assert_array_equal(dc.toarray(), -self.a)
+
+    def test_where(self):
+        dc = self.context.zeros(self.da.shape)
+        mask = self.da > 5
+        distarray.add(self.da, self.db, out=dc, where=mask)
+        expected = np.where(self.a > 5, self.a + self.b, 0)
+        assert_array_equal(dc.toarray(), expected)
+
+    def test_out_in_lazy_block(self):
+        dc = self.context.zeros(self.da.shape)
+        with self.context.lazy():
+            result = distarray.subtract(self.da, self.db, out=dc)
+        self.assertIs(result, dc)
+        assert_array_equal(dc.toarray(), self.a - self.b)
+
+    def test_bad_out(self):
+        self.assertRaises(TypeError, distarray.add, self.da, self.db,
+                          out=np.empty(10))
+
+
 class TestSpecialMethods(unittest.TestCase):
     """Test the __methods__"""
 
@@ -112,6 +162,31 @@ class TestSpecialMethods(unittest.TestCase):
         assert_array_equal(result.toarray(), expected)
 
 
+class TestInplaceMethods(unittest.TestCase):
+    """Test the in-place __methods__"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.client = Client()
+        cls.context = Context(cls.client)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.client.close()
+
+    def check_op(self, op_name):
+        a = np.arange(1, 11)
+        da = self.context.fromndarray(a)
+        db = self.context.fromndarray(np.ones_like(a) * 2)
+        key = da.key
+        for other, np_other in ((db, np.ones_like(a) * 2), (3, 3)):
+            result = getattr(da, op_name)(other)
+            a = getattr(a, op_name)(np_other)
+            self.assertIs(result, da)
+            self.assertEqual(da.key, key)
+            assert_array_equal(da.toarray(), a)
+
+
 unary_ops = ('absolute', 'arccos', 'arccosh', 'arcsin', 'arcsinh', 'arctan',
              'arctanh', 'conjugate', 'cos', 'cosh', 'exp', 'expm1', 'log',
              'log10', 'log1p', 'negative', 'reciprocal', 'rint', 'sign', 'sin',
@@ -131,6 +206,11 @@ binary_special_methods = ('__lt__', '__le__', '__eq__', '__ne__', '__gt__',
                           '__rand__', '__rxor__', '__ror__', '__lshift__',
                           '__rshift__', '__and__', '__xor__', '__or__',)
 
+inplace_special_methods = ('__iadd__', '__isub__', '__imul__',
+                           '__ifloordiv__', '__imod__', '__ipow__',
+                           '__ilshift__', '__irshift__', '__iand__',
+                           '__ior__', '__ixor__')
+
 # There is no divmod function in numpy. And there is no __div__
 # attribute on ndarrays.
 problematic_special_methods = ('__divmod__', '__rdivmod__', '__div__')
@@ -138,6 +218,7 @@ problematic_special_methods = ('__divmod__', '__rdivmod__', '__div__')
 add_checkers(TestDistArrayUfuncs, binary_ops, 'check_binary_op')
 add_checkers(TestDistArrayUfuncs, unary_ops, 'check_unary_op')
 add_checkers(TestSpecialMethods, binary_special_methods, 'check_op')
+add_checkers(TestInplaceMethods, inplace_special_methods, 'check_op')
 
 
 if __name__ == '__main__':
@@ -84,5 +84,59 @@ class TestHasExactlyOne(unittest.TestCase):
         iterable = [None, 5, 'abc', None, None]
         self.assertFalse(utils.has_exactly_one(iterable))
 
+
+class TestDimdictIndexer(unittest.TestCase):
+
+    def test_not_distributed(self):
+        dd = dict(dist_type='n', size=10)
+        self.assertEqual(utils.dimdict_indexer(dd), slice(0, 10))
+
+    def test_block(self):
+        dd = dict(dist_type='b', size=10, start=3, stop=6)
+        self.assertEqual(utils.dimdict_indexer(dd), slice(3, 6))
+
+    def test_cyclic(self):
+        dd = dict(dist_type='c', size=10, start=1, proc_grid_size=4)
+        arr = arange(10)
+        assert_array_equal(arr[utils.dimdict_indexer(dd)], [1, 5, 9])
+
+    def test_block_cyclic(self):
+        dd = dict(dist_type='c', size=16, start=2, proc_grid_size=4,
+                  block_size=2)
+        self.assertEqual(utils.dimdict_indexer(dd), [2, 3, 10, 11])
+
+
+class TestLocalBlock(unittest.TestCase):
+
+    def test_block_cyclic(self):
+        arr = arange(64).reshape(16, 4)
+        dim_data = (dict(dist_type='c', size=16, start=2, proc_grid_size=4,
+                         block_size=2),
+                    dict(dist_type='b', size=4, start=1, stop=3))
+        block = utils.local_block(arr, dim_data)
+        assert_array_equal(block, arr[[2, 3, 10, 11]][:, 1:3])
+        self.assertTrue(block.flags.c_contiguous)
+
+    def test_empty(self):
+        arr = arange(8)
+        dim_data = (dict(dist_type='b', size=8, start=8, stop=8),)
+        self.assertEqual(utils.local_block(arr, dim_data).shape, (0,))
+
+
+class TestPlaceLocalBlock(unittest.TestCase):
+
+    def test_round_trip(self):
+        arr = arange(64).reshape(16, 4)
+        dim_data = (dict(dist_type='c', size=16, start=1, proc_grid_size=4,
+                         block_size=2),
+                    dict(dist_type='c', size=4, start=1, proc_grid_size=2))
+        block = utils.local_block(arr, dim_data)
+        out = arr * 0
+        utils.place_local_block(out, block, dim_data)
+        rows, cols = [1, 2, 9, 10], [1, 3]
+        assert_array_equal(out[rows][:, cols], arr[rows][:, cols])
+        self.assertEqual(out.sum(), arr[rows][:, cols].sum())
+
+
 if __name__ == '__main__':
     unittest.main(verbosity=2)
@@ -1,4 +1,7 @@
-from math import sqrt
+from math import sqrt, ceil
+
+import numpy
+
 from distarray.externals.six import next
 
 
@@ -168,6 +171,12 @@ def slice_intersection(s1, s2):
         raise NotImplementedError(msg)
 
 
+def remove_keys(namespace, keys):
+    """Delete `keys` from the dict `namespace`, ignoring missing keys."""
+    for key in keys:
+        namespace.pop(key, None)
+
+
 def has_exactly_one(iterable):
     """Does `iterable` have exactly one non-None element?"""
     test = (x is not None for x in iterable)
@@ -190,3 +199,101 @@ def all_equal(iterable):
 
     return all(element == first for element in iterator)
 
+
+def dimdict_indexer(dimdict):
+    """Return an index selecting a process's portion of one dimension.
+
+    Parameters
+    ----------
+    dimdict : dict
+        A completed `dimdict` from a LocalArray's `dim_data`, as found on
+        the engines after the LocalArray has been created.
+
+    Returns
+    -------
+    slice or list of int
+        A slice for the 'n', 'b' and 'c' (with a `block_size` of 1)
+        dist_types, otherwise the list of owned global indices in local
+        order.
+    """
+    dist_type = dimdict['dist_type']
+    if dist_type == 'n':
+        return slice(0, dimdict['size'])
+    elif dist_type == 'b':
+        return slice(dimdict['start'], dimdict['stop'])
+    elif dist_type == 'c':
+        block_size = dimdict.get('block_size', 1)
+        step = dimdict['proc_grid_size']
+        if block_size == 1:
+            return slice(dimdict['start'], dimdict['size'], step)
+        nblocks = int(ceil(dimdict['size'] / float(block_size)))
+        indices = []
+        for block_index in range(0, nblocks, step):
+            block_start = block_index * block_size + dimdict['start']
+            block_stop = min(block_start + block_size, dimdict['size'])
+            indices.extend(range(block_start, block_stop))
+        return indices
+    elif dist_type == 'u':
+        return list(dimdict['indices'])
+    else:
+        raise ValueError("Unknown dist_type %r" % (dist_type,))
+
+
+def local_block(arr, dim_data):
+    """Extract the block of a global array owned by one process.
+
+    Parameters
+    ----------
+    arr : array_like
+        The global array.  Anything supporting slicing with positive steps
+        works, e.g. an ndarray, a `numpy.memmap` or an h5py dataset.
+    dim_data : tuple of dict
+        The completed `dim_data` of the process.
+
+    Returns
+    -------
+    ndarray
+        The process's local array, in local index order.
+    """
+    indexers = [dimdict_indexer(dd) for dd in dim_data]
+    # Read the bounding hyperslab first, then pick out the (block-)cyclic
+    # and unstructured dimensions one axis at a time.
+    bounds = []
+    fancy = []
+    for axis, indexer in enumerate(indexers):
+        if isinstance(indexer, slice):
+            bounds.append(indexer)
+        elif len(indexer) == 0:
+            bounds.append(slice(0, 0))
+        else:
+            lower, upper = min(indexer), max(indexer) + 1
+            bounds.append(slice(lower, upper))
+            fancy.append((axis, numpy.asarray(indexer) - lower))
+    block = numpy.asarray(arr[tuple(bounds)])
+    for axis, indices in fancy:
+        block = numpy.take(block, indices, axis=axis)
+    return numpy.ascontiguousarray(block)
+
+
+def place_local_block(out, block, dim_data):
+    """Write a process's local array into its place in a global array.
+
+    The inverse of `local_block`.
+
+    Parameters
+    ----------
+    out : ndarray
+        The global array, e.g. an ndarray or a `numpy.memmap`.
+    block : ndarray
+        The process's local array.
+    dim_data : tuple of dict
+        The completed `dim_data` of the process.
+    """
+    indexers = [dimdict_indexer(dd) for dd in dim_data]
+    if all(isinstance(indexer, slice) for indexer in indexers):
+        out[tuple(indexers)] = block
+    else:
+        ranges = [numpy.arange(*indexer.indices(dd['size']))
+                  if isinstance(indexer, slice) else indexer
+                  for indexer, dd in zip(indexers, dim_data)]
+        out[numpy.ix_(*ranges)] = block